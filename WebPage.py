@@ -1,6 +1,15 @@
+import time
+import uuid
+
 import streamlit as st
-import matplotlib.pyplot as plt
-import numpy as np
+
+# 页面顶部只导入计算器本身需要的模块；各功能模块（及其依赖）在对应片段或缓存函数中首次用到时才导入，
+# 与 charts.new_figure 延迟导入 matplotlib 相同，未打开的部分不增加冷启动耗时
+import charts
+import factors
+import graph
+import metrics
+import results
 
 st.set_page_config(
     page_title="ICT碳足迹",
@@ -9,167 +18,278 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+
+# 情景立方体（全部离散选项组合的派生参数）每个进程按因子版本只打开一次，所有会话共享；
+# 因子文件修改后 digest 改变，自动换用新的立方体
+@st.cache_resource
+def scenario_cube(version, digest):
+    import scenarios
+    return scenarios.load_cube(table=factors.get(version))
+
+
+# 图表按绘图数据缓存渲染结果（跨会话共享，LRU淘汰），相同数据不再重复光栅化
+@st.cache_data(max_entries=256, show_spinner=False)
+def comparison_chart(total, saving):
+    return charts.comparison_png(total, saving)
+
+
+@st.cache_data(max_entries=256, show_spinner=False)
+def sensitivity_chart(param_names, sensitivities, component_names, shares):
+    return charts.sensitivity_png(param_names, sensitivities, component_names, shares)
+
+
+# 分时电网模式：各地区逐小时计算结果与年平均计算结果，按输入缓存
+@st.cache_data(max_entries=64, show_spinner=False)
+def hourly_comparison(video, meetings, video_intensity, meeting_intensity, video_timing,
+                      green_data_center, version, digest):
+    import numpy as np
+    import timeseries
+    table = factors.get(version)
+    grid = np.asarray(timeseries.load_grid(table=table))
+    if green_data_center:
+        grid = grid * table.green_data_center_factor
+    video_usage, meeting_usage = timeseries.typical_usage(video, meetings, video_timing)
+    hourly = timeseries.hourly_emissions(video_usage, meeting_usage, video_intensity, meeting_intensity, grid)
+    average = timeseries.average_emissions(video_usage, meeting_usage, video_intensity, meeting_intensity, grid)
+    # 典型日曲线：全年按小时平均
+    daily_grid = grid.reshape(len(grid), -1, 24).mean(axis=1)
+    daily_video = video_usage.reshape(-1, 24).mean(axis=0)
+    daily_meeting = meeting_usage.reshape(-1, 24).mean(axis=0)
+    return hourly[0], average[0], daily_grid, daily_video, daily_meeting
+
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def grid_profile_chart(intensity, video_usage, meeting_usage):
+    return charts.grid_profile_png(intensity, video_usage, meeting_usage)
+
+
+# 情景扫描：网格只依赖对应的排放分项，移动无关控件不会重新计算
+@st.cache_data(max_entries=64, show_spinner=False)
+def technology_sweep(video_carbon, meeting_carbon):
+    import sweeps
+    return sweeps.technology_grid(video_carbon, meeting_carbon)
+
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def lifecycle_sweep(phone_carbon, current_years):
+    import sweeps
+    return sweeps.lifecycle_grid(phone_carbon, current_years)
+
+
+@st.cache_data(max_entries=128, show_spinner=False)
+def technology_sweep_chart(video_carbon, meeting_carbon, green_power_ratio, compression_improvement):
+    import sweeps
+    return charts.sweep_png(
+        sweeps.COMPRESSION, sweeps.GREEN_POWER, technology_sweep(video_carbon, meeting_carbon),
+        (compression_improvement, green_power_ratio),
+        'Video Compression Improvement (%)', 'Data Center Green Power (%)', 'Green ICT Levers'
+    )
+
+
+@st.cache_data(max_entries=128, show_spinner=False)
+def lifecycle_sweep_chart(phone_carbon, current_years, target_years, device_sharing):
+    import sweeps
+    return charts.sweep_png(
+        sweeps.DEVICE_SHARING, sweeps.TARGET_YEARS, lifecycle_sweep(phone_carbon, current_years),
+        (device_sharing, target_years),
+        'Device Utilization Improvement (%)', 'Target Phone Lifetime (years)', 'Device Lifecycle Levers'
+    )
+
+
+# 全局敏感性结果按当前数字习惯与因子表（版本、摘要）缓存，重跑时不再重复抽样计算
+@st.cache_data(max_entries=64, show_spinner=False)
+def global_sensitivity(video, meetings, phone_years, km, version, digest):
+    import sensitivity
+    return sensitivity.analyze(video, meetings, phone_years, km, table=factors.get(version))
+
+
+# 蒙特卡洛结果只缓存摘要（分位数与直方图），不缓存原始抽样
+@st.cache_data(max_entries=64, show_spinner=False)
+def uncertainty_summary(video, meetings, phone_years, km, phone_brand, estimated_phone_carbon, video_intensity,
+                        meeting_intensity, flight_factor, draws, version, digest):
+    import uncertainty
+    samples = uncertainty.simulate(video, meetings, phone_years, km, phone_brand, estimated_phone_carbon,
+                                   video_intensity, meeting_intensity, flight_factor, draws=draws,
+                                   table=factors.get(version))
+    return uncertainty.summarize(samples["total"]), uncertainty.summarize(samples["saving"])
+
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def uncertainty_chart(total_counts, total_edges, saving_counts, saving_edges):
+    return charts.uncertainty_png(total_counts, total_edges, saving_counts, saving_edges)
+
+
+# 上传的会议记录按文件内容与因子表（版本、摘要）缓存汇总结果（同一文件只解析一次）
+@st.cache_data(max_entries=16, show_spinner=False)
+def meeting_log_profile(content, name, version, digest):
+    import meeting_log
+    summary = meeting_log.summarize_bytes(content, name, factors.get(version))
+    weekly_hours, intensity = meeting_log.personal_profile(summary)
+    return summary["totals"], summary["weeks"], weekly_hours, intensity
+
+
+# 上传的出行清单按文件内容、因子表与会议强度缓存每次出行的减排量；优化本身很快，每次按预算重新求解
+@st.cache_data(max_entries=16, show_spinner=False)
+def trip_plan(content, version, digest, meeting_intensity):
+    import trips
+    return trips.plan_bytes(content, factors.get(version), meeting_intensity)
+
+
+# 上传的设备清单按文件内容与因子表缓存汇总结果（合计、按类型、按地区）
+@st.cache_data(max_entries=16, show_spinner=False)
+def inventory_summary(content, version, digest):
+    import inventory
+    table = factors.get(version)
+    devices = inventory.read_bytes(content, table)
+    return tuple(devices.summary(by, table=table) for by in (None, "device_type", "region"))
+
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def savings_curve_chart(hours, saving, budget):
+    return charts.savings_curve_png(hours, saving, budget)
+
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def trend_chart(periods, means, lows, highs, ylabel):
+    return charts.trend_png(periods, means, lows, highs, ylabel)
+
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def projection_chart(years, device, video, meeting, total_band, saving_band):
+    return charts.projection_png(years, device, video, meeting, total_band, saving_band)
+
+
+# 可选的性能插桩（环境变量 ICT_METRICS=1 时启用，否则为空操作），见 metrics.py
+metrics.begin_rerun()
+
 if 'total' not in st.session_state:
     st.session_state.total = 0
 if 'saving' not in st.session_state:
     st.session_state.saving = 0
+# 派生参数与各选项卡分项的依赖图（每个会话一份）：只重新计算依赖发生变化的节点，见 graph.py
+if "graph" not in st.session_state:
+    st.session_state.graph = graph.build()
+calc = st.session_state.graph
+
+# 计算历史按用户保存（见 history.py）：用户标识放在页面链接的 user 参数中，收藏链接即可在下次访问时继续查看
+if "user" not in st.query_params:
+    st.query_params["user"] = uuid.uuid4().hex[:12]
+user_id = st.query_params["user"]
 
 # ==================== 用户友好的侧边栏参数 ====================
 with st.sidebar:
     st.header("⚙️ 参数设置")
     st.info("💡 根据您的实际情况选择，系统会自动计算碳排放量")
 
-    with st.expander("📱 设备参数", expanded=False):
+    # 排放因子按版本从 data/factors/ 加载（进程内解析一次，文件修改后自动重新加载）
+    factor_versions = factors.versions()[::-1]
+    factor_version = st.selectbox(
+        "排放因子版本",
+        factor_versions,
+        index=factor_versions.index(factors.get().version),
+        help="指定版本可复现历史计算结果；默认使用最新版本"
+    )
+    with metrics.section("factor_table"):
+        factor_table = factors.get(factor_version)
+
+    # 先收集各项选择，再由计算引擎统一推导派生参数，最后回填到各展开栏中显示
+    device_expander = st.expander("📱 设备参数", expanded=False)
+    with device_expander:
         phone_brand = st.selectbox(
             "手机品牌",
-            ["苹果 iPhone", "三星 Galaxy", "华为", "小米", "OPPO/VIVO", "其他品牌"],
+            factor_table.phone_brands,
             index=0,
             help="不同品牌的生产工艺和供应链碳强度不同"
         )
-        # 修正：根据碳信托数据，智能手机平均碳足迹约60-120kg CO₂
-        phone_carbon_map = {
-            "苹果 iPhone": 75,      # iPhone 14 Pro约70-80kg
-            "三星 Galaxy": 68,       # Galaxy S23约65-70kg
-            "华为": 65,              # 旗舰机型约60-70kg
-            "小米": 55,              # 约50-60kg
-            "OPPO/VIVO": 52,         # 约50-55kg
-            "其他品牌": 58           # 行业平均值
-        }
 
-        estimated_phone_carbon = phone_carbon_map[phone_brand]
-        st.caption(f"估算生产碳排放: **{estimated_phone_carbon} kg CO₂**")
-        st.caption("_数据参考：碳信托、苹果环境报告、三星可持续发展报告_")
-
-    with st.expander("📺 视频服务", expanded=False):
+    video_expander = st.expander("📺 视频服务", expanded=False)
+    with video_expander:
         video_platform = st.selectbox(
             "常用视频平台",
-            ["YouTube/Netflix", "哔哩哔哩/爱奇艺", "抖音/快手", "视频会议(Teams/Zoom)"],
+            factor_table.video_platforms,
             index=0,
             help="不同平台的服务器能效和能源结构不同"
         )
         video_quality = st.radio(
             "常用视频质量",
-            ["480p（标清）", "720p（高清）", "1080p（全高清）", "4K（超高清）"],
+            factor_table.video_qualities,
             index=1
         )
 
-        # 修正：根据IEA数据，视频流媒体平均0.03-0.08 kg CO₂/小时
-        platform_factor = {
-            "YouTube/Netflix": 1.0,      # 全球平均
-            "哔哩哔哩/爱奇艺": 1.1,      # 中国电力碳强度较高
-            "抖音/快手": 0.6,            # 短视频，传输量小
-            "视频会议(Teams/Zoom)": 0.4   # 优化传输，能耗较低
-        }
-        # 修正：根据网飞研究，画质对带宽和能耗影响非线性
-        quality_factor = {
-            "480p（标清）": 0.15,        # 约0.3GB/小时
-            "720p（高清）": 0.4,         # 约0.7GB/小时
-            "1080p（全高清）": 1.0,      # 约1.5GB/小时（基准）
-            "4K（超高清）": 2.5          # 约3-7GB/小时
-        }
-
-        base_intensity = 0.055  # 基准：0.055 kg CO₂/小时（基于平均电网强度）
-        video_intensity = base_intensity * platform_factor[video_platform] * quality_factor[video_quality]
-
-        st.caption(f"视频流媒体强度: **{video_intensity:.3f} kg CO₂/小时**")
-        st.caption("_数据参考：IEA、Carbon Brief、网飞可持续发展报告_")
-
-    with st.expander("📺 视频会议", expanded=False):
+    meeting_expander = st.expander("📺 视频会议", expanded=False)
+    with meeting_expander:
         meeting_quality = st.select_slider(
             "视频会议质量",
-            options=["音频优先", "平衡模式", "高清视频"],
+            options=factor_table.meeting_qualities,
             value="平衡模式"
         )
-        meeting_factor = {"音频优先": 0.2, "平衡模式": 0.5, "高清视频": 0.8}
-        meeting_intensity = 0.022 * meeting_factor[meeting_quality]  # 基准0.022 kg/h
-        st.caption(f"视频会议强度: **{meeting_intensity:.3f} kg CO₂/小时**")
 
-    with st.expander("✈️ 旅行替代", expanded=False):
+    travel_expander = st.expander("✈️ 旅行替代", expanded=False)
+    with travel_expander:
         travel_type = st.selectbox(
             "被替代的出行方式",
-            ["国内航班", "国际航班", "高铁", "自驾车", "公共交通"],
+            factor_table.travel_types,
             index=0
         )
-        travel_distance = st.radio(
-            "典型旅行距离",
-            ["短途 (<500km)", "中途 (500-1000km)", "长途 (1000-3000km)", "国际 (>3000km)"],
-            index=1
+        trip_km = st.slider(
+            "单次旅行距离（公里）",
+            min_value=100, max_value=8000, value=750, step=50,
+            help="排放因子随距离连续变化：在各距离档位的典型距离之间插值"
         )
 
-        # 修正：根据IPCC、DEFRA排放因子数据库（每人公里CO₂当量）
-        travel_factor_map = {
-            "国内航班": {  # 国内短途航班效率较低
-                "短途 (<500km)": 0.275,
-                "中途 (500-1000km)": 0.195,
-                "长途 (1000-3000km)": 0.170,
-                "国际 (>3000km)": 0.155
-            },
-            "国际航班": {  # 长途国际航班效率较高
-                "短途 (<500km)": 0.25,
-                "中途 (500-1000km)": 0.18,
-                "长途 (1000-3000km)": 0.155,
-                "国际 (>3000km)": 0.142  # 宽体机长途效率高
-            },
-            "高铁": {  # 电气化高铁，与电网碳强度相关
-                "短途 (<500km)": 0.027,
-                "中途 (500-1000km)": 0.025,
-                "长途 (1000-3000km)": 0.024,
-                "国际 (>3000km)": 0.024
-            },
-            "自驾车": {  # 假设汽油车，1.5L排量，单人
-                "短途 (<500km)": 0.185,
-                "中途 (500-1000km)": 0.175,
-                "长途 (1000-3000km)": 0.165,
-                "国际 (>3000km)": 0.165
-            },
-            "公共交通": {  # 城际大巴/火车
-                "短途 (<500km)": 0.032,
-                "中途 (500-1000km)": 0.030,
-                "长途 (1000-3000km)": 0.028,
-                "国际 (>3000km)": 0.026
-            }
-        }
-        distance_map = {
-            "短途 (<500km)": 300,
-            "中途 (500-1000km)": 750,
-            "长途 (1000-3000km)": 2000,
-            "国际 (>3000km)": 5000
-        }
-
-        flight_factor = travel_factor_map[travel_type][travel_distance]
-        typical_distance = distance_map[travel_distance]
-
-        st.caption(f"{travel_type}排放因子: **{flight_factor:.3f} kg CO₂/公里·人**")
-        st.caption(f"典型距离: **{typical_distance} 公里**")
-        st.caption("_数据参考：IPCC、DEFRA、IEA交通报告_")
-
-    with st.expander("⚡ 能源结构", expanded=False):
+    energy_expander = st.expander("⚡ 能源结构", expanded=False)
+    with energy_expander:
         region = st.selectbox(
             "您所在地区",
-            ["欧洲（高绿电）", "美国（中等）", "中国（中等偏上）", "印度（高煤电）", "其他"],
+            factor_table.regions,
             index=2
         )
-
-        # 修正：基于IEA 2023年电网碳强度数据（kg CO₂/kWh）
-        region_factor = {
-            "欧洲（高绿电）": 0.23,      # 欧盟平均：约230g/kWh
-            "美国（中等）": 0.37,        # 美国平均：约370g/kWh
-            "中国（中等偏上）": 0.52,    # 中国平均：约520g/kWh
-            "印度（高煤电）": 0.72,      # 印度平均：约720g/kWh
-            "其他": 0.45                 # 全球平均：约450g/kWh
-        }
-
-        electricity_carbon = region_factor[region]
-
         green_data_center = st.checkbox(
             "选择使用绿色数据中心服务",
             value=False,
             help="如AWS、Google Cloud的可再生能源区域，可降低60-80%碳排放"
         )
 
-        if green_data_center:
-            electricity_carbon *= 0.35  # 使用100%可再生能源的数据中心
+    with metrics.section("derive_factors"):
+        option_codes = {
+            "phone_brand": factor_table.phone_brands.index(phone_brand),
+            "video_platform": factor_table.video_platforms.index(video_platform),
+            "video_quality": factor_table.video_qualities.index(video_quality),
+            "meeting_quality": factor_table.meeting_qualities.index(meeting_quality),
+            "travel_type": factor_table.travel_types.index(travel_type),
+            "region": factor_table.regions.index(region),
+        }
+        calc.update(table=factor_table, green_data_center=green_data_center, trip_km=trip_km, **option_codes)
+        # 可被手动覆盖的参数先取按选项计算的值，覆盖值在读取数字习惯后统一设置
+        estimated_phone_carbon = calc.derived("estimated_phone_carbon")
+        video_intensity = calc.derived("video_intensity")
+        meeting_intensity = calc.derived("meeting_intensity")
+        flight_factor = calc.derived("flight_factor")
+        electricity_carbon = calc["electricity_carbon"]
+        selections = {
+            "phone_brand": phone_brand, "video_platform": video_platform, "video_quality": video_quality,
+            "meeting_quality": meeting_quality, "travel_type": travel_type, "trip_km": trip_km,
+            "region": region, "green_data_center": green_data_center,
+        }
+
+    with device_expander:
+        st.caption(f"估算生产碳排放: **{estimated_phone_carbon:g} kg CO₂**")
+        st.caption("_数据参考：碳信托、苹果环境报告、三星可持续发展报告_")
 
+    with video_expander:
+        st.caption(f"视频流媒体强度: **{video_intensity:.3f} kg CO₂/小时**")
+        st.caption(f"按数据量估算（约 {factor_table.gigabytes_per_hour[option_codes['video_quality']]:g} GB/小时，"
+                   f"网络与数据中心）: **{calc['data_volume_intensity']:.3f} kg CO₂/小时**")
+        st.caption("_数据参考：IEA、Carbon Brief、网飞可持续发展报告_")
+
+    with meeting_expander:
+        st.caption(f"视频会议强度: **{meeting_intensity:.3f} kg CO₂/小时**")
+
+    with travel_expander:
+        st.caption(f"{travel_type}排放因子（{trip_km} 公里）: **{flight_factor:.3f} kg CO₂/公里·人**")
+        st.caption("_数据参考：IPCC、DEFRA、IEA交通报告_")
+
+    with energy_expander:
         st.caption(f"电力碳强度: **{electricity_carbon:.2f} kg CO₂/kWh**")
         st.caption("_数据参考：IEA 2023年电力报告、各国电网数据_")
 
@@ -177,6 +297,7 @@ with st.sidebar:
         st.warning("以下为直接碳排放参数设置，仅供专家参考")
 
         override_mode = st.checkbox("手动覆盖计算参数")
+        overrides = {}
 
         if override_mode:
             video_intensity = st.slider(
@@ -191,7 +312,7 @@ with st.sidebar:
 
             estimated_phone_carbon = st.slider(
                 "手机生产碳排放 (kg CO₂)",
-                min_value=20, max_value=100, value=estimated_phone_carbon, step=1  # 去掉小数点
+                min_value=20, max_value=100, value=round(estimated_phone_carbon), step=1  # 去掉小数点
             )
 
             flight_factor = st.slider(
@@ -199,13 +320,16 @@ with st.sidebar:
                 min_value=0.15, max_value=0.35, value=flight_factor, step=0.01
             )
 
+            overrides = {"video_intensity": video_intensity, "meeting_intensity": meeting_intensity,
+                         "estimated_phone_carbon": estimated_phone_carbon, "flight_factor": flight_factor}
+
     # 参数摘要卡片
     st.markdown("---")
     st.markdown("### 📊 计算参数摘要")
 
     col1, col2 = st.columns(2)
     with col1:
-        st.metric("设备生产排放", f"{estimated_phone_carbon} kg")
+        st.metric("设备生产排放", f"{estimated_phone_carbon:g} kg")
         st.metric("视频流媒体强度", f"{video_intensity:.3f} kg/h")
 
     with col2:
@@ -225,15 +349,50 @@ with col1:
 
     st.subheader("你的数字习惯")
     video = st.slider("每天视频流媒体（小时）", 0.0, 12.0, 2.0, 0.5)
-    meetings = st.slider("每周视频会议（小时）", 0.0, 10.0, 3.0, 0.5)
+    meeting_file = st.file_uploader(
+        "导入会议记录（可选）",
+        type=["ics", "csv"],
+        help="日历导出的 ICS 文件，或含 start、duration_minutes、participants、quality 等列的 CSV；"
+             "按实际会议逐场计算，代替下面的每周时长估计"
+    )
+    if meeting_file is not None:
+        try:
+            log_totals, log_weeks, meetings, meeting_intensity = meeting_log_profile(
+                meeting_file.getvalue(), meeting_file.name, factor_table.version, factor_table.digest
+            )
+        except ValueError as e:
+            st.error(f"会议记录无法解析：{e}")
+            meeting_file = None
+        else:
+            overrides["meeting_intensity"] = meeting_intensity
+            st.caption(f"会议记录：{int(log_totals['meetings'])} 场，{log_totals['hours']:.1f} 小时，"
+                       f"覆盖 {log_weeks:.1f} 周 → 每周 **{meetings:.1f} 参会人·小时**，"
+                       f"按实际会议质量加权的强度 **{meeting_intensity:.4f} kg CO₂/小时**")
+            if log_totals["travel_carbon"] > 0:
+                st.caption(f"记录中被替代的差旅排放 {log_totals['travel_carbon']:.1f} kg，"
+                           f"扣除会议排放后净减排 **{log_totals['saving']:.1f} kg**")
+    if meeting_file is None:
+        meetings = st.slider("每周视频会议（小时）", 0.0, 10.0, 3.0, 0.5)
     phone_years = st.selectbox("手机换机周期", [1, 2, 3, 4, 5], index=1)
+    calc.update(video=video, meetings=meetings, phone_years=phone_years)
+    for name in graph.OVERRIDABLE:
+        calc.override(name, overrides.get(name))
 
     if st.button("计算我的碳足迹"):
-        video_carbon = video * video_intensity * 365
-        meeting_carbon = meetings * meeting_intensity * 52
-        phone_carbon = estimated_phone_carbon / phone_years
+        with metrics.section("footprint"):
+            result = {name: calc[name] for name in ("video_carbon", "meeting_carbon", "phone_carbon", "total")}
+        import history
+        history.record(
+            user_id, "footprint", {"video": video, "meetings": meetings, "phone_years": phone_years, **selections},
+            {"video_intensity": video_intensity, "meeting_intensity": meeting_intensity,
+             "estimated_phone_carbon": estimated_phone_carbon},
+            result, factor_table.version
+        )
+        video_carbon = float(result["video_carbon"])
+        meeting_carbon = float(result["meeting_carbon"])
+        phone_carbon = float(result["phone_carbon"])
 
-        st.session_state.total = video_carbon + meeting_carbon + phone_carbon
+        st.session_state.total = float(result["total"])
 
         st.success(f"""
         **你的年数字碳足迹：{st.session_state.total:.1f} kg CO₂**
@@ -248,12 +407,21 @@ with col2:
 
     st.subheader("视频会议替代差旅")
     km = st.slider("替代的距离（公里/年）", 100, 5000, 1000, 100)
+    calc.set("km", km)
 
     if st.button("计算减排潜力"):
         # 使用侧边栏参数
-        flight_carbon = km * flight_factor
-        meeting_carbon = meetings * meeting_intensity * 52
-        st.session_state.saving = flight_carbon - meeting_carbon
+        with metrics.section("travel_saving"):
+            result = {name: calc[name] for name in ("flight_carbon", "meeting_carbon", "saving")}
+        import history
+        history.record(
+            user_id, "saving", {"km": km, "meetings": meetings, **selections},
+            {"flight_factor": flight_factor, "meeting_intensity": meeting_intensity},
+            result, factor_table.version
+        )
+        flight_carbon = float(result["flight_carbon"])
+        meeting_carbon = float(result["meeting_carbon"])
+        st.session_state.saving = float(result["saving"])
 
         st.info(f"""
         **减排量：{st.session_state.saving:.1f} kg CO₂**
@@ -264,6 +432,57 @@ with col2:
         - ✅ 净减排：{st.session_state.saving:.1f} kg
         """)
 
+    # 出行清单优化以 st.fragment 包装：调整预算只重跑该片段
+    @st.fragment
+    @metrics.timed("trip_optimizer")
+    def trip_optimizer(meeting_intensity, factor_table):
+        """差旅替代优化（局部重跑片段）"""
+        trip_file = st.file_uploader(
+            "上传出行计划，优化替代方案（可选）",
+            type=["csv"],
+            help="含 distance_km（每人往返公里数）、travel_type（出行方式）、travelers、meeting_hours、"
+                 "participants 等列的 CSV；在预算内选出减排量最大的替代组合"
+        )
+        if trip_file is None:
+            return
+        import numpy as np
+        import trips
+        try:
+            plan = trip_plan(trip_file.getvalue(), factor_table.version, factor_table.digest, meeting_intensity)
+        except ValueError as e:
+            st.error(f"出行计划无法解析：{e}")
+            return
+
+        saving, hours = plan["saving"], plan["meeting_hours"]
+        budget_type = st.radio("预算", ["会议时长", "保留出行次数"], horizontal=True)
+        with metrics.section("trip_optimize"):
+            if budget_type == "会议时长":
+                budget = st.number_input("可用的会议时长（小时）", 0.0, None,
+                                         float(np.round(hours[saving > 0].sum() / 2)), 1.0)
+                result = trips.optimize_hours(saving, hours, budget)
+            else:
+                budget = None
+                keep = st.number_input("至少保留的出行次数", 0, len(saving), len(saving) // 2, 1)
+                result = trips.optimize_count(saving, len(saving) - keep)
+            selected = result["selected"]
+            curve_hours, curve_saving = trips.savings_curve(saving, hours, selected)
+
+        st.info(f"替代 **{len(selected)}/{len(saving)}** 次出行，使用会议 {hours[selected].sum():.1f} 小时，"
+                f"减排 **{result['saving']:.1f} kg CO₂**")
+        if "upper_bound" in result:
+            st.caption(f"_最优解不超过 {result['upper_bound']:.1f} kg（分数背包上界）_")
+        st.image(savings_curve_chart(tuple(curve_hours.tolist()), tuple(curve_saving.tolist()), budget),
+                 width="stretch")
+        shown = selected[:100]
+        st.dataframe({
+            **{name: [plan["rows"][i][j] for i in shown.tolist()] for j, name in enumerate(plan["header"])},
+            "减排量 (kg)": np.round(saving[shown], 1),
+        }, hide_index=True)
+        if len(selected) > len(shown):
+            st.caption(f"_仅显示前 {len(shown)} 次（按选取顺序）_")
+
+    trip_optimizer(meeting_intensity, factor_table)
+
 # ==================== 对比图表 ====================
 st.markdown("---")
 st.header("双重角色对比")
@@ -291,47 +510,242 @@ with col_text:
     """)
 
 with col_chart:
-    # 更小的图表
-    fig, ax = plt.subplots(figsize=(6, 3))
-
-    categories = ['Digital Footprint', 'Reduction Potential']
-    values = [st.session_state.total, st.session_state.saving]
-
     if st.session_state.total > 0 or st.session_state.saving > 0:
-        # 自动调整数值范围，确保对比明显
-        if st.session_state.saving > 10 * st.session_state.total:
-            # 如果减排远大于排放，调整显示比例
-            values = [st.session_state.total, st.session_state.saving / 10]
-            categories = ['Digital Footprint', 'Reduction Potential (÷10)']
-        elif st.session_state.total > 10 * st.session_state.saving:
-            values = [st.session_state.total, st.session_state.saving * 10]
-            categories = ['Digital Footprint', 'Reduction Potential (×10)']
-
-        colors = ['#ff6b6b', '#51cf66']
-        bars = ax.bar(categories, values, color=colors)
-
-        ax.set_ylabel('kg CO₂', fontsize=10)
-        ax.set_title('ICT: Emissions vs. Reduction', fontsize=12, fontweight='bold')
-
-        # 数值标签
-        for i, (bar, value) in enumerate(zip(bars, values)):
-            height = bar.get_height()
-            ax.text(bar.get_x() + bar.get_width() / 2., height + 5,
-                    f'{value:.1f} kg', ha='center', va='bottom', fontsize=9)
-
-        # 设置y轴
-        max_val = max(values) if max(values) > 0 else 100
-        ax.set_ylim(0, max_val * 1.2)
-        ax.yaxis.grid(True, linestyle='--', alpha=0.7)
-
-        # 紧凑布局
-        plt.tight_layout()
-
         # 禁用宽度自适应，保持原始尺寸
-        st.pyplot(fig, use_container_width=False)
+        with metrics.section("comparison_chart"):
+            if charts.BACKEND == "vega-lite":
+                # 浏览器端渲染：只发送两根柱子的数据
+                st.vega_lite_chart(charts.comparison_spec(st.session_state.total, st.session_state.saving))
+            else:
+                st.image(comparison_chart(st.session_state.total, st.session_state.saving), width="content")
     else:
         st.info("👆 请先计算碳足迹和减排潜力")
 
+# ==================== 计算历史 ====================
+HISTORY_KINDS = {"碳足迹": "footprint", "减排潜力": "saving"}
+HISTORY_YLABELS = {"footprint": "Annual Footprint (kg CO₂)", "saving": "Annual Reduction (kg CO₂)"}
+HISTORY_BUCKETS = {"日": "day", "周": "week", "月": "month"}
+HISTORY_PAGE_SIZE = 20
+
+
+@st.fragment
+@metrics.timed("history")
+def history_section(user_id):
+    """计算历史与趋势（局部重跑片段）"""
+    import history
+    # 打开开关后才连接历史库
+    if not history.PATH or not st.toggle("📈 我的计算历史", key="history_enabled"):
+        return
+    store = history.store()
+    hist_col1, hist_col2 = st.columns(2)
+    kind_label = hist_col1.radio("指标", list(HISTORY_KINDS), horizontal=True, key="history_kind")
+    bucket_label = hist_col2.radio("汇总周期", list(HISTORY_BUCKETS), horizontal=True, key="history_bucket")
+
+    # 趋势只读按日汇总的表，明细按时间键集分页，记录再多也只读取所需的行
+    kind = HISTORY_KINDS[kind_label]
+    trend = store.trend(user_id, kind, HISTORY_BUCKETS[bucket_label])
+    if not trend:
+        st.info("还没有计算记录：点击上方的计算按钮后，结果会保存在这里（写入有约1秒延迟）")
+        return
+    periods, counts, means, lows, highs = zip(*trend)
+    st.image(trend_chart(periods, means, lows, highs, HISTORY_YLABELS[kind]), width="stretch")
+    st.caption(f"_共 {store.count(user_id)} 次计算；折线为每{bucket_label}平均值，阴影为最小-最大范围_")
+
+    # 分页游标栈：每页最后一条记录的 (created_at, id)
+    cursors = st.session_state.setdefault("history_cursors", [None])
+    records = store.page(user_id, HISTORY_PAGE_SIZE, cursors[-1])
+    st.dataframe([{
+        "时间": time.strftime("%Y-%m-%d %H:%M", time.localtime(r["created_at"])),
+        "指标": "碳足迹" if r["kind"] == "footprint" else "减排潜力",
+        "结果 (kg)": round(r["value"], 1),
+        "因子版本": r["factors_version"],
+        "输入": ", ".join(f"{k}={v}" for k, v in r["inputs"].items()),
+    } for r in records], hide_index=True)
+    nav_col1, nav_col2 = st.columns(2)
+    if nav_col1.button("较新记录", disabled=len(cursors) == 1):
+        cursors.pop()
+        st.rerun(scope="fragment")
+    if nav_col2.button("较早记录", disabled=len(records) < HISTORY_PAGE_SIZE):
+        cursors.append((records[-1]["created_at"], records[-1]["id"]))
+        st.rerun(scope="fragment")
+
+
+history_section(user_id)
+
+# ==================== 设备清单 ====================
+st.markdown("---")
+st.header("💻 设备清单")
+
+
+@st.fragment
+@metrics.timed("inventory")
+def inventory_section(estimated_phone_carbon, phone_years, region_code, factor_table):
+    """家庭/机构设备清单（局部重跑片段）"""
+    if not st.toggle("计算全部设备", key="inventory_enabled"):
+        st.caption("_手机之外的笔记本电脑、显示器、平板电脑、路由器：生产排放按使用年限分摊，"
+                   "使用排放按功率、使用时长与所在地区的电力碳强度计算_")
+        return
+    import inventory
+    inventory_file = st.file_uploader(
+        "导入设备清单（可选）",
+        type=["csv"],
+        key="inventory_file",
+        help="含 device_type、region、owner、count 等列的 CSV，可选列 embodied_carbon、lifetime_years、"
+             "power_w、hours_per_day 缺失时取该类型的典型值"
+    )
+    by_region = None
+    if inventory_file is not None:
+        try:
+            totals, by_type, by_region = inventory_summary(inventory_file.getvalue(), factor_table.version,
+                                                           factor_table.digest)
+        except ValueError as e:
+            st.error(f"设备清单无法解析：{e}")
+            return
+    else:
+        count_cols = st.columns(len(inventory.DEVICE_TYPES))
+        counts = [col.number_input(f"{name}（台）", 0, 100, 1, 1, key=f"inventory_count_{i}")
+                  for i, (col, name) in enumerate(zip(count_cols, inventory.DEVICE_TYPES))]
+        # 手机取侧边栏的品牌估计与换机周期，其余类型取典型值
+        phone = inventory.DEVICE_TYPES.index("手机")
+        embodied = inventory.CATALOG["embodied_carbon"].copy()
+        lifetime = inventory.CATALOG["lifetime_years"].copy()
+        embodied[phone] = estimated_phone_carbon
+        lifetime[phone] = phone_years
+        household = inventory.from_counts(counts, region_code, embodied_carbon=embodied, lifetime_years=lifetime)
+        totals = household.summary(table=factor_table)
+        by_type = household.summary("device_type", table=factor_table)
+
+    m1, m2, m3, m4 = st.columns(4)
+    m1.metric("设备", f"{totals['devices']:,} 台")
+    m2.metric("生产排放分摊", f"{totals['embodied']:.1f} kg/年")
+    m3.metric("使用排放", f"{totals['use']:.1f} kg/年")
+    m4.metric("合计", f"{totals['total']:.1f} kg/年")
+    for labels, summary in ((inventory.DEVICE_TYPES, by_type), (factor_table.regions, by_region)):
+        if summary is None:
+            continue
+        st.dataframe([{
+            "分组": label,
+            "台数": int(summary["devices"][i]),
+            "生产排放分摊 (kg/年)": round(float(summary["embodied"][i]), 1),
+            "使用排放 (kg/年)": round(float(summary["use"][i]), 1),
+            "合计 (kg/年)": round(float(summary["total"][i]), 1),
+        } for i, label in enumerate(labels) if summary["devices"][i]], hide_index=True)
+    st.caption("_终端设备的用电按所在地区电网的电力碳强度计算（不考虑数据中心绿电）_")
+
+
+inventory_section(estimated_phone_carbon, phone_years, option_codes["region"], factor_table)
+
+# ==================== 不确定性分析 ====================
+st.markdown("---")
+st.header("🎲 不确定性分析")
+
+
+# 下列各部分以 st.fragment 包装：片段内的控件变化只重跑该片段，不重跑侧边栏与整个页面；
+# 片段所需的侧边栏结果以参数传入（参数变化时由整页重跑带入新值）
+@st.fragment
+@metrics.timed("uncertainty")
+def uncertainty_section(video, meetings, phone_years, km, option_codes, calc, factor_table):
+    """不确定性分析（局部重跑片段）"""
+    uncertainty_mode = st.checkbox(
+        "启用不确定性分析（蒙特卡洛模拟）",
+        value=False,
+        help="在文献给出的排放因子范围内随机抽样（手机生产碳排放、视频流媒体强度），给出结果的分布而非单一估计值"
+    )
+
+    if uncertainty_mode:
+        draws = st.select_slider(
+            "抽样次数",
+            options=[100_000, 500_000, 1_000_000, 2_000_000],
+            value=1_000_000,
+            format_func=lambda n: f"{n // 10_000}万次"
+        )
+        # 点估计取依赖图的当前值（含手动覆盖与会议记录折算的会议强度），与上方的计算结果一致
+        total_summary, saving_summary = uncertainty_summary(
+            video, meetings, phone_years, km, option_codes["phone_brand"],
+            calc["estimated_phone_carbon"], calc["video_intensity"], calc["meeting_intensity"],
+            calc["flight_factor"], draws, factor_table.version, factor_table.digest
+        )
+
+        unc_col1, unc_col2 = st.columns([1, 1.5])
+        with unc_col1:
+            for title, summary in (("年数字碳足迹", total_summary), ("减排潜力", saving_summary)):
+                p = summary["percentiles"]
+                st.markdown(f"**{title}**（kg CO₂）")
+                m1, m2, m3 = st.columns(3)
+                m1.metric("P5", f"{p[5]:.1f}")
+                m2.metric("中位数", f"{p[50]:.1f}")
+                m3.metric("P95", f"{p[95]:.1f}")
+            st.caption("_围绕当前使用的参数（含手动覆盖与会议记录）；因子范围：手机60-120kg（按品牌），"
+                       "视频流媒体0.03-0.08 kg CO₂/小时（会议强度按同一比例）_")
+
+        with unc_col2:
+            st.image(uncertainty_chart(
+                tuple(total_summary["counts"].tolist()), tuple(total_summary["edges"].tolist()),
+                tuple(saving_summary["counts"].tolist()), tuple(saving_summary["edges"].tolist())
+            ), width="stretch")
+
+
+uncertainty_section(video, meetings, phone_years, km, option_codes, calc, factor_table)
+
+# ==================== 分时电网碳强度 ====================
+st.markdown("---")
+st.header("⏱️ 分时电网碳强度")
+
+
+@st.fragment
+@metrics.timed("hourly")
+def hourly_section(video, meetings, video_intensity, meeting_intensity, green_data_center,
+                   factor_table, region, region_code, electricity_carbon):
+    """分时电网碳强度（局部重跑片段）"""
+    hourly_mode = st.checkbox(
+        "启用分时电网模式（8760小时）",
+        value=False,
+        help="用逐小时的电网碳强度与使用时段计算视频与会议排放，体现“什么时候用”的影响"
+    )
+
+    if hourly_mode:
+        import timeseries
+        video_timing = st.radio(
+            "视频观看时段",
+            list(timeseries.VIDEO_TIMING),
+            horizontal=True
+        )
+        hourly, average, daily_grid, daily_video, daily_meeting = hourly_comparison(
+            video, meetings, video_intensity, meeting_intensity, video_timing,
+            green_data_center, factor_table.version, factor_table.digest
+        )
+
+        hourly_col1, hourly_col2 = st.columns([1, 1.5])
+        with hourly_col1:
+            st.metric(
+                f"{region}：视频+会议年排放（分时）",
+                f"{hourly[region_code]:.1f} kg",
+                delta=f"{hourly[region_code] - average[region_code]:+.1f} kg（相对年平均强度）",
+                delta_color="inverse"
+            )
+            st.dataframe([
+                {
+                    "地区": name,
+                    "分时计算 (kg)": round(float(hourly[i]), 1),
+                    "年平均强度计算 (kg)": round(float(average[i]), 1),
+                    "差异": f"{(hourly[i] / average[i] - 1) * 100:+.1f}%" if average[i] > 0 else "-",
+                }
+                for i, name in enumerate(factor_table.regions)
+            ], hide_index=True)
+            st.caption(f"_电力碳强度 {electricity_carbon:.2f} kg CO₂/kWh 为年平均值；"
+                       "逐小时曲线为按地区电源结构构造的示意数据，年平均值与之一致_")
+
+        with hourly_col2:
+            st.image(grid_profile_chart(
+                tuple(daily_grid[region_code].tolist()),
+                tuple(daily_video.tolist()),
+                tuple(daily_meeting.tolist())
+            ), width="stretch")
+
+
+hourly_section(video, meetings, video_intensity, meeting_intensity, green_data_center,
+               factor_table, region, option_codes["region"], electricity_carbon)
+
 # ==================== 情景模拟与敏感性分析（合并版）====================
 st.markdown("---")
 st.header("情景模拟与敏感性分析")
@@ -343,7 +757,11 @@ st.write("探索不同技术路径和政策选择的减排效果")
 # 创建选项卡，让用户在预设情景和自定义调整之间切换
 tab1, tab2, tab3 = st.tabs(["🚀 技术优化情景", "📱 设备生命周期优化", "🎯 自定义参数调整"])
 
-with tab1:
+
+@st.fragment
+@metrics.timed("tab_technology")
+def technology_scenario(calc):
+    """技术优化情景（局部重跑片段）"""
     # 技术优化情景
     st.markdown("#### 绿色ICT技术推广")
 
@@ -357,13 +775,12 @@ with tab1:
             0, 100, 50, 10,
             key="green_power_ratio"
         )
+        calc.set("green_power_ratio", green_power_ratio)
 
         # 计算影响
         if st.session_state.total > 0 and green_power_ratio > 0:
             # 假设视频相关活动的碳足迹减少比例与绿电比例成正比
-            video_contribution = video * video_intensity * 365
-            meeting_contribution = meetings * meeting_intensity * 52
-            tech_reduction = (video_contribution + meeting_contribution) * (green_power_ratio / 100)
+            tech_reduction = calc["green_power_reduction"]
 
             st.metric(
                 "碳足迹减少",
@@ -380,10 +797,10 @@ with tab1:
             0, 50, 20, 5,
             key="compression_improvement"
         )
+        calc.set("compression_improvement", compression_improvement)
 
         if st.session_state.total > 0 and compression_improvement > 0:
-            video_data_reduction = compression_improvement / 100
-            compression_reduction = video * video_intensity * 365 * video_data_reduction
+            compression_reduction = calc["compression_reduction"]
 
             st.metric(
                 "碳足迹减少",
@@ -392,7 +809,22 @@ with tab1:
                 delta_color="normal"
             )
 
-with tab2:
+    # 与使用年限扫描相同，用开关控制，需要时才绘图
+    if st.session_state.total > 0 and st.toggle("🗺️ 情景扫描：绿电比例 × 压缩率", key="technology_sweep"):
+        st.image(technology_sweep_chart(
+            calc["video_carbon"], calc["meeting_carbon"], green_power_ratio, compression_improvement
+        ), width="stretch")
+        st.caption("两项措施同时实施：压缩先减少视频数据量，绿电再作用于剩余排放；圆点为当前滑块位置")
+
+
+with tab1:
+    technology_scenario(calc)
+
+
+@st.fragment
+@metrics.timed("tab_lifecycle")
+def lifecycle_scenario(calc, phone_years):
+    """设备生命周期优化（局部重跑片段）"""
     # 设备生命周期优化
     st.markdown("#### 延长设备使用周期")
 
@@ -413,11 +845,11 @@ with tab2:
             value=min(phone_years + 1, 6),
             key="target_phone_years"
         )
+        calc.update(current_phone_years=current_phone_years, target_phone_years=target_phone_years)
 
         if current_phone_years < target_phone_years:
-            current_annual = estimated_phone_carbon / current_phone_years
-            target_annual = estimated_phone_carbon / target_phone_years
-            reduction = current_annual - target_annual
+            current_annual = calc["current_annual_phone_carbon"]
+            reduction = calc["lifetime_reduction"]
 
             st.metric(
                 "年减排量",
@@ -433,11 +865,12 @@ with tab2:
             0, 100, 50, 10,
             help="通过设备共享、云计算替代本地计算"
         )
+        calc.set("device_sharing", device_sharing)
 
         if st.session_state.total > 0 and device_sharing > 0:
             # 假设设备碳排放部分可以通过云化减少
-            device_contribution = estimated_phone_carbon / phone_years
-            sharing_reduction = device_contribution * (device_sharing / 100) * 0.5  # 系数调整
+            device_contribution = calc["phone_carbon"]
+            sharing_reduction = calc["sharing_reduction"]
 
             st.metric(
                 "年减排量",
@@ -446,7 +879,22 @@ with tab2:
                 delta_color="normal"
             )
 
-with tab3:
+    # 折叠的展开栏与未选中的选项卡中的内容同样在每次重跑时执行，因此用开关控制，需要时才绘图
+    if st.toggle("🗺️ 情景扫描：使用年限 × 设备利用率", key="lifecycle_sweep"):
+        st.image(lifecycle_sweep_chart(
+            calc["estimated_phone_carbon"], current_phone_years, target_phone_years, device_sharing
+        ), width="stretch")
+        st.caption("相对当前使用年限的年减排量；设备共享作用于延长年限后的剩余生产排放；圆点为当前滑块位置")
+
+
+with tab2:
+    lifecycle_scenario(calc, phone_years)
+
+
+@st.fragment
+@metrics.timed("tab_adjustment")
+def parameter_adjustment(calc):
+    """自定义参数调整（局部重跑片段）"""
     # 自定义参数调整与敏感性分析
     st.markdown("#### 🎛️ 自定义参数调整")
     st.write("手动调整参数，观察对结果的影响")
@@ -462,12 +910,10 @@ with tab3:
             -50, 50, 0, 5,
             key="video_adjustment"
         )
+        calc.set("video_adjustment", video_adjustment)
 
         if st.session_state.total > 0:
-            adjusted_video_intensity = video_intensity * (1 + video_adjustment / 100)
-            original_video_part = video * video_intensity * 365
-            adjusted_video_part = video * adjusted_video_intensity * 365
-            video_change = adjusted_video_part - original_video_part
+            video_change = calc["video_change"]
             video_change_percent = (video_change / st.session_state.total) * 100
 
             st.metric(
@@ -485,12 +931,10 @@ with tab3:
             -50, 50, 0, 5,
             key="phone_adjustment"
         )
+        calc.set("phone_adjustment", phone_adjustment)
 
         if st.session_state.total > 0:
-            adjusted_phone_carbon = estimated_phone_carbon * (1 + phone_adjustment / 100)
-            original_phone_part = estimated_phone_carbon / phone_years
-            adjusted_phone_part = adjusted_phone_carbon / phone_years
-            phone_change = adjusted_phone_part - original_phone_part
+            phone_change = calc["phone_change"]
             phone_change_percent = (phone_change / st.session_state.total) * 100
 
             st.metric(
@@ -508,12 +952,11 @@ with tab3:
             -50, 50, 0, 5,
             key="flight_adjustment"
         )
+        calc.set("flight_adjustment", flight_adjustment)
 
         if st.session_state.saving > 0:
-            adjusted_flight_factor = flight_factor * (1 + flight_adjustment / 100)
-            original_flight_emission = km * flight_factor
-            adjusted_flight_emission = km * adjusted_flight_factor
-            flight_change = adjusted_flight_emission - original_flight_emission
+            original_flight_emission = calc["flight_carbon"]
+            flight_change = calc["flight_change"]
             flight_change_percent = (
                                                 flight_change / original_flight_emission) * 100 if original_flight_emission > 0 else 0
 
@@ -524,133 +967,178 @@ with tab3:
                 delta_color="inverse" if flight_change > 0 else "normal"
             )
 
+
+with tab3:
+    parameter_adjustment(calc)
+
+
+# 全部参数组合排名：在当前数字习惯下一次性评估侧边栏的全部选项组合
+@st.fragment
+@metrics.timed("ranking")
+def scenario_ranking(video, meetings, phone_years, km, factor_table):
+    """全部参数组合排名（局部重跑片段）"""
+    if not st.toggle("🏆 全部参数组合排名", key="ranking_enabled"):
+        return
+    cube = scenario_cube(factor_table.version, factor_table.digest)
+    rank_by = st.radio(
+        "排序依据",
+        ["年碳足迹最低", "减排潜力最高"],
+        horizontal=True,
+        key="rank_by"
+    )
+    top_scenarios = results.rank(
+        cube, factor_table, video, meetings, phone_years, km,
+        by="total" if rank_by == "年碳足迹最低" else "saving",
+        ascending=rank_by == "年碳足迹最低"
+    )
+    st.dataframe([
+        {
+            "手机品牌": row["phone_brand"],
+            "视频平台": row["video_platform"],
+            "视频质量": row["video_quality"],
+            "会议质量": row["meeting_quality"],
+            "出行方式": row["travel_type"],
+            "单次旅行距离 (公里)": int(row["typical_distance"]),
+            "年碳足迹 (kg)": round(row["total"], 1),
+            "减排潜力 (kg)": round(row["saving"], 1),
+        }
+        for row in top_scenarios
+    ], hide_index=True)
+    st.caption(f"共 {cube.size:,} 种组合；单次旅行距离取各距离档位的典型距离（排放因子曲线的节点），"
+               "地区与绿色数据中心目前不影响计算结果，表中省略")
+
+
+scenario_ranking(video, meetings, phone_years, km, factor_table)
+
+
+# 多年预测：设备更替队列 × 电网脱碳 × 画质升级（见 projection.py）
+PROJECTION_PATHWAYS = 2000
+
+
+@st.fragment
+@metrics.timed("projection")
+def multi_year_projection(video, meetings, km, phone_years, estimated_phone_carbon, video_intensity,
+                          meeting_intensity, flight_factor, video_quality_code, region_code, region, factor_table):
+    """多年预测（局部重跑片段）"""
+    if not st.toggle("计算多年预测", key="projection_enabled"):
+        st.caption("_逐年模拟设备更替队列、电网脱碳与画质升级，并给出多条参数路径的不确定性范围_")
+        return
+    import numpy as np
+    import projection
+    proj_col1, proj_col2, proj_col3, proj_col4 = st.columns(4)
+    target_years = proj_col1.slider("目标换机周期（年）", 1.0, 8.0, float(min(phone_years + 1, 8)), 0.5,
+                                    key="projection_target_years")
+    transition_years = proj_col2.slider("过渡期（年）", 0, 15, 5, 1, key="projection_transition",
+                                        help="换机周期在此期间内由当前值线性变为目标值")
+    grid_decline = proj_col3.slider("电网碳强度年降幅 (%)", 0.0, 10.0, 3.0, 0.5, key="projection_grid") / 100
+    quality_growth = proj_col4.slider("画质升级（档/10年）", 0.0, 3.0, 0.5, 0.25, key="projection_quality",
+                                      help="例如 1 表示每10年平均升高一档（720p → 1080p）") / 10
+
+    with metrics.section("projection_compute"):
+        inputs = (video, meetings, km, estimated_phone_carbon, video_intensity, meeting_intensity,
+                  flight_factor, video_quality_code)
+        selected = projection.project(*inputs, phone_years, target_years, transition_years, grid_decline,
+                                      quality_growth, table=factor_table)
+        # 不确定性：各路径参数在设定值附近（±50%，目标周期 ±1 年）抽样
+        pathways = projection.sample_pathways(
+            PROJECTION_PATHWAYS, phone_years,
+            target_years=(max(target_years - 1, 1.0), target_years + 1),
+            grid_decline=(grid_decline * 0.5, grid_decline * 1.5),
+            quality_growth=(quality_growth * 0.5, quality_growth * 1.5),
+            transition_years=(transition_years * 0.5, transition_years * 1.5),
+        )
+        sampled = projection.project(*inputs, table=factor_table, **pathways)
+        total_band = np.percentile(sampled["cumulative_total"][:, :, region_code], [5, 50, 95], axis=0)
+        saving_band = np.percentile(sampled["cumulative_saving"][:, :, region_code], [5, 50, 95], axis=0)
+
+    years = selected["years"]
+    baseline = (estimated_phone_carbon / phone_years + selected["video_carbon"][0, 0, region_code]
+                + selected["meeting_carbon"][0, 0, region_code]) * len(years)
+    cumulative = selected["cumulative_total"][0, -1, region_code]
+    m1, m2, m3 = st.columns(3)
+    m1.metric(f"{years[0]}-{years[-1]} 累计碳足迹（{region}）", f"{cumulative:.0f} kg",
+              delta=f"{cumulative - baseline:+.0f} kg（相对维持现状）", delta_color="inverse")
+    m2.metric("累计减排潜力", f"{selected['cumulative_saving'][0, -1, region_code]:.0f} kg")
+    m3.metric("累计排放 P5-P95", f"{total_band[0, -1]:.0f} - {total_band[2, -1]:.0f} kg")
+
+    st.image(projection_chart(
+        tuple(years.tolist()),
+        tuple(selected["device_carbon"][0].tolist()),
+        tuple(selected["video_carbon"][0, :, region_code].tolist()),
+        tuple(selected["meeting_carbon"][0, :, region_code].tolist()),
+        tuple(map(tuple, total_band.round(3).tolist())),
+        tuple(map(tuple, saving_band.round(3).tolist())),
+    ), width="stretch")
+    st.caption(f"_设备按年龄分组逐年更替（延长周期的头几年新购减少）；视频与会议耗电量按{region}电网强度逐年下降计算；"
+               f"阴影为 {PROJECTION_PATHWAYS} 条参数路径的 P5-P95 范围_")
+
+
+with st.expander("📅 多年预测：设备更替与电网脱碳（2025-2050）", expanded=False):
+    multi_year_projection(video, meetings, km, phone_years, estimated_phone_carbon, video_intensity,
+                          meeting_intensity, flight_factor, option_codes["video_quality"], option_codes["region"],
+                          region, factor_table)
+
 # 第二部分：敏感性分析图表
 st.markdown("---")
 st.subheader("📊 参数敏感性分析")
 
 if st.session_state.total > 0:
-    # 计算每个参数变化10%对结果的影响
-    sensitivity_data = []
-
-    # 定义参数及其对总碳足迹的贡献计算方法
-    param_contributions = {
-        "视频流媒体": {
-            "value": video_intensity,
-            "contribution": video * video_intensity * 365,
-            "unit": "kg/小时"
-        },
-        "视频会议": {
-            "value": meeting_intensity,
-            "contribution": meetings * meeting_intensity * 52,
-            "unit": "kg/小时"
-        },
-        "手机生产": {
-            "value": estimated_phone_carbon,
-            "contribution": estimated_phone_carbon / phone_years,
-            "unit": "kg"
-        }
-    }
-
-    # 计算敏感性
-    for param_name, param_info in param_contributions.items():
-        if param_info["contribution"] > 0:
-            # 参数增加10%的影响
-            change_10_percent = param_info["contribution"] * 0.1
-            sensitivity_percent = (change_10_percent / st.session_state.total) * 100
-
-            sensitivity_data.append({
-                "参数": param_name,
-                "敏感性": abs(sensitivity_percent),
-                "变化方向": "+" if sensitivity_percent > 0 else "-",
-                "贡献占比": (param_info["contribution"] / st.session_state.total) * 100
-            })
-
-    if sensitivity_data:
-        # 按敏感性排序
-        sensitivity_data.sort(key=lambda x: x["敏感性"], reverse=True)
-
-        # 创建水平条形图
-        fig_sens, (ax1, ax2) = plt.subplots(1, 2, figsize=(12, 4))
-
-        # 左侧：敏感性条形图
-        # 修改这里：将参数名称改为英文缩写
-        param_names = []
-        for d in sensitivity_data:
-            if d["参数"] == "视频流媒体":
-                param_names.append("Video Streaming")
-            elif d["参数"] == "视频会议":
-                param_names.append("Video Conferencing")
-            elif d["参数"] == "手机生产":
-                param_names.append("Phone Production")
-            else:
-                param_names.append(d["参数"])  # 其他情况保留原名
-
-        sensitivities = [d["敏感性"] for d in sensitivity_data]
-
-        colors = ['#FF6B6B', '#4ECDC4', '#45B7D1'][:len(param_names)]
-        bars1 = ax1.barh(param_names, sensitivities, color=colors)
-
-        # 修改这里：图表标签改为英文
-        ax1.set_xlabel('Impact Change (%)')
-        ax1.set_title('Sensitivity Ranking')
-        ax1.set_xlim(0, max(sensitivities) * 1.2)
-
-        # 在条形上添加数值
-        for bar, value in zip(bars1, sensitivities):
-            width = bar.get_width()
-            ax1.text(width + 0.2, bar.get_y() + bar.get_height() / 2,
-                     f'{value:.1f}%', va='center', ha='left')
-
-        # 右侧：贡献占比饼图
-        # 修改这里：饼图标签也使用英文
-        labels = []
-        for d in sensitivity_data:
-            if d["参数"] == "视频流媒体":
-                labels.append("Video Streaming")
-            elif d["参数"] == "视频会议":
-                labels.append("Video Conferencing")
-            elif d["参数"] == "手机生产":
-                labels.append("Phone Production")
-            else:
-                labels.append(d["参数"])
-
-        sizes = [d["贡献占比"] for d in sensitivity_data]
-        colors = ['#FF6B6B', '#4ECDC4', '#45B7D1'][:len(labels)]
-
-        # 如果有其他贡献，添加"其他"类别
-        total_covered = sum(sizes)
-        if total_covered < 100:
-            labels.append("Other")
-            sizes.append(100 - total_covered)
-            colors.append('#95A5A6')
-
-        # 修改这里：饼图标题改为英文
-        ax2.pie(sizes, labels=labels, colors=colors, autopct='%1.1f%%',
-                startangle=90, textprops={'fontsize': 10})
-        ax2.set_title('Footprint Composition')
-
-        plt.tight_layout()
-        st.pyplot(fig_sens)
-
-        # 分析结论
-        most_sensitive = sensitivity_data[0]
-        st.info(f"""
-        **分析结论**：
-
-        1. **最敏感参数**：**{most_sensitive['参数']}**
-           - 该参数变化10%会导致总碳足迹变化 **{most_sensitive['敏感性']:.1f}%**
-           - 在总碳足迹中占比 **{most_sensitive['贡献占比']:.1f}%**
-
-        2. **政策启示**：
-           - 针对{most_sensitive['参数']}采取措施，减排效果最显著
-           - 提高该参数的准确性对评估结果至关重要
-
-        3. **个人行动建议**：
-           - 关注最敏感参数对应的生活习惯
-           - 通过调整这些习惯，实现最高效的碳减排
-        """)
-    else:
-        st.info("请先计算您的碳足迹，以查看敏感性分析")
+    import sensitivity
+    # 全局敏感性：侧边栏全部参数同时变化（Morris 筛选 + Sobol 指数），数字习惯取当前值
+    with metrics.section("sensitivity"):
+        analysis = global_sensitivity(video, meetings, phone_years, km, factor_table.version, factor_table.digest)
+        ranking = sensitivity.rank(analysis)
+
+        # 碳足迹构成：各组成部分占总碳足迹的比例
+        composition = calc["composition"]
+
+        # 总效应指数排序条形图 + 贡献占比饼图
+        chart_data = (
+            tuple(name for name, _, _ in ranking),
+            tuple(st_index * 100 for _, st_index, _ in ranking),
+            tuple(name for name, _ in composition),
+            tuple(share for _, share in composition)
+        )
+        if charts.BACKEND == "vega-lite":
+            st.vega_lite_chart(charts.sensitivity_spec(*chart_data))
+        else:
+            st.image(sensitivity_chart(*chart_data), width="stretch")
+
+    with st.expander("📋 全局敏感性指数明细（Morris / Sobol）", expanded=False):
+        st.dataframe([
+            {
+                "参数": name,
+                "碳足迹 μ* (kg)": round(float(analysis["total"]["mu_star"][i]), 2),
+                "碳足迹 S1": round(float(analysis["total"]["S1"][i]), 3),
+                "碳足迹 ST": round(float(analysis["total"]["ST"][i]), 3),
+                "减排 μ* (kg)": round(float(analysis["saving"]["mu_star"][i]), 2),
+                "减排 S1": round(float(analysis["saving"]["S1"][i]), 3),
+                "减排 ST": round(float(analysis["saving"]["ST"][i]), 3),
+            }
+            for i, name in enumerate(sensitivity.PARAM_NAMES)
+        ], hide_index=True)
+        st.caption("μ*：切换该选项时结果平均变化量；S1：一阶Sobol指数（单独作用）；"
+                   "ST：总效应指数（含交互作用）。各参数在全部选项中等概率抽样。")
+
+    # 分析结论
+    most_sensitive, most_st, most_mu = ranking[0]
+    largest_part, largest_share = composition[0]
+    st.info(f"""
+    **分析结论**：
+
+    1. **最敏感参数**：**{most_sensitive}**
+       - 可解释总碳足迹方差的 **{most_st * 100:.1f}%**（总效应指数，含交互作用）
+       - 切换该选项平均改变年碳足迹 **{most_mu:.1f} kg**
+       - 当前碳足迹中占比最大的是 **{largest_part}**（**{largest_share:.1f}%**）
+
+    2. **政策启示**：
+       - 针对{most_sensitive}采取措施，减排效果最显著
+       - 提高该参数的准确性对评估结果至关重要
+
+    3. **个人行动建议**：
+       - 关注最敏感参数对应的生活习惯
+       - 通过调整这些习惯，实现最高效的碳减排
+    """)
 else:
     st.info("👆 请先计算碳足迹，以启用情景模拟与敏感性分析功能")
 
@@ -674,3 +1162,33 @@ with st.expander("📚 数据来源与假设", expanded=True):
     本工具使用简化模型，计算结果为估算值，
     实际碳排放因具体设备、使用习惯、电网实时状况而异。
     """)
+
+# ==================== 开发者面板（性能插桩） ====================
+rerun_metrics = metrics.end_rerun()
+if rerun_metrics is not None:
+    with st.expander("🛠️ 开发者面板：重跑耗时与内存", expanded=False):
+        m1, m2, m3 = st.columns(3)
+        m1.metric("本次重跑耗时", f"{rerun_metrics['seconds'] * 1000:.1f} ms")
+        m2.metric("内存分配峰值", f"{rerun_metrics['peak_bytes'] / 2 ** 20:.1f} MB")
+        m3.metric("本进程累计重跑", f"{metrics.reruns()} 次")
+        st.dataframe([
+            {
+                "部分": name,
+                "本次 (ms)": round(rerun_metrics["sections"][name] * 1000, 2)
+                if name in rerun_metrics["sections"] else None,
+                "次数": count,
+                "平均 (ms)": round(mean * 1000, 2),
+                "最大 (ms)": round(longest * 1000, 2),
+            }
+            for name, count, mean, longest in metrics.summary()
+        ], hide_index=True)
+        cache_stats = results.CACHE.stats()
+        st.caption(f"跨会话结果缓存：{cache_stats['size']} 条，命中 {cache_stats['hits']} 次，"
+                   f"未命中 {cache_stats['misses']} 次（命中率 {cache_stats['hit_rate'] * 100:.1f}%），"
+                   f"淘汰 {cache_stats['evictions']}，过期 {cache_stats['expirations']}")
+        st.dataframe([
+            {"依赖图节点": name, "重新计算": computed, "跳过（依赖未变化）": skipped}
+            for name, computed, skipped in calc.stats()
+        ], hide_index=True)
+        st.caption(f"_片段单独重跑时只计入对应部分；汇总指标每 {metrics.EXPORT_INTERVAL:g} 秒写入 "
+                   f"{metrics.METRICS_FILE}（Prometheus 文本格式）_")
@@ -0,0 +1,357 @@
+# ==================== 本地 HTTP JSON 接口 ====================
+# 用法：python api.py [--host 127.0.0.1] [--port 8600] [--max-batch 65536] [--max-delay-ms 2]
+#
+# 在页面之外以 JSON 接口提供相同的计算（与页面共用 footprint.py / sweeps.py / sensitivity.py）：
+#   POST /v1/footprint              年数字碳足迹（各分项与合计）
+#   POST /v1/saving                 视频会议替代差旅的减排量
+#   POST /v1/scenarios/technology   技术优化情景（绿电比例 green_power、压缩率提升 compression）
+#   POST /v1/scenarios/lifecycle    设备生命周期优化（目标年限 target_years、设备利用率提升 device_sharing）
+#   POST /v1/sensitivity            全局敏感性分析（Morris + Sobol，默认因子版本）
+#   GET  /v1/options                选项标签与排放因子版本
+#   GET  /metrics                   Prometheus 文本格式的指标
+# 请求体为单个对象，或 {"items": [对象, ...]} 的批量请求，响应相应为对象或 {"items": [...]}。
+# 字段名与 batch.py 的CSV列一致（选项使用侧边栏的中文标签），缺失的字段取页面默认值；
+# "factors_version" 指定排放因子版本（默认最新）。
+#
+# 服务运行在单个 asyncio 事件循环上。前四个接口的请求不逐个计算：同一因子版本的并发请求先排队，
+# 等待至多 max_delay 或凑满 max_batch 行后拼接成一次向量化计算，再按行拆分结果
+# （碳足迹与减排量共用同一次计算）。敏感性分析本身已是大批量向量化计算，放到线程中执行；
+# 相同输入的并发请求共用同一次计算，结果进入跨会话结果缓存（results.CACHE）。
+# 依赖 starlette 与 uvicorn（随 streamlit 安装）。
+import argparse
+import asyncio
+import json
+from collections import Counter
+
+import numpy as np
+import uvicorn
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, PlainTextResponse
+from starlette.routing import Route
+
+import batch
+import factors
+import footprint as fp
+import metrics
+import results
+import scenarios
+import sensitivity
+import sweeps
+
+MAX_BATCH = 65536      # 一次向量化计算的最大行数
+MAX_DELAY = 0.002      # 秒，请求排队等待合并的最长时间
+MAX_SAMPLES = 65536    # 敏感性分析的最大 Sobol 样本数
+
+# 各接口在页面默认值之外的数值字段（与选项卡滑块的默认值一致）
+EXTRA_DEFAULTS = {
+    "technology": {"green_power": 50.0, "compression": 20.0},
+    "lifecycle": {"target_years": 3.0, "device_sharing": 50.0},
+}
+OUTPUTS = {
+    "footprint": ("video_carbon", "meeting_carbon", "phone_carbon", "total"),
+    "saving": ("flight_carbon", "meeting_carbon", "saving"),
+    "technology": ("video_carbon", "meeting_carbon", "reduction"),
+    "lifecycle": ("phone_carbon", "reduction"),
+}
+# 碳足迹与减排量由同一次计算得出，共用一个合并队列
+EVALUATORS = {"footprint": "profiles", "saving": "profiles", "technology": "technology", "lifecycle": "lifecycle"}
+
+
+# 进程内总数（所有应用实例），导出到 metrics
+_totals = Counter()
+
+
+class RequestError(ValueError):
+    """请求内容无效（返回 400）"""
+
+
+# ==================== 请求解析与计算 ====================
+def item_version(item):
+    """请求项指定的排放因子版本（未指定时为 None）"""
+    version = item.get("factors_version")
+    if version is not None and not isinstance(version, str):
+        raise RequestError("factors_version 应为字符串")
+    return version
+
+
+def parse_items(items, table, extra=None):
+    """把请求中的对象列表转换为各字段的数组（选项转换为整数编码）"""
+    defaults = {**batch.DEFAULTS, **(extra or {})}
+    unknown = {name for item in items for name in item} - set(defaults) - {"factors_version"}
+    if unknown:
+        raise RequestError(f"未知字段: {', '.join(sorted(unknown))}")
+    for item in items:
+        item_version(item)
+
+    def column(name):
+        return [item.get(name, defaults[name]) for item in items]
+
+    try:
+        columns = {name: np.array(column(name), dtype=np.float64)
+                   for name in batch.NUMERIC_COLUMNS + list(extra or {})}
+        for name, options in zip(batch.OPTION_COLUMNS, scenarios.axis_options(table)):
+            columns[name] = fp.encode(column(name), options)
+    except (TypeError, ValueError) as e:
+        raise RequestError(str(e)) from None
+    for name in batch.NUMERIC_COLUMNS + list(extra or {}):
+        if not np.isfinite(columns[name]).all():
+            raise RequestError(f"{name} 应为有限的数值")
+    if (columns["phone_years"] <= 0).any():
+        raise RequestError("phone_years 应大于0")
+    columns["green_data_center"] = np.array(
+        [g if isinstance(g, bool) else str(g).strip().lower() in batch.TRUE_VALUES
+         for g in column("green_data_center")]
+    )
+    return columns
+
+
+def _derive(columns, table):
+    return fp.derive_factors(columns["phone_brand"], columns["video_platform"], columns["video_quality"],
+                             columns["meeting_quality"], columns["travel_type"], columns["travel_distance"],
+                             columns["region"], columns["green_data_center"], table)
+
+
+def evaluate_profiles(columns, table):
+    """碳足迹与减排量（fp.score）"""
+    return fp.score(columns["video"], columns["meetings"], columns["phone_years"], columns["km"],
+                    _derive(columns, table))
+
+
+def evaluate_technology(columns, table):
+    """技术优化情景：两项措施同时实施的年减排量"""
+    derived = _derive(columns, table)
+    video_carbon = fp.video_carbon(columns["video"], derived["video_intensity"])
+    meeting_carbon = fp.meeting_carbon(columns["meetings"], derived["meeting_intensity"])
+    return {
+        "video_carbon": video_carbon,
+        "meeting_carbon": meeting_carbon,
+        "reduction": sweeps.technology_reduction(video_carbon, meeting_carbon,
+                                                 columns["green_power"], columns["compression"]),
+    }
+
+
+def evaluate_lifecycle(columns, table):
+    """设备生命周期优化：相对当前换机周期（phone_years）的年减排量"""
+    phone_carbon = table.phone_carbon[columns["phone_brand"]]
+    return {
+        "phone_carbon": phone_carbon / columns["phone_years"],
+        "reduction": sweeps.lifecycle_reduction(phone_carbon, columns["phone_years"],
+                                                columns["target_years"], columns["device_sharing"]),
+    }
+
+
+EVALUATE = {"profiles": evaluate_profiles, "technology": evaluate_technology, "lifecycle": evaluate_lifecycle}
+
+
+# ==================== 请求合并 ====================
+class Coalescer:
+    """把并发的小请求合并为一次向量化计算（在事件循环线程中执行）"""
+
+    def __init__(self, evaluate, max_batch=MAX_BATCH, max_delay=MAX_DELAY):
+        self.evaluate = evaluate
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self._queue = []  # (各字段数组, 行数, future)
+        self._rows = 0
+        self._timer = None
+        self.requests = 0
+        self.batches = 0
+        self.rows = 0
+
+    async def submit(self, columns, rows):
+        future = asyncio.get_running_loop().create_future()
+        self._queue.append((columns, rows, future))
+        self._rows += rows
+        self.requests += 1
+        _totals["requests"] += 1
+        if self._rows >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.max_delay, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        queue, self._queue, self._rows = self._queue, [], 0
+        if not queue:
+            return
+        total = sum(rows for _, rows, _ in queue)
+        self.batches += 1
+        self.rows += total
+        _totals["batches"] += 1
+        _totals["rows"] += total
+        try:
+            if len(queue) == 1:
+                columns = queue[0][0]
+            else:
+                columns = {name: np.concatenate([c[name] for c, _, _ in queue]) for name in queue[0][0]}
+            result = {name: np.broadcast_to(value, (total,)) for name, value in self.evaluate(columns).items()}
+        except Exception as e:
+            for _, _, future in queue:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        offset = 0
+        for _, rows, future in queue:
+            if not future.done():
+                future.set_result({name: value[offset:offset + rows] for name, value in result.items()})
+            offset += rows
+
+
+class Service:
+    """各接口的处理函数；合并队列按（计算类型, 因子表）分别建立"""
+
+    def __init__(self, max_batch=MAX_BATCH, max_delay=MAX_DELAY):
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self._coalescers = {}
+        self._inflight = {}  # 正在计算的敏感性分析：键 -> future
+
+    def coalescer(self, evaluator, table):
+        key = (evaluator, table.version, table.digest)  # 因子文件更新后使用新的因子表
+        if key not in self._coalescers:
+            evaluate = EVALUATE[evaluator]
+            self._coalescers[key] = Coalescer(lambda columns: evaluate(columns, table),
+                                              self.max_batch, self.max_delay)
+        return self._coalescers[key]
+
+    def stats(self):
+        coalescers = list(self._coalescers.values())
+        return {name: sum(getattr(c, name) for c in coalescers) for name in ("requests", "batches", "rows")}
+
+    async def calculate(self, kind, items):
+        """碳足迹 / 减排量 / 情景：按因子版本分组提交到合并队列"""
+        groups = {}
+        for i, item in enumerate(items):
+            if not isinstance(item, dict):
+                raise RequestError("请求项应为 JSON 对象")
+            groups.setdefault(item_version(item), []).append(i)
+        outputs = [None] * len(items)
+        for version, indices in groups.items():
+            if version is not None and version not in factors.versions():
+                raise RequestError(f"未知排放因子版本: {version}（可选：{', '.join(factors.versions())}）")
+            table = factors.get(version)
+            columns = parse_items([items[i] for i in indices], table, EXTRA_DEFAULTS.get(kind))
+            result = await self.coalescer(EVALUATORS[kind], table).submit(columns, len(indices))
+            values = zip(*[result[name].tolist() for name in OUTPUTS[kind]])
+            for i, row in zip(indices, values):
+                outputs[i] = {"factors_version": table.version, **dict(zip(OUTPUTS[kind], row))}
+        return outputs
+
+    async def sensitivity(self, item):
+        if not isinstance(item, dict):
+            raise RequestError("请求项应为 JSON 对象")
+        try:
+            habits = [float(item.get(name, batch.DEFAULTS[name])) for name in batch.NUMERIC_COLUMNS]
+            samples = int(item.get("samples", 16384))
+            trajectories = int(item.get("trajectories", 64))
+            seed = int(item.get("seed", 0))
+        except (TypeError, ValueError) as e:
+            raise RequestError(str(e)) from None
+        if not np.isfinite(habits).all() or habits[batch.NUMERIC_COLUMNS.index("phone_years")] <= 0:
+            raise RequestError("数字习惯应为有限的数值，phone_years 应大于0")
+        if not 0 < samples <= MAX_SAMPLES or not 0 < trajectories <= MAX_SAMPLES:
+            raise RequestError(f"samples 与 trajectories 应在 1-{MAX_SAMPLES} 之间")
+        table = factors.get()
+        key = ("sensitivity", table.version, table.digest) + results.normalize((*habits, samples, trajectories, seed))
+        if key not in self._inflight:
+            def compute():
+                analysis = sensitivity.analyze(*habits, samples=samples, trajectories=trajectories, seed=seed,
+                                               table=table)
+                return {
+                    "parameters": sensitivity.PARAM_NAMES,
+                    **{output: {name: np.asarray(values).tolist() for name, values in indices.items()}
+                       for output, indices in analysis.items()},
+                }
+
+            future = asyncio.get_running_loop().run_in_executor(
+                None, lambda: results.CACHE.get_or_compute(key, compute))
+            self._inflight[key] = future
+            future.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(self._inflight[key])
+
+
+# ==================== HTTP ====================
+async def _read_items(request):
+    """返回 (请求项列表, 是否为批量请求)"""
+    try:
+        body = json.loads(await request.body())
+    except (UnicodeDecodeError, json.JSONDecodeError) as e:
+        raise RequestError(f"请求体不是有效的 JSON：{e}") from None
+    if isinstance(body, dict) and "items" in body:
+        if not isinstance(body["items"], list):
+            raise RequestError("items 应为数组")
+        return body["items"], True
+    return [body], False
+
+
+def create_app(max_batch=MAX_BATCH, max_delay=MAX_DELAY):
+    service = Service(max_batch, max_delay)
+
+    def endpoint(handler):
+        async def route(request):
+            try:
+                items, batched = await _read_items(request)
+                with metrics.section(f"api_{handler.__name__}"):
+                    outputs = await handler(items)
+            except RequestError as e:
+                return JSONResponse({"error": str(e)}, status_code=400)
+            return JSONResponse({"items": outputs} if batched else outputs[0])
+        return route
+
+    def calculation(kind):
+        async def handler(items):
+            return await service.calculate(kind, items)
+        handler.__name__ = kind
+        return handler
+
+    async def sensitivity_handler(items):
+        return await asyncio.gather(*[service.sensitivity(item) for item in items])
+    sensitivity_handler.__name__ = "sensitivity"
+
+    async def options(request):
+        table = factors.get()
+        return JSONResponse({
+            "factors_versions": factors.versions(),
+            "defaults": batch.DEFAULTS,
+            "options": dict(zip(batch.OPTION_COLUMNS, map(list, scenarios.axis_options(table)))),
+        })
+
+    async def prometheus(request):
+        return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+    app = Starlette(routes=[
+        Route("/v1/footprint", endpoint(calculation("footprint")), methods=["POST"]),
+        Route("/v1/saving", endpoint(calculation("saving")), methods=["POST"]),
+        Route("/v1/scenarios/technology", endpoint(calculation("technology")), methods=["POST"]),
+        Route("/v1/scenarios/lifecycle", endpoint(calculation("lifecycle")), methods=["POST"]),
+        Route("/v1/sensitivity", endpoint(sensitivity_handler), methods=["POST"]),
+        Route("/v1/options", options),
+        Route("/metrics", prometheus),
+    ])
+    app.state.service = service
+    return app
+
+
+metrics.register("ict_api_requests_total", "合并前的计算请求数", "counter", lambda: _totals["requests"])
+metrics.register("ict_api_batches_total", "向量化计算次数", "counter", lambda: _totals["batches"])
+metrics.register("ict_api_rows_total", "向量化计算的总行数", "counter", lambda: _totals["rows"])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="ICT碳足迹计算的本地 HTTP JSON 接口")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8600)
+    parser.add_argument("--max-batch", type=int, default=MAX_BATCH, help="一次向量化计算的最大行数")
+    parser.add_argument("--max-delay-ms", type=float, default=MAX_DELAY * 1000,
+                        help="请求排队等待合并的最长时间（毫秒）；--max-batch 1 时不合并")
+    args = parser.parse_args(argv)
+
+    app = create_app(args.max_batch, args.max_delay_ms / 1000)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning", access_log=False)
+
+
+if __name__ == "__main__":
+    main()
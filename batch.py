@@ -0,0 +1,159 @@
+# ==================== 批量碳足迹计算（命令行） ====================
+# 用法：python batch.py profiles.csv results.csv [--chunk-size 50000] [--workers 8] [--factors-version 2023.1]
+#
+# 输入CSV第一行为表头，列名与页面变量一致：
+#   video, meetings, phone_years, km,
+#   phone_brand, video_platform, video_quality, meeting_quality,
+#   travel_type, travel_distance, region, green_data_center
+# 选项列使用与侧边栏相同的中文标签（如“苹果 iPhone”“720p（高清）”），
+# 缺失的列取页面默认值；其余列（如员工编号）原样输出。
+# 输入按固定行数分块流式读取，各块在进程池中并行计算后按原顺序写出，
+# 同时在途的块数有上限，因此内存占用与文件大小无关。
+# 排放因子版本默认取最新版本，指定版本号可复现历史结果。
+import argparse
+import csv
+import io
+import os
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import factors
+import footprint as fp
+import scenarios
+
+# 与页面控件默认值一致
+DEFAULTS = {
+    "video": "2.0",
+    "meetings": "3.0",
+    "phone_years": "2",
+    "km": "1000",
+    "phone_brand": "苹果 iPhone",
+    "video_platform": "YouTube/Netflix",
+    "video_quality": "720p（高清）",
+    "meeting_quality": "平衡模式",
+    "travel_type": "国内航班",
+    "travel_distance": "中途 (500-1000km)",
+    "region": "中国（中等偏上）",
+    "green_data_center": "0",
+}
+NUMERIC_COLUMNS = ["video", "meetings", "phone_years", "km"]
+OPTION_COLUMNS = ["phone_brand", "video_platform", "video_quality", "meeting_quality",
+                  "travel_type", "travel_distance", "region"]
+RESULT_COLUMNS = ["video_carbon", "meeting_carbon", "phone_carbon", "total",
+                  "flight_carbon", "saving"]
+TRUE_VALUES = {"1", "true", "yes", "y", "是"}
+
+_cubes = {}  # 每个工作进程按因子版本打开一次情景立方体（内存映射，进程间共享物理页）
+
+
+def _scenario_cube(table):
+    if table.digest not in _cubes:
+        _cubes[table.digest] = scenarios.load_cube(table=table)
+    return _cubes[table.digest]
+
+
+def column(rows, header, name):
+    """取出一列（缺失时使用默认值）"""
+    if name in header:
+        i = header.index(name)
+        return [row[i] for row in rows]
+    return [DEFAULTS[name]] * len(rows)
+
+
+def score_rows(header, rows, version=None):
+    """计算一块数据，返回各分项、合计与减排量数组"""
+    table = factors.get(version)
+    habits = {name: np.array(column(rows, header, name), dtype=np.float64)
+              for name in NUMERIC_COLUMNS}
+    codes = {name: fp.encode(column(rows, header, name), options)
+             for name, options in zip(OPTION_COLUMNS, scenarios.axis_options(table))}
+    green = column(rows, header, "green_data_center")
+    codes["green_data_center"] = np.array([g.strip().lower() in TRUE_VALUES for g in green])
+
+    return fp.score(derived=scenarios.lookup(_scenario_cube(table), **codes), **habits)
+
+
+def process_chunk(header, rows, version=None):
+    """计算一块数据，返回可直接写出的CSV文本（在子进程中执行）"""
+    result = score_rows(header, rows, version)
+    values = np.column_stack([result[name] for name in RESULT_COLUMNS])
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row, numbers in zip(rows, values.tolist()):
+        writer.writerow(row + [f"{v:.3f}" for v in numbers])
+    return buffer.getvalue()
+
+
+def read_header(reader):
+    """读取表头行，文件为空时抛出 ValueError"""
+    header = next(reader, [])
+    if not header:
+        raise ValueError("输入文件为空")
+    return header
+
+
+def iter_chunks(reader, chunk_size, width):
+    """按 chunk_size 行分块读取 csv.reader：跳过空行，列数与表头（width 列）不符时抛出带行号的 ValueError"""
+    rows = []
+    for row in reader:
+        if not row:
+            continue
+        if len(row) != width:
+            raise ValueError(f"第 {reader.line_num} 行有 {len(row)} 列，表头有 {width} 列")
+        rows.append(row)
+        if len(rows) == chunk_size:
+            yield rows
+            rows = []
+    if rows:
+        yield rows
+
+
+def run(input_path, output_path, chunk_size=50000, workers=None, version=None):
+    """流式处理整个文件，返回处理的行数"""
+    workers = workers or os.cpu_count() or 1
+    table = factors.get(version)
+    max_pending = workers * 2  # 在途块数上限，保证内存占用恒定
+    count = 0
+    scenarios.load_cube(table=table)  # 在启动工作进程前生成立方体文件，避免各进程重复生成
+    with open(input_path, newline="", encoding="utf-8-sig") as fin, \
+            open(output_path, "w", newline="", encoding="utf-8") as fout, \
+            ProcessPoolExecutor(max_workers=workers) as pool:
+        reader = csv.reader(fin)
+        header = read_header(reader)
+        missing = [name for name in DEFAULTS if name not in header]
+        csv.writer(fout).writerow(header + RESULT_COLUMNS)
+
+        pending = deque()
+        for rows in iter_chunks(reader, chunk_size, len(header)):
+            count += len(rows)
+            pending.append(pool.submit(process_chunk, header, rows, table.version))
+            if len(pending) >= max_pending:
+                fout.write(pending.popleft().result())
+        while pending:
+            fout.write(pending.popleft().result())
+    if missing:
+        print(f"以下列缺失，已使用默认值: {', '.join(missing)}", file=sys.stderr)
+    return count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="批量计算ICT碳足迹与减排潜力")
+    parser.add_argument("input", help="输入CSV文件（UTF-8）")
+    parser.add_argument("output", help="输出CSV文件")
+    parser.add_argument("--chunk-size", type=int, default=50000, help="每块行数（默认50000）")
+    parser.add_argument("--workers", type=int, default=None, help="进程数（默认CPU核数）")
+    parser.add_argument("--factors-version", default=None,
+                        help=f"排放因子版本（可选：{', '.join(factors.versions())}；默认最新）")
+    args = parser.parse_args(argv)
+
+    version = factors.get(args.factors_version).version
+    count = run(args.input, args.output, args.chunk_size, args.workers, version)
+    print(f"已处理 {count} 行 -> {args.output}（排放因子版本 {version}）", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
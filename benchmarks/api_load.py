@@ -0,0 +1,130 @@
+# ==================== HTTP 接口负载测试 ====================
+# 用法：python benchmarks/api_load.py [--clients 64] [--requests 200] [--rows 1] [--port 8601]
+#
+# 启动 api.py 服务，由大量并发客户端（各自保持一条 HTTP/1.1 长连接）连续发送小请求：
+# 每个请求为 --rows 个随机画像，轮流发往 /v1/footprint、/v1/saving 与两个情景接口。
+# 分别在不合并（--max-batch 1）与合并（默认）两种设置下运行，报告吞吐量（请求/秒）、
+# p50/p99 延迟、服务器CPU时间与平均每次向量化计算的行数（来自 /metrics）。
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+import urllib.request
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from rerun_cpu import server_cpu_seconds  # noqa: E402
+
+sys.path.insert(0, ROOT)
+
+import factors  # noqa: E402
+
+PATHS = ["/v1/footprint", "/v1/saving", "/v1/scenarios/technology", "/v1/scenarios/lifecycle"]
+
+
+def start_api(port, args=()):
+    """启动 api.py 服务并等待其就绪"""
+    server = subprocess.Popen([sys.executable, os.path.join(ROOT, "api.py"), "--port", str(port), *args],
+                              cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    for _ in range(100):
+        try:
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/v1/options", timeout=1)
+            break
+        except OSError:
+            time.sleep(0.2)
+    return server
+
+
+def counters(port):
+    """/metrics 中的 ict_api_* 计数器"""
+    text = urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics").read().decode()
+    return {line.split()[0]: float(line.split()[1]) for line in text.splitlines()
+            if line.startswith("ict_api_")}
+
+
+def request_bodies(n, rows, seed=0):
+    rng = np.random.default_rng(seed)
+    table = factors.get()
+    for _ in range(n):
+        items = [{
+            "video": float(rng.choice(np.arange(0, 12.5, 0.5))),
+            "meetings": float(rng.choice(np.arange(0, 10.5, 0.5))),
+            "phone_years": int(rng.integers(1, 6)),
+            "km": int(rng.integers(1, 50)) * 100,
+            "phone_brand": table.phone_brands[rng.integers(len(table.phone_brands))],
+            "video_quality": table.video_qualities[rng.integers(len(table.video_qualities))],
+        } for _ in range(rows)]
+        yield json.dumps(items[0] if rows == 1 else {"items": items}).encode()
+
+
+async def client(port, bodies, offset, latencies):
+    """一条长连接上依次发送请求，记录每个请求的延迟"""
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    try:
+        for i, body in enumerate(bodies):
+            path = PATHS[(offset + i) % len(PATHS)]
+            start = time.perf_counter()
+            writer.write(f"POST {path} HTTP/1.1\r\nHost: 127.0.0.1\r\nContent-Type: application/json\r\n"
+                         f"Content-Length: {len(body)}\r\n\r\n".encode() + body)
+            header = await reader.readuntil(b"\r\n\r\n")
+            status = header.split(b" ", 2)[1]
+            length = next(int(line.split(b":")[1]) for line in header.split(b"\r\n")
+                          if line.lower().startswith(b"content-length:"))
+            await reader.readexactly(length)
+            if status != b"200":
+                raise RuntimeError(f"{path} 返回 {status.decode()}")
+            latencies.append(time.perf_counter() - start)
+    finally:
+        writer.close()
+
+
+async def load_test(port, clients, requests, rows):
+    latencies = []
+    bodies = list(request_bodies(clients * requests, rows))
+    start = time.perf_counter()
+    await asyncio.gather(*[client(port, bodies[i * requests:(i + 1) * requests], i, latencies)
+                           for i in range(clients)])
+    return time.perf_counter() - start, np.array(latencies)
+
+
+def run(port, clients, requests, rows, server_args):
+    server = start_api(port, server_args)
+    try:
+        asyncio.run(load_test(port, 4, 20, rows))  # 预热
+        before, cpu_before = counters(port), server_cpu_seconds(server.pid)
+        elapsed, latencies = asyncio.run(load_test(port, clients, requests, rows))
+        cpu = server_cpu_seconds(server.pid) - cpu_before
+        after = counters(port)
+    finally:
+        server.terminate()
+        server.wait()
+    batches = after["ict_api_batches_total"] - before["ict_api_batches_total"]
+    batch_rows = (after["ict_api_rows_total"] - before["ict_api_rows_total"]) / max(batches, 1)
+    return len(latencies) / elapsed, np.percentile(latencies, [50, 99]) * 1000, cpu / len(latencies), batch_rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="HTTP 接口负载测试：请求合并的吞吐量与延迟")
+    parser.add_argument("--clients", type=int, default=64, help="并发客户端（长连接）数")
+    parser.add_argument("--requests", type=int, default=200, help="每个客户端发送的请求数")
+    parser.add_argument("--rows", type=int, default=1, help="每个请求的画像数")
+    parser.add_argument("--port", type=int, default=8601)
+    args = parser.parse_args(argv)
+
+    print(f"{args.clients} 个并发客户端 × {args.requests} 个请求，每个请求 {args.rows} 个画像")
+    print(f"{'请求合并':<10}{'吞吐 (次/s)':>14}{'p50 (ms)':>10}{'p99 (ms)':>10}"
+          f"{'CPU (ms/次)':>14}{'行/次计算':>12}")
+    for label, server_args in (("关闭", ["--max-batch", "1"]), ("开启", [])):
+        throughput, (p50, p99), cpu, batch_rows = run(args.port, args.clients, args.requests, args.rows,
+                                                      server_args)
+        print(f"{label:<10}{throughput:>14.0f}{p50:>10.2f}{p99:>10.2f}{cpu * 1000:>14.3f}{batch_rows:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
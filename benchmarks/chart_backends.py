@@ -0,0 +1,99 @@
+# ==================== 图表后端对比 ====================
+# 用法：python benchmarks/chart_backends.py [--charts 200] [--reruns 40]
+#
+# 对比对比图与敏感性图的两种渲染方式：
+#   - matplotlib：服务器端构建图形并光栅化为PNG（ICT_CHART_BACKEND=matplotlib，默认）
+#   - vega-lite：服务器只生成 Vega-Lite 描述（JSON），浏览器绘制（ICT_CHART_BACKEND=vega-lite）
+# 第一部分直接调用 charts，每次使用不同数据（不命中缓存），统计服务器CPU时间与发往浏览器的字节数；
+# 第二部分在子进程中用 AppTest 整页重跑（每次改变视频时长并重新计算），比较整页的服务器CPU时间。
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import charts  # noqa: E402
+import sensitivity  # noqa: E402
+
+COMPONENTS = ("视频流媒体", "手机生产", "视频会议")
+
+
+def chart_inputs(n, seed=0):
+    """n 组不同的图表数据（对比图 + 敏感性图）"""
+    rng = np.random.default_rng(seed)
+    for _ in range(n):
+        total, saving = rng.uniform(10, 300, 2)
+        st_index = np.sort(rng.dirichlet(np.ones(len(sensitivity.PARAM_NAMES))))[::-1] * 100
+        shares = np.sort(rng.dirichlet(np.ones(3)))[::-1] * 100
+        yield (float(total), float(saving)), (tuple(sensitivity.PARAM_NAMES), tuple(st_index.tolist()),
+                                              COMPONENTS, tuple(shares.tolist()))
+
+
+def matplotlib_payload(comparison, sensitivity_args):
+    return len(charts.comparison_png(*comparison)) + len(charts.sensitivity_png(*sensitivity_args))
+
+
+def vega_lite_payload(comparison, sensitivity_args):
+    # st.vega_lite_chart 以 JSON 字符串发送描述
+    return (len(json.dumps(charts.comparison_spec(*comparison)).encode())
+            + len(json.dumps(charts.sensitivity_spec(*sensitivity_args)).encode()))
+
+
+def bench_direct(n):
+    results = {}
+    for name, func in (("matplotlib", matplotlib_payload), ("vega-lite", vega_lite_payload)):
+        payload = 0
+        start = time.process_time()
+        for comparison, sensitivity_args in chart_inputs(n):
+            payload += func(comparison, sensitivity_args)
+        results[name] = ((time.process_time() - start) / n * 1000, payload / n)
+    return results
+
+
+PAGE_SCRIPT = """
+import sys, time
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file(sys.argv[1], default_timeout=120)
+at.run()
+at.button[1].click().run()
+reruns = int(sys.argv[2])
+start = time.process_time()
+for i in range(reruns):
+    at.slider[0].set_value((i % 24) * 0.5 + 0.5)
+    at.button[0].click().run()
+print((time.process_time() - start) / reruns * 1000)
+"""
+
+
+def bench_page(backend, reruns):
+    env = dict(os.environ, ICT_CHART_BACKEND=backend)
+    out = subprocess.run([sys.executable, "-c", PAGE_SCRIPT, os.path.join(ROOT, "WebPage.py"), str(reruns)],
+                         env=env, cwd=ROOT, capture_output=True, text=True, check=True)
+    return float(out.stdout.split()[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="图表后端对比：服务器CPU与传输字节数")
+    parser.add_argument("--charts", type=int, default=200, help="直接渲染的图表组数")
+    parser.add_argument("--reruns", type=int, default=40, help="整页重跑次数（每个后端）")
+    args = parser.parse_args(argv)
+
+    direct = bench_direct(args.charts)
+    print(f"对比图 + 敏感性图，{args.charts} 组不同数据：")
+    print(f"{'后端':<12}{'CPU (ms/组)':>14}{'传输 (KB/组)':>16}")
+    for name, (cpu_ms, payload) in direct.items():
+        print(f"{name:<12}{cpu_ms:>14.2f}{payload / 1024:>16.1f}")
+
+    print(f"\n整页重跑（AppTest，{args.reruns} 次，每次改变视频时长并重新计算碳足迹）：")
+    for name in charts.BACKENDS:
+        print(f"{name:<12}{bench_page(name, args.reruns):>14.2f} ms CPU/次")
+
+
+if __name__ == "__main__":
+    main()
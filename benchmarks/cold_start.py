@@ -0,0 +1,125 @@
+# ==================== 冷启动基准 ====================
+# 用法：python benchmarks/cold_start.py [--runs 3] [--port 8597] [--target-ms 1000] [--page WebPage.py]
+#
+# 每轮都启动全新的进程，测量：
+#   1. 导入耗时：新解释器导入 streamlit 与页面顶部导入的全部模块（由 WebPage.py 的 import 语句解析），
+#      并检查 matplotlib 是否被提前导入
+#   2. 真实服务器：`streamlit run` 启动到健康检查就绪的耗时；随后第一个浏览器会话（WebSocket）
+#      从发送运行请求到收到第一个页面元素（首次绘制）与脚本运行结束（整页就绪）的耗时。
+#      页面模块在第一次运行脚本时才导入，因此这两项包含导入开销。
+# 取各轮中位数；整页就绪耗时超过 --target-ms 时以非零状态退出，便于在部署流程中跟踪。
+import argparse
+import ast
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from rerun_cpu import PAGE, Session, start_server  # noqa: E402
+
+FIRST_PAINT_TARGET_MS = 1000  # 冷启动后第一个会话整页就绪的目标耗时
+
+IMPORT_SCRIPT = """
+import sys, time
+start = time.perf_counter()
+for name in sys.argv[1:]:
+    __import__(name)
+print((time.perf_counter() - start) * 1000, "matplotlib" in sys.modules)
+"""
+
+
+def page_imports(page=PAGE):
+    """页面顶部导入的模块名"""
+    with open(page, encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    names = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            names.extend(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module:
+            names.append(node.module)
+    return names
+
+
+def import_time(page=PAGE):
+    """新解释器中导入页面依赖的耗时（ms）与是否导入了 matplotlib"""
+    out = subprocess.run([sys.executable, "-c", IMPORT_SCRIPT, *page_imports(page)],
+                         cwd=os.path.dirname(page), capture_output=True, text=True, check=True)
+    ms, matplotlib = out.stdout.split()
+    return float(ms), matplotlib == "True"
+
+
+async def first_session(url):
+    """第一个会话：(首个页面元素耗时, 脚本运行结束耗时)，单位秒"""
+    async with Session(url) as session:
+        msg = BackMsg()
+        msg.rerun_script.query_string = ""
+        msg.rerun_script.page_script_hash = ""
+        start = time.perf_counter()
+        await session.ws.send(msg.SerializeToString())
+        first_delta = None
+        while True:
+            fwd = ForwardMsg()
+            fwd.ParseFromString(await session.ws.recv())
+            kind = fwd.WhichOneof("type")
+            if kind == "delta" and first_delta is None:
+                first_delta = time.perf_counter() - start
+            elif kind == "script_finished":
+                return first_delta, time.perf_counter() - start
+
+
+def cold_server(port, page=PAGE):
+    """启动全新服务器：(启动就绪耗时, 首次绘制耗时, 整页就绪耗时)，单位 ms"""
+    env = dict(os.environ, ICT_HISTORY_DB="")  # 不向历史库写入
+    start = time.perf_counter()
+    server = start_server(port, page, env)
+    ready = time.perf_counter() - start
+    try:
+        first_paint, complete = asyncio.run(first_session(f"ws://localhost:{port}/_stcore/stream"))
+    finally:
+        server.terminate()
+        server.wait()
+    return ready * 1000, first_paint * 1000, complete * 1000
+
+
+def measure(runs, port, page=PAGE):
+    """各项指标的中位数"""
+    imports = [import_time(page) for _ in range(runs)]
+    servers = [cold_server(port, page) for _ in range(runs)]
+    return {
+        "import_ms": statistics.median(ms for ms, _ in imports),
+        "matplotlib_imported": any(m for _, m in imports),
+        "server_ready_ms": statistics.median(s[0] for s in servers),
+        "first_paint_ms": statistics.median(s[1] for s in servers),
+        "page_complete_ms": statistics.median(s[2] for s in servers),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="冷启动基准：导入耗时与首次绘制耗时")
+    parser.add_argument("--runs", type=int, default=3, help="冷启动轮数（取中位数）")
+    parser.add_argument("--port", type=int, default=8597)
+    parser.add_argument("--target-ms", type=float, default=FIRST_PAINT_TARGET_MS, help="整页就绪的目标耗时")
+    parser.add_argument("--page", default=PAGE, help="被测页面（默认本仓库的 WebPage.py）")
+    args = parser.parse_args(argv)
+
+    result = measure(args.runs, args.port, os.path.abspath(args.page))
+    print(f"导入页面依赖：{result['import_ms']:.0f} ms"
+          f"（matplotlib {'已' if result['matplotlib_imported'] else '未'}导入）")
+    print(f"服务器启动就绪：{result['server_ready_ms']:.0f} ms")
+    print(f"第一个会话：首次绘制 {result['first_paint_ms']:.0f} ms，整页就绪 {result['page_complete_ms']:.0f} ms"
+          f"（目标 {args.target_ms:.0f} ms）")
+    if result["page_complete_ms"] > args.target_ms:
+        print("整页就绪耗时超过目标", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+# ==================== 依赖图基准 ====================
+# 用法：python benchmarks/dependency_graph.py [--repeat 2000]
+#
+# 模拟页面重跑：每次只移动一个输入（或不变），读取全部节点（与页面一样），
+# 统计重新计算与跳过的节点数，并与每次重建依赖图（相当于原先自上而下全部重算）比较耗时。
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import graph  # noqa: E402
+
+# (说明, 输入名, 两个交替的取值)
+MOVES = [
+    ("不变（重跑）", None, None),
+    ("每天视频小时数", "video", (2.0, 2.5)),
+    ("每周会议小时数", "meetings", (3.0, 3.5)),
+    ("替代距离", "km", (1000, 1100)),
+    ("单次旅行距离", "trip_km", (750, 1500)),
+    ("视频质量", "video_quality", (1, 2)),
+    ("地区", "region", (2, 3)),
+    ("绿电比例滑块", "green_power_ratio", (50, 60)),
+    ("目标使用年限", "target_phone_years", (3, 4)),
+]
+
+
+def read_all(calc):
+    for name, _, _ in calc.stats():
+        calc.get(name)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="依赖图基准：移动单个输入时重新计算的节点数与耗时")
+    parser.add_argument("--repeat", type=int, default=2000, help="每种输入的重跑次数")
+    args = parser.parse_args(argv)
+
+    calc = graph.build()
+    read_all(calc)
+    nodes = len(calc.stats())
+    print(f"{nodes} 个计算节点")
+    print(f"{'移动的输入':<14}{'重新计算':>10}{'跳过':>8}{'依赖图 (µs)':>14}{'全部重算 (µs)':>16}")
+    for label, name, values in MOVES:
+        computed = sum(calc.computed.values())
+        skipped = sum(calc.skipped.values())
+        start = time.perf_counter()
+        for i in range(args.repeat):
+            if name is not None:
+                calc.set(name, values[i % 2])
+            read_all(calc)
+        incremental = (time.perf_counter() - start) / args.repeat * 1e6
+        computed = (sum(calc.computed.values()) - computed) / args.repeat
+        skipped = (sum(calc.skipped.values()) - skipped) / args.repeat
+
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            read_all(graph.build())
+        full = (time.perf_counter() - start) / args.repeat * 1e6
+        print(f"{label:<14}{computed:>10.1f}{skipped:>8.1f}{incremental:>14.1f}{full:>16.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+# ==================== 设备清单基准 ====================
+# 用法：python benchmarks/device_inventory.py [--devices 10000000] [--owners 1000000] [--repeat 20]
+#
+# 随机生成设备清单（类型、地区、归属均匀抽样，其余参数取该类型的典型值），报告：
+#   1. 内存占用：结构数组（每台 22 字节）与 同样数据存为每台一个 Python 对象 的估计
+#   2. 汇总耗时：每种分组首次汇总（整列累加部分和）与之后任意电力碳强度下的汇总
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import factors  # noqa: E402
+import inventory  # noqa: E402
+
+
+class _Device:
+    __slots__ = tuple(inventory.DTYPES)
+
+
+def object_bytes(sample=1000):
+    """每台设备一个 Python 对象（带 __slots__，各字段为 int/float 对象）的平均字节数"""
+    devices = []
+    for i in range(sample):
+        device = _Device()
+        device.device_type, device.region, device.owner = i % 5, i % 7, i
+        device.embodied_carbon, device.lifetime_years = 300.0 + i, 4.0 + i
+        device.power_w, device.hours_per_day = 30.0 + i, 8.0 + i
+        devices.append(device)
+    # 类型、地区为小整数（解释器共享，不计）；列表中每台设备另有一个指针
+    fields = sum(sys.getsizeof(getattr(d, name)) for d in devices
+                 for name in ("owner", *inventory.SPEC_COLUMNS))
+    return (sum(sys.getsizeof(d) for d in devices) + fields) / sample + 8
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="设备清单基准：内存占用与汇总耗时")
+    parser.add_argument("--devices", type=int, default=10_000_000, help="设备台数")
+    parser.add_argument("--owners", type=int, default=1_000_000, help="家庭/部门数")
+    parser.add_argument("--repeat", type=int, default=20, help="缓存部分和后的汇总重复次数")
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(0)
+    regions = len(factors.get().regions)
+    start = time.perf_counter()
+    devices = inventory.from_types(
+        rng.integers(len(inventory.DEVICE_TYPES), size=args.devices, dtype=np.uint8),
+        rng.integers(regions, size=args.devices, dtype=np.uint8),
+        rng.integers(args.owners, size=args.devices, dtype=np.uint32),
+    )
+    print(f"{args.devices:,} 台设备，{args.owners:,} 个归属，生成清单 {time.perf_counter() - start:.2f} s")
+    print(f"结构数组：{devices.nbytes / 1e6:.0f} MB（{devices.nbytes / len(devices):.0f} 字节/台）；"
+          f"每台一个 Python 对象约 {object_bytes() * len(devices) / 1e6:.0f} MB")
+
+    # 之后的汇总换用不同的电力碳强度（如调整电网情景），部分和不必重算
+    carbon = [None] + [rng.uniform(0.1, 0.9, regions) for _ in range(args.repeat - 1)]
+    print(f"{'分组':<14}{'首次 (ms)':>12}{'之后 (ms)':>12}{'合计 (t CO₂/年)':>18}")
+    for by in (None, *inventory.GROUPS):
+        start = time.perf_counter()
+        result = devices.summary(by)
+        first = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        for electricity_carbon in carbon:
+            devices.summary(by, electricity_carbon)
+        cached = (time.perf_counter() - start) / len(carbon) * 1000
+        total = np.sum(result["total"]) / 1000
+        print(f"{by or '合计':<14}{first:>12.1f}{cached:>12.2f}{total:>18,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+# ==================== 排放因子准备开销基准 ====================
+# 用法：python benchmarks/factor_setup.py [--reruns 100000]
+#
+# 对比每次页面重跑时“准备排放因子并推导派生参数”的开销：
+#   - 旧方式：在侧边栏中重建各字面量字典，再逐项查字典计算（与改造前的 WebPage.py 相同）
+#   - 新方式：从进程内共享的因子注册表取因子表，再到情景立方体中查表
+# 同时给出每个进程只发生一次的开销（解析因子文件、打开立方体）。
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import factors  # noqa: E402
+import scenarios  # noqa: E402
+
+
+def legacy_setup():
+    """改造前侧边栏每次重跑执行的因子准备与推导"""
+    phone_carbon_map = {"苹果 iPhone": 75, "三星 Galaxy": 68, "华为": 65, "小米": 55,
+                        "OPPO/VIVO": 52, "其他品牌": 58}
+    estimated_phone_carbon = phone_carbon_map["苹果 iPhone"]
+    platform_factor = {"YouTube/Netflix": 1.0, "哔哩哔哩/爱奇艺": 1.1, "抖音/快手": 0.6,
+                       "视频会议(Teams/Zoom)": 0.4}
+    quality_factor = {"480p（标清）": 0.15, "720p（高清）": 0.4, "1080p（全高清）": 1.0,
+                      "4K（超高清）": 2.5}
+    video_intensity = 0.055 * platform_factor["YouTube/Netflix"] * quality_factor["720p（高清）"]
+    meeting_factor = {"音频优先": 0.2, "平衡模式": 0.5, "高清视频": 0.8}
+    meeting_intensity = 0.022 * meeting_factor["平衡模式"]
+    distances = ["短途 (<500km)", "中途 (500-1000km)", "长途 (1000-3000km)", "国际 (>3000km)"]
+    travel_factor_map = {
+        "国内航班": dict(zip(distances, [0.275, 0.195, 0.170, 0.155])),
+        "国际航班": dict(zip(distances, [0.25, 0.18, 0.155, 0.142])),
+        "高铁": dict(zip(distances, [0.027, 0.025, 0.024, 0.024])),
+        "自驾车": dict(zip(distances, [0.185, 0.175, 0.165, 0.165])),
+        "公共交通": dict(zip(distances, [0.032, 0.030, 0.028, 0.026])),
+    }
+    distance_map = dict(zip(distances, [300, 750, 2000, 5000]))
+    flight_factor = travel_factor_map["国内航班"]["中途 (500-1000km)"]
+    typical_distance = distance_map["中途 (500-1000km)"]
+    region_factor = {"欧洲（高绿电）": 0.23, "美国（中等）": 0.37, "中国（中等偏上）": 0.52,
+                     "印度（高煤电）": 0.72, "其他": 0.45}
+    electricity_carbon = region_factor["中国（中等偏上）"]
+    return (estimated_phone_carbon, video_intensity, meeting_intensity, flight_factor,
+            typical_distance, electricity_carbon)
+
+
+def registry_setup(cube):
+    """改造后：注册表取因子表 + 立方体查表"""
+    table = factors.get()
+    codes = (table.phone_brands.index("苹果 iPhone"), table.video_platforms.index("YouTube/Netflix"),
+             table.video_qualities.index("720p（高清）"), table.meeting_qualities.index("平衡模式"),
+             table.travel_types.index("国内航班"), table.travel_distances.index("中途 (500-1000km)"),
+             table.regions.index("中国（中等偏上）"))
+    return scenarios.lookup(cube, *codes, green_data_center=False)
+
+
+def per_call_us(func, reruns, *args):
+    start = time.perf_counter()
+    for _ in range(reruns):
+        func(*args)
+    return (time.perf_counter() - start) / reruns * 1e6
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="排放因子准备开销基准")
+    parser.add_argument("--reruns", type=int, default=100_000, help="模拟重跑次数")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    table = factors.load()
+    parse_ms = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    cube = scenarios.load_cube(table=factors.get())
+    cube_ms = (time.perf_counter() - start) * 1000
+
+    legacy = per_call_us(legacy_setup, args.reruns)
+    registry = per_call_us(registry_setup, args.reruns, cube)
+
+    print(f"因子版本 {table.version}")
+    print(f"每进程一次：解析因子文件 {parse_ms:.2f} ms，打开情景立方体 {cube_ms:.2f} ms")
+    print(f"每次重跑：旧方式（重建字典） {legacy:.2f} µs")
+    print(f"每次重跑：新方式（注册表 + 立方体查表） {registry:.2f} µs")
+    print(f"每次重跑节省 {(1 - registry / legacy) * 100:.0f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+# ==================== 计算历史库基准 ====================
+# 用法：python benchmarks/history_store.py [--rows 1000000] [--users 1000] [--days 730] [--path /tmp/h.sqlite]
+#
+# 在临时数据库中生成 --rows 条计算记录（--users 个用户，分布在最近 --days 天），然后计时：
+#   - 批量写入速率（write_batch，每批 BATCH_SIZE 条，一个事务）
+#   - 页面写入路径：record() 入队耗时，以及后台线程写完一万条的耗时
+#   - 记录最多的用户的趋势查询（日/周/月）、首页与第100页明细（键集分页）、记录总数
+# 可用 --rows 20000000 等验证查询耗时与总行数无关。
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import history  # noqa: E402
+
+INPUTS = json.dumps({"video": 2.0, "meetings": 3.0, "phone_years": 2, "phone_brand": "苹果 iPhone"},
+                    ensure_ascii=False)
+FACTORS = json.dumps({"video_intensity": 0.022, "meeting_intensity": 0.011, "estimated_phone_carbon": 75})
+
+
+def populate(store, rows, users, days, seed=0):
+    """按时间顺序生成记录并批量写入，返回 (耗时, 记录最多的用户)"""
+    rng = np.random.default_rng(seed)
+    # 用户活跃度呈长尾分布
+    weights = 1 / np.arange(1, users + 1)
+    weights /= weights.sum()
+    conn = history.connect(store.path)
+    now = time.time()
+    start = time.perf_counter()
+    chunk = 100_000
+    for offset in range(0, rows, chunk):
+        n = min(chunk, rows - offset)
+        created = np.sort(now - days * 86400 * (1 - (offset + np.arange(n)) / rows))
+        user = rng.choice(users, n, p=weights)
+        footprint = rng.random(n) < 0.7
+        value = np.where(footprint, rng.normal(55, 10, n), rng.normal(190, 40, n))
+        records = [(f"user{u}", float(c), "footprint" if f else "saving", "2023.1", INPUTS, FACTORS,
+                    json.dumps({"total" if f else "saving": round(float(v), 3)}), float(v))
+                   for u, c, f, v in zip(user.tolist(), created.tolist(), footprint.tolist(), value.tolist())]
+        for i in range(0, n, store.batch_size):
+            history.write_batch(conn, records[i:i + store.batch_size])
+    conn.close()
+    return time.perf_counter() - start, "user0"
+
+
+def best_of(repeat, func):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000, result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="计算历史库基准：写入速率与趋势/分页查询耗时")
+    parser.add_argument("--rows", type=int, default=1_000_000, help="生成的记录数")
+    parser.add_argument("--users", type=int, default=1000, help="用户数")
+    parser.add_argument("--days", type=int, default=730, help="记录分布的天数")
+    parser.add_argument("--path", default=None, help="数据库路径（默认临时目录，结束后删除）")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = history.HistoryStore(args.path or os.path.join(tmp, "history.sqlite"))
+        elapsed, user = populate(store, args.rows, args.users, args.days)
+        print(f"批量写入 {args.rows} 条：{elapsed:.1f} s（{args.rows / elapsed:,.0f} 条/s）")
+
+        outputs = {"video_carbon": 16.06, "meeting_carbon": 1.716, "phone_carbon": 37.5, "total": 55.276}
+        start = time.perf_counter()
+        for _ in range(10_000):
+            store.record("bench", "footprint", {"video": 2.0}, {}, outputs, "2023.1")
+        enqueue = (time.perf_counter() - start) / 10_000 * 1e6
+        store.flush()
+        print(f"页面写入路径：record() {enqueue:.1f} µs/次，后台写完 1 万条 "
+              f"{(time.perf_counter() - start) * 1000:.0f} ms")
+
+        total = store.count(user)
+        print(f"\n记录最多的用户（{user}，{total} 条）的查询耗时（ms，5 次取最快）：")
+        for bucket in history.BUCKETS:
+            ms, trend = best_of(5, lambda: store.trend(user, "footprint", bucket))
+            print(f"  趋势（{bucket}，{len(trend)} 个周期）{ms:>10.2f}")
+        ms, _ = best_of(5, lambda: store.page(user, 20))
+        print(f"  明细首页{ms:>22.2f}")
+        cursor = None
+        for _ in range(99):
+            page = store.page(user, 20, cursor)
+            cursor = (page[-1]["created_at"], page[-1]["id"])
+        ms, _ = best_of(5, lambda: store.page(user, 20, cursor))
+        print(f"  明细第100页{ms:>20.2f}")
+        ms, _ = best_of(5, lambda: store.count(user))
+        print(f"  记录总数{ms:>22.2f}")
+
+
+if __name__ == "__main__":
+    main()
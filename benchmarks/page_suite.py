@@ -0,0 +1,212 @@
+# ==================== 页面基准测试套件 ====================
+# 用法：python benchmarks/page_suite.py [--rounds 5] [--cold-runs 3] [--tolerance 0.5] [--update-baseline]
+#
+# 四组基准，结果与 benchmarks/baselines.json 中保存的基准值比较，任一指标退化超过容差即以非零状态退出：
+#   1. 页面交互：通过 Streamlit 的 AppTest 无界面运行 WebPage.py，按真实操作顺序切换手机品牌、
+#      视频质量、地区，点击“计算我的碳足迹”“计算减排潜力”，移动自定义调整选项卡的滑块，
+#      记录每次重跑延迟的分位数与进程峰值内存。AppTest 的每次 run() 都是整页重跑（不区分片段）。
+#   2. 图表渲染：各图表构建并光栅化为PNG的耗时（绕过页面缓存直接调用 charts）
+#   3. 计算路径：fp.evaluate_profiles 在 1、1千、100万个画像上的耗时
+#   4. 冷启动：新进程导入页面依赖的耗时，以及全新服务器上第一个会话的首次绘制与整页就绪耗时（见 cold_start.py）
+# 基准值与机器有关：更换运行环境或有意改变性能时，用 --update-baseline 重新记录。
+import argparse
+import json
+import os
+import resource
+import sys
+import time
+
+import numpy as np
+from streamlit.testing.v1 import AppTest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import charts  # noqa: E402
+import cold_start  # noqa: E402
+import factors  # noqa: E402
+import footprint as fp  # noqa: E402
+import sensitivity  # noqa: E402
+import sweeps  # noqa: E402
+
+PAGE = os.path.join(ROOT, "WebPage.py")
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines.json")
+MEMORY_TOLERANCE = 0.25  # 内存指标的容差（比例），比耗时更稳定
+
+
+def percentile(values, q):
+    return float(np.percentile(values, q))
+
+
+def peak_rss_mb():
+    """进程峰值常驻内存（MB）"""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+# ==================== 1. 页面交互 ====================
+def interaction_steps(round_index):
+    """一轮真实操作序列：(名称, 对 AppTest 的操作)"""
+    table = factors.get()
+    brands, qualities, regions = table.phone_brands, table.video_qualities, table.regions
+    i = round_index
+    return [
+        ("phone_brand", lambda at: _by_label(at.selectbox, "手机品牌").set_value(brands[i % len(brands)])),
+        ("video_quality", lambda at: _by_label(at.radio, "常用视频质量").set_value(qualities[i % len(qualities)])),
+        ("region", lambda at: _by_label(at.selectbox, "您所在地区").set_value(regions[i % len(regions)])),
+        ("calculate_footprint", lambda at: _by_label(at.button, "计算我的碳足迹").click()),
+        ("calculate_saving", lambda at: _by_label(at.button, "计算减排潜力").click()),
+        ("video_adjustment", lambda at: at.slider(key="video_adjustment").set_value((i % 5) * 10 - 20)),
+        ("phone_adjustment", lambda at: at.slider(key="phone_adjustment").set_value((i % 5) * 10 - 20)),
+        ("flight_adjustment", lambda at: at.slider(key="flight_adjustment").set_value((i % 5) * 10 - 20)),
+    ]
+
+
+def _by_label(widgets, label):
+    return next(w for w in widgets if w.label == label)
+
+
+def bench_interactions(rounds):
+    at = AppTest.from_file(PAGE, default_timeout=120)
+    at.run()  # 首次运行：导入、打开立方体、填充缓存，不计入
+    latencies = []
+    for r in range(rounds):
+        for _, action in interaction_steps(r):
+            action(at)
+            start = time.perf_counter()
+            at.run()
+            latencies.append(time.perf_counter() - start)
+            if at.exception:
+                raise RuntimeError(at.exception[0].value)
+    return {
+        "rerun_p50_ms": percentile(latencies, 50) * 1000,
+        "rerun_p95_ms": percentile(latencies, 95) * 1000,
+        "rerun_max_ms": max(latencies) * 1000,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+# ==================== 2. 图表渲染 ====================
+def best_ms(func, repeats):
+    """多次运行取最小值（受干扰最小的一次）"""
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times) * 1000
+
+
+def bench_figures(repeats=5):
+    rng = np.random.default_rng(0)
+    counts = tuple(rng.integers(0, 50_000, 50).tolist())
+    edges = tuple(np.linspace(40, 70, 51).tolist())
+    hours = tuple(np.linspace(0.3, 0.6, 24).tolist())
+    usage = tuple((np.arange(24) % 3 / 10).tolist())
+    return {
+        "figure_comparison_ms": best_ms(lambda: charts.comparison_png(55.3, 193.3), repeats),
+        "figure_sensitivity_ms": best_ms(lambda: charts.sensitivity_png(
+            tuple(sensitivity.PARAM_NAMES), tuple(range(80, 0, -10)),
+            ("视频流媒体", "视频会议", "手机生产"), (50.0, 30.0, 20.0)), repeats),
+        "figure_uncertainty_ms": best_ms(lambda: charts.uncertainty_png(counts, edges, counts, edges), repeats),
+        "figure_grid_profile_ms": best_ms(lambda: charts.grid_profile_png(hours, usage, usage), repeats),
+        "figure_sweep_ms": best_ms(lambda: charts.sweep_png(
+            sweeps.COMPRESSION, sweeps.GREEN_POWER, sweeps.technology_grid(10.0, 5.0), (20, 50),
+            "x", "y", "title"), repeats),
+    }
+
+
+# ==================== 3. 计算路径 ====================
+def random_profiles(n, seed=0):
+    rng = np.random.default_rng(seed)
+    table = factors.get()
+    return dict(
+        video=rng.uniform(0, 12, n), meetings=rng.uniform(0, 10, n),
+        phone_years=rng.integers(1, 6, n), km=rng.uniform(100, 5000, n),
+        phone_brand=rng.integers(0, len(table.phone_brands), n),
+        video_platform=rng.integers(0, len(table.video_platforms), n),
+        video_quality=rng.integers(0, len(table.video_qualities), n),
+        meeting_quality=rng.integers(0, len(table.meeting_qualities), n),
+        travel_type=rng.integers(0, len(table.travel_types), n),
+        travel_distance=rng.integers(0, len(table.travel_distances), n),
+        region=rng.integers(0, len(table.regions), n),
+    )
+
+
+def bench_calculations():
+    result = {}
+    for n, label, repeats in ((1, "1", 2000), (1000, "1k", 500), (1_000_000, "1m", 5)):
+        profiles = random_profiles(n)
+        if n == 1:
+            profiles = {k: v[0].item() for k, v in profiles.items()}  # 标量路径（页面单个用户）
+        result[f"calc_{label}_ms"] = best_ms(lambda: fp.evaluate_profiles(**profiles), repeats)
+    return result
+
+
+# ==================== 4. 冷启动 ====================
+COLD_START_PORT = 8596
+
+
+def bench_cold_start(runs):
+    result = cold_start.measure(runs, COLD_START_PORT)
+    return {
+        "cold_import_ms": result["import_ms"],
+        "cold_first_paint_ms": result["first_paint_ms"],
+        "cold_page_complete_ms": result["page_complete_ms"],
+    }
+
+
+# ==================== 基准比较 ====================
+def compare(results, baselines, tolerance):
+    """返回退化的指标列表 [(名称, 当前值, 基准值, 允许上限)]"""
+    regressions = []
+    for name, value in results.items():
+        if name not in baselines:
+            continue
+        allowed = baselines[name] * (1 + (MEMORY_TOLERANCE if name.endswith("_mb") else tolerance))
+        if value > allowed:
+            regressions.append((name, value, baselines[name], allowed))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="页面基准测试套件")
+    parser.add_argument("--rounds", type=int, default=5, help="交互序列轮数（每轮8次重跑）")
+    parser.add_argument("--cold-runs", type=int, default=3, help="冷启动轮数（取中位数）")
+    parser.add_argument("--tolerance", type=float, default=0.5,
+                        help="耗时指标允许的退化比例（默认0.5，即不超过基准的1.5倍）")
+    parser.add_argument("--baseline", default=BASELINE_FILE, help="基准值文件")
+    parser.add_argument("--update-baseline", action="store_true", help="把本次结果写为新的基准值")
+    args = parser.parse_args(argv)
+
+    results = {}
+    results.update(bench_calculations())
+    results.update(bench_figures())
+    results.update(bench_interactions(args.rounds))
+    results.update(bench_cold_start(args.cold_runs))
+
+    baselines = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as f:
+            baselines = json.load(f)
+
+    print(f"{'指标':<26}{'本次':>12}{'基准':>12}")
+    for name, value in results.items():
+        base = f"{baselines[name]:.3f}" if name in baselines else "-"
+        print(f"{name:<26}{value:>12.3f}{base:>12}")
+
+    if args.update_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump({k: round(v, 3) for k, v in results.items()}, f, indent=2)
+            f.write("\n")
+        print(f"已更新基准值 -> {args.baseline}")
+        return 0
+
+    regressions = compare(results, baselines, args.tolerance)
+    for name, value, base, allowed in regressions:
+        print(f"退化：{name} = {value:.3f}，基准 {base:.3f}，上限 {allowed:.3f}", file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
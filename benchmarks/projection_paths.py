@@ -0,0 +1,47 @@
+# ==================== 多年预测基准 ====================
+# 用法：python benchmarks/projection_paths.py [--paths 1000 10000 100000] [--repeat 5]
+#
+# 以页面默认输入，对不同数量的抽样路径计时 projection.project（2025-2050 × 全部地区），
+# 并单独列出设备更替队列（对年份循环）的耗时。目标：数千条路径远低于1秒。
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import factors  # noqa: E402
+import projection  # noqa: E402
+
+# 页面默认输入：每天视频2小时、每周会议3小时、替代1000公里，iPhone，720p，平衡模式，国内航班中途
+DEFAULT_INPUTS = (2.0, 3.0, 1000, 75, 0.022, 0.011, 0.195, factors.get().video_qualities.index("720p（高清）"))
+
+
+def best_of(repeat, func):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="多年预测基准：路径数与计算耗时")
+    parser.add_argument("--paths", type=int, nargs="+", default=[1000, 10_000, 100_000], help="路径数")
+    parser.add_argument("--repeat", type=int, default=5, help="重复次数（取最快一次）")
+    args = parser.parse_args(argv)
+
+    print(f"{len(projection.YEARS)} 年 × {len(factors.get().regions)} 个地区")
+    print(f"{'路径数':>10}{'设备队列 (ms)':>16}{'完整预测 (ms)':>16}{'µs/路径':>10}")
+    for n in args.paths:
+        pathways = projection.sample_pathways(n, 2)
+        lifetime = projection.lifetimes(pathways["current_years"], pathways["target_years"],
+                                        pathways["transition_years"])
+        cohorts = best_of(args.repeat, lambda: projection.device_cohorts(lifetime))
+        full = best_of(args.repeat, lambda: projection.project(*DEFAULT_INPUTS, **pathways))
+        print(f"{n:>10}{cohorts:>16.1f}{full:>16.1f}{full / n * 1000:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+# ==================== 批量报告基准 ====================
+# 用法：python benchmarks/report_throughput.py [--profiles 2000] [--workers 1 4] [--format png] [--single 100]
+#
+# 随机生成员工画像（数字习惯按常见取值取整，侧边栏选项均匀抽样），计时：
+#   1. 单进程逐份渲染：每份报告新建图形 与 复用同一图形（reports.render_report），敏感性结果已缓存
+#   2. reports.run 在不同进程数下的整体吞吐：报告/秒 与 报告/秒/核
+# 各进程互不共享状态，吞吐按核数近似线性扩展：5万份报告所需时间 ≈ 50000 / (报告/秒/核 × 核数)。
+import argparse
+import csv
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import factors  # noqa: E402
+import reports  # noqa: E402
+
+
+def write_profiles(path, n, seed=0):
+    rng = np.random.default_rng(seed)
+    table = factors.get()
+    options = {
+        "phone_brand": table.phone_brands,
+        "video_platform": table.video_platforms,
+        "video_quality": table.video_qualities,
+        "meeting_quality": table.meeting_qualities,
+        "travel_type": table.travel_types,
+        "travel_distance": table.travel_distances,
+        "region": table.regions,
+    }
+    columns = {
+        "employee_id": [f"E{i:06d}" for i in range(n)],
+        "video": rng.choice(np.arange(0, 8.5, 0.5), n).tolist(),
+        "meetings": rng.choice(np.arange(0, 20.5, 0.5), n).tolist(),
+        "phone_years": rng.integers(1, 6, n).tolist(),
+        "km": (rng.integers(0, 51, n) * 100).tolist(),
+        **{name: [labels[i] for i in rng.integers(len(labels), size=n)] for name, labels in options.items()},
+    }
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(list(columns))
+        writer.writerows(zip(*columns.values()))
+
+
+def single_process(path, output_dir, fmt, n):
+    """单进程逐份渲染耗时（ms/份）：(每份新建图形, 复用图形)"""
+    with open(path, newline="", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        rows = [next(reader) for _ in range(n)]
+    os.makedirs(output_dir, exist_ok=True)
+    reports.process_chunk(header, rows, 1, output_dir, fmt)  # 预热：敏感性缓存、字体缓存
+
+    timings = []
+    for fresh in (True, False):
+        start = time.perf_counter()
+        for i in range(n):
+            if fresh:
+                reports._canvas = None
+            reports.process_chunk(header, rows[i:i + 1], i + 1, output_dir, fmt)
+        timings.append((time.perf_counter() - start) / n * 1000)
+    return timings
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="批量报告基准：单份渲染耗时与多进程吞吐")
+    parser.add_argument("--profiles", type=int, default=2000, help="员工画像数")
+    parser.add_argument("--workers", type=int, nargs="+", default=sorted({1, os.cpu_count() or 1}), help="进程数")
+    parser.add_argument("--format", choices=reports.FORMATS, default="png")
+    parser.add_argument("--single", type=int, default=100, help="单进程对比的报告数")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "profiles.csv")
+        write_profiles(path, args.profiles)
+        with open(path, newline="", encoding="utf-8") as f:
+            reader = csv.reader(f)
+            header = next(reader)
+            habits = {tuple(row[header.index(name)] for name in ("video", "meetings", "phone_years"))
+                      for row in reader}
+        print(f"{args.profiles} 个画像，{len(habits)} 种不同的数字习惯（敏感性分析次数），格式 {args.format}")
+
+        fresh, reused = single_process(path, os.path.join(tmp, "single"), args.format, args.single)
+        print(f"单进程渲染：每份新建图形 {fresh:.1f} ms/份，复用图形 {reused:.1f} ms/份")
+
+        print(f"{'进程数':>8}{'耗时 (s)':>12}{'报告/秒':>12}{'报告/秒/核':>14}")
+        for workers in args.workers:
+            output_dir = os.path.join(tmp, f"run{workers}")
+            start = time.perf_counter()
+            count = reports.run(path, output_dir, args.format, workers=workers)
+            elapsed = time.perf_counter() - start
+            print(f"{workers:>8}{elapsed:>12.1f}{count / elapsed:>12.1f}{count / elapsed / workers:>14.1f}")
+        print("（整体吞吐含进程启动与各进程的敏感性分析）")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+# ==================== 交互重跑的服务器CPU开销 ====================
+# 用法：python benchmarks/rerun_cpu.py [--sessions 4] [--rounds 20] [--port 8599]
+#
+# 启动一个真实的 `streamlit run WebPage.py` 服务器，用多个并发的 WebSocket 会话模拟浏览器：
+# 先点击两个计算按钮，然后反复移动情景选项卡中的滑块（绿电比例、设备利用率、旅行排放因子调整）。
+# 每次交互都按浏览器的方式发送重跑请求：控件位于 st.fragment 内时只请求重跑该片段。
+# 统计服务器进程在交互阶段消耗的CPU时间（/proc/<pid>/stat），以及每次交互的平均往返延迟。
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+
+import websockets
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PAGE = os.path.join(ROOT, "WebPage.py")
+
+BUTTONS = ["计算我的碳足迹", "计算减排潜力"]
+# (控件键或标签, 依次设置的取值)
+SLIDERS = [
+    ("green_power_ratio", [30, 70]),
+    ("设备利用率提升 (%)", [20, 80]),
+    ("flight_adjustment", [-20, 20]),
+]
+
+
+def server_cpu_seconds(pid):
+    """进程累计CPU时间（用户态 + 内核态，秒）"""
+    with open(f"/proc/{pid}/stat") as f:
+        fields = f.read().rsplit(")", 1)[1].split()
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+
+def start_server(port, page=PAGE, env=None):
+    """启动 streamlit 服务器并等待其就绪"""
+    server = subprocess.Popen(
+        [sys.executable, "-m", "streamlit", "run", page, "--server.headless", "true",
+         "--server.port", str(port), "--browser.gatherUsageStats", "false"],
+        cwd=os.path.dirname(page), env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    for _ in range(100):
+        try:
+            urllib.request.urlopen(f"http://localhost:{port}/_stcore/health", timeout=1)
+            break
+        except OSError:
+            time.sleep(0.2)
+    return server
+
+
+class Session:
+    """一个模拟的浏览器会话"""
+
+    def __init__(self, url):
+        self.url = url
+        self.widgets = {}  # 标签或键 -> (控件ID, 所在片段ID)
+
+    async def __aenter__(self):
+        self.ws = await websockets.connect(self.url, subprotocols=["streamlit"], max_size=None)
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.ws.close()
+
+    async def rerun(self, widget=None, value=None, trigger=False):
+        """发送一次重跑请求并等待脚本运行结束，返回往返耗时（秒）"""
+        msg = BackMsg()
+        msg.rerun_script.query_string = ""
+        msg.rerun_script.page_script_hash = ""
+        if widget is not None:
+            widget_id, fragment_id = self.widgets[widget]
+            state = msg.rerun_script.widget_states.widgets.add(id=widget_id)
+            if trigger:
+                state.trigger_value = True
+            else:
+                state.double_array_value.data.append(value)
+            if fragment_id:
+                msg.rerun_script.fragment_id = fragment_id
+        start = time.perf_counter()
+        await self.ws.send(msg.SerializeToString())
+        await self._wait_finished()
+        return time.perf_counter() - start
+
+    async def _wait_finished(self):
+        while True:
+            fwd = ForwardMsg()
+            fwd.ParseFromString(await self.ws.recv())
+            kind = fwd.WhichOneof("type")
+            if kind == "delta":
+                self._register(fwd.delta)
+            elif kind == "script_finished":
+                return
+
+    def _register(self, delta):
+        if delta.WhichOneof("type") != "new_element":
+            return
+        element = delta.new_element
+        kind = element.WhichOneof("type")
+        if kind not in ("slider", "button"):
+            return
+        proto = getattr(element, kind)
+        for name in BUTTONS + [name for name, _ in SLIDERS]:
+            if name == proto.label or name in proto.id:
+                self.widgets[name] = (proto.id, delta.fragment_id)
+
+
+async def run_session(url, rounds):
+    async with Session(url) as session:
+        await session.rerun()
+        for button in BUTTONS:
+            await session.rerun(button, trigger=True)
+        latencies = []
+        for i in range(rounds):
+            for name, values in SLIDERS:
+                latencies.append(await session.rerun(name, values[i % len(values)]))
+        return latencies
+
+
+async def load_test(url, sessions, rounds, pid):
+    # 预热：首个会话完成导入与缓存
+    await run_session(url, 1)
+    cpu_before = server_cpu_seconds(pid)
+    results = await asyncio.gather(*[run_session(url, rounds) for _ in range(sessions)])
+    cpu = server_cpu_seconds(pid) - cpu_before
+    return cpu, [x for latencies in results for x in latencies]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="交互重跑的服务器CPU开销")
+    parser.add_argument("--sessions", type=int, default=4, help="并发会话数")
+    parser.add_argument("--rounds", type=int, default=20, help="每个会话的交互轮数（每轮移动3个滑块）")
+    parser.add_argument("--port", type=int, default=8599)
+    args = parser.parse_args(argv)
+
+    server = start_server(args.port)
+    try:
+        url = f"ws://localhost:{args.port}/_stcore/stream"
+        cpu, latencies = asyncio.run(load_test(url, args.sessions, args.rounds, server.pid))
+    finally:
+        server.terminate()
+        server.wait()
+
+    interactions = len(latencies)
+    print(f"{args.sessions} 个会话 × {args.rounds} 轮 × {len(SLIDERS)} 个滑块 = {interactions} 次交互")
+    print(f"服务器CPU：共 {cpu:.2f} s，每次交互 {cpu / interactions * 1000:.1f} ms")
+    print(f"往返延迟：中位数 {statistics.median(latencies) * 1000:.1f} ms，"
+          f"P95 {sorted(latencies)[int(interactions * 0.95) - 1] * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
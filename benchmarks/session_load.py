@@ -0,0 +1,65 @@
+# ==================== 多会话负载测试 ====================
+# 用法：python benchmarks/session_load.py [--sessions 32] [--reruns 5] [--port 8598] [--page WebPage.py]
+#
+# 启动真实的 streamlit 服务器，大量并发会话停留在默认输入上：每个会话打开页面、点击两个计算按钮，
+# 再重复点击“计算我的碳足迹”若干次（整页重跑）。分别在关闭与开启跨会话结果缓存
+# （ICT_RESULT_CACHE_SIZE=0 / 默认）时运行，比较吞吐量（重跑次数/秒）与服务器CPU时间。
+# --page 可指向其他工作树中的 WebPage.py，用于与改动前的版本对比。
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from rerun_cpu import PAGE, Session, server_cpu_seconds, start_server  # noqa: E402
+
+
+async def run_session(url, reruns):
+    async with Session(url) as session:
+        await session.rerun()
+        await session.rerun("计算我的碳足迹", trigger=True)
+        await session.rerun("计算减排潜力", trigger=True)
+        for _ in range(reruns):
+            await session.rerun("计算我的碳足迹", trigger=True)
+        return reruns + 3
+
+
+async def load_test(url, sessions, reruns, pid):
+    await run_session(url, 1)  # 预热：导入、打开立方体、填充页面缓存
+    cpu_before = server_cpu_seconds(pid)
+    start = time.perf_counter()
+    counts = await asyncio.gather(*[run_session(url, reruns) for _ in range(sessions)])
+    return sum(counts), time.perf_counter() - start, server_cpu_seconds(pid) - cpu_before
+
+
+def run(page, port, sessions, reruns, cache_size):
+    env = dict(os.environ)
+    if cache_size is not None:
+        env["ICT_RESULT_CACHE_SIZE"] = str(cache_size)
+    server = start_server(port, page, env)
+    try:
+        return asyncio.run(load_test(f"ws://localhost:{port}/_stcore/stream", sessions, reruns, server.pid))
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="多会话负载测试：跨会话结果缓存的吞吐量")
+    parser.add_argument("--sessions", type=int, default=32, help="并发会话数")
+    parser.add_argument("--reruns", type=int, default=5, help="每个会话点击计算后的额外重跑次数")
+    parser.add_argument("--port", type=int, default=8598)
+    parser.add_argument("--page", default=PAGE, help="被测页面（默认本仓库的 WebPage.py）")
+    args = parser.parse_args(argv)
+
+    print(f"{args.sessions} 个并发会话，默认输入，每个会话 {args.reruns + 3} 次重跑")
+    print(f"{'结果缓存':<10}{'重跑次数':>10}{'耗时 (s)':>10}{'吞吐 (次/s)':>14}{'CPU (ms/次)':>14}")
+    for label, cache_size in (("关闭", 0), ("开启", None)):
+        count, elapsed, cpu = run(args.page, args.port, args.sessions, args.reruns, cache_size)
+        print(f"{label:<10}{count:>10}{elapsed:>10.2f}{count / elapsed:>14.1f}{cpu / count * 1000:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
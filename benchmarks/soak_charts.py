@@ -0,0 +1,72 @@
+# ==================== 图表渲染浸泡测试 ====================
+# 用法：python benchmarks/soak_charts.py [--reruns 2000] [--tolerance-mb 30]
+#
+# 通过 Streamlit 的 AppTest 在本进程内反复重跑 WebPage.py：每次改变视频时长/会议时长并点击
+# “计算我的碳足迹”，使两张图表不断以新数据重新渲染（组合数多于缓存上限，缓存会持续淘汰）。
+# 预热（缓存填满）后记录常驻内存，结束时内存增长超过容差即以非零状态退出。
+import argparse
+import os
+import sys
+import time
+from itertools import product
+
+from streamlit.testing.v1 import AppTest
+
+PAGE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "WebPage.py")
+
+
+def rss_mb():
+    """当前进程常驻内存（MB），读取 /proc/self/statm"""
+    with open("/proc/self/statm") as f:
+        pages = int(f.read().split()[1])
+    return pages * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+
+
+def open_figures():
+    """pyplot 全局图形管理器中仍打开的图形数量（未导入 pyplot 时为0）"""
+    plt = sys.modules.get("matplotlib.pyplot")
+    return len(plt.get_fignums()) if plt else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="图表渲染内存浸泡测试")
+    parser.add_argument("--reruns", type=int, default=2000, help="重跑次数（默认2000）")
+    parser.add_argument("--warmup", type=int, default=300, help="预热次数，此后开始计算内存增长")
+    parser.add_argument("--tolerance-mb", type=float, default=30.0, help="允许的内存增长（MB）")
+    args = parser.parse_args(argv)
+
+    at = AppTest.from_file(PAGE, default_timeout=60)
+    at.run()
+    at.button[1].click().run()  # 先计算减排潜力，之后每次只重算碳足迹
+
+    # 视频 25 档 × 会议 21 档 = 525 种组合，多于图表缓存上限
+    inputs = list(product([i * 0.5 for i in range(25)], [i * 0.5 for i in range(21)]))
+    baseline = None
+    start = time.perf_counter()
+    for i in range(args.reruns):
+        video, meetings = inputs[i % len(inputs)]
+        at.slider[0].set_value(video)
+        at.slider[1].set_value(meetings)
+        at.button[0].click().run()
+        if at.exception:
+            print(at.exception, file=sys.stderr)
+            return 1
+        if i + 1 == args.warmup:
+            baseline = rss_mb()
+        if (i + 1) % 250 == 0:
+            print(f"{i + 1:>6} 次  RSS {rss_mb():8.1f} MB  打开的图形 {open_figures()}")
+    elapsed = time.perf_counter() - start
+
+    final = rss_mb()
+    baseline = baseline if baseline is not None else final
+    growth = final - baseline
+    print(f"平均每次重跑 {elapsed / args.reruns * 1000:.1f} ms")
+    print(f"预热后内存增长 {growth:+.1f} MB（容差 {args.tolerance_mb} MB），打开的图形 {open_figures()}")
+    if growth > args.tolerance_mb or open_figures():
+        print("失败：内存未保持平稳", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
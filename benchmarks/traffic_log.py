@@ -0,0 +1,93 @@
+# ==================== 流量日志基准 ====================
+# 用法：python benchmarks/traffic_log.py [--lines 2000000] [--users 100000] [--block-mb 4]
+#
+# 生成代理访问日志（combined 格式，绝对URL与 CONNECT 各半，主机名取自各平台与其他网站），计时：
+#   1. 逐行正则解析 + 字典累加（对照）
+#   2. traffic.summarize：按块在字节数组上向量化解析，按 用户 × 平台 分组累加
+# 并核对两者各用户的数据量一致，报告吞吐（行/秒）、峰值内存（tracemalloc）与 10 亿行的估计耗时。
+import argparse
+import os
+import re
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import Counter
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import traffic  # noqa: E402
+
+HOSTS = [b"rr3---sn-a5m7lnl6.googlevideo.com", b"ipv4-c001-lax009.1.oca.nflxvideo.net",
+         b"upos-sz-mirrorcos.bilivideo.com", b"v26-web.douyinvod.com", b"zoom.us", b"www.example.com",
+         b"cdn.jsdelivr.net"]
+_LINE = re.compile(rb'^(\S+) \S+ (\S+) \[[^\]\n]*\] "[A-Z]+ (?:[a-zA-Z][a-zA-Z0-9+.-]*://)?([^/\s:"?]*)'
+                   rb'[^"\n]*" \d{3} (\d+|-)', re.M)
+
+
+def write_log(path, lines, users, seed=0, batch=100_000):
+    rng = np.random.default_rng(seed)
+    with open(path, "wb") as f:
+        for offset in range(0, lines, batch):
+            n = min(batch, lines - offset)
+            host = rng.integers(len(HOSTS), size=n).tolist()
+            user = rng.integers(users, size=n).tolist()
+            size = rng.lognormal(13, 2, n).astype(np.int64).tolist()
+            requests = [b"CONNECT %s:443 HTTP/1.1" % HOSTS[h] if i % 2 else
+                        b"GET https://%s/v?id=%d HTTP/1.1" % (HOSTS[h], i) for i, h in enumerate(host)]
+            f.write(b"".join(
+                b'10.%d.%d.%d - %s [10/Oct/2024:13:55:36 +0800] "%s" 200 %d "-" "Mozilla/5.0 (X11; Linux x86_64)"\n'
+                % (u >> 16, (u >> 8) & 255, u & 255, b"u%d" % u if u % 2 else b"-", request, s)
+                for u, request, s in zip(user, requests, size)))
+
+
+def regex_baseline(path, block_size):
+    """逐行正则解析（对照）：各用户的字节数"""
+    volume = Counter()
+    with open(path, "rb") as f:
+        for block in traffic.read_blocks(f, block_size):
+            for client, user, host, size in _LINE.findall(block):
+                volume[(client if user == b"-" else user).decode()] += 0 if size == b"-" else int(size)
+    return volume
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="流量日志基准：逐行正则 与 按块向量化解析")
+    parser.add_argument("--lines", type=int, default=2_000_000, help="日志行数")
+    parser.add_argument("--users", type=int, default=100_000, help="用户数")
+    parser.add_argument("--block-mb", type=int, default=traffic.BLOCK_SIZE >> 20, help="每块大小（MB）")
+    args = parser.parse_args(argv)
+    block_size = args.block_mb << 20
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "access.log")
+        write_log(path, args.lines, args.users)
+        print(f"{args.lines:,} 行，{os.path.getsize(path) / 1e6:.0f} MB，{args.users:,} 个用户，块大小 {args.block_mb} MB")
+
+        start = time.perf_counter()
+        expected = regex_baseline(path, block_size)
+        baseline = time.perf_counter() - start
+
+        start = time.perf_counter()
+        sums = traffic.summarize([path], block_size)
+        elapsed = time.perf_counter() - start
+
+        # 峰值内存另跑一次（tracemalloc 会拖慢 NumPy 的内存分配）
+        tracemalloc.start()
+        traffic.summarize([path], block_size)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    rows = sums.rows("user")
+    mismatched = sum(abs(expected[label] / traffic.GIGABYTE - gigabytes) > 1e-9 for label, _, gigabytes in rows)
+    print(f"{'方法':<16}{'耗时 (s)':>10}{'行/秒':>14}{'10亿行 (分钟)':>16}")
+    for label, seconds in (("逐行正则", baseline), ("按块向量化", elapsed)):
+        print(f"{label:<16}{seconds:>10.2f}{args.lines / seconds:>14,.0f}{1e9 / args.lines * seconds / 60:>16.0f}")
+    print(f"向量化解析峰值内存 {peak / 1e6:.0f} MB；{len(rows)} 个用户，与逐行正则不一致的用户 {mismatched} 个")
+    print("（单进程；--workers 多进程时按块并行，吞吐近似按核数扩展）")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+# ==================== 旅行排放因子基准 ====================
+# 用法：python benchmarks/travel_factor.py [--trips 5000000] [--repeat 5]
+#
+# 随机生成出行（出行方式均匀抽样，单次距离 50–10000 公里，对数均匀），计时：
+#   1. 原先的距离档位查表：np.searchsorted 定档位 + travel_factor[出行方式, 档位]
+#   2. 按出行方式分组，各用 np.interp（逐方式布尔筛选）
+#   3. fp.derive_flight_factor：定位所在段后按 左端点因子 + 斜率 × 距离差 逐元素取值
+# 并核对 2、3 结果一致，报告与档位查表的平均差异。
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import factors  # noqa: E402
+import footprint as fp  # noqa: E402
+
+DISTANCE_BOUNDS = [500, 1000, 3000]  # 原先的档位上界
+
+
+def bucket_lookup(travel_type, km, table):
+    return table.travel_factor[travel_type, np.searchsorted(DISTANCE_BOUNDS, km, side="right")]
+
+
+def per_type_interp(travel_type, km, table):
+    distance = table.typical_distance
+    result = np.empty(len(km))
+    for i, row in enumerate(table.travel_factor):
+        mask = travel_type == i
+        result[mask] = np.interp(km[mask], distance, row)
+    return result
+
+
+def timed(func, repeat, *args):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = func(*args)
+    return result, (time.perf_counter() - start) / repeat
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="旅行排放因子基准：档位查表 与 连续曲线插值")
+    parser.add_argument("--trips", type=int, default=5_000_000, help="出行次数")
+    parser.add_argument("--repeat", type=int, default=5, help="重复次数")
+    args = parser.parse_args(argv)
+
+    table = factors.get()
+    rng = np.random.default_rng(0)
+    travel_type = rng.integers(len(table.travel_types), size=args.trips)
+    km = np.exp(rng.uniform(np.log(50), np.log(10_000), args.trips))
+    print(f"{args.trips:,} 次出行，{len(table.travel_types)} 种出行方式")
+
+    bucket, bucket_time = timed(bucket_lookup, args.repeat, travel_type, km, table)
+    grouped, grouped_time = timed(per_type_interp, args.repeat, travel_type, km, table)
+    curve, curve_time = timed(fp.derive_flight_factor, args.repeat, travel_type, km, table)
+
+    print(f"{'方法':<20}{'耗时 (ms)':>12}{'百万次/秒':>12}")
+    for label, seconds in (("档位查表", bucket_time), ("按方式分组插值", grouped_time), ("分段线性", curve_time)):
+        print(f"{label:<20}{seconds * 1000:>12.1f}{args.trips / seconds / 1e6:>12.1f}")
+    print(f"分组插值与分段线性最大差异 {np.abs(grouped - curve).max():.2e}；"
+          f"与档位查表的平均相对差异 {np.mean(np.abs(curve - bucket) / bucket):.1%}")
+
+
+if __name__ == "__main__":
+    main()
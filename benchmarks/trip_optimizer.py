@@ -0,0 +1,66 @@
+# ==================== 差旅替代优化基准 ====================
+# 用法：python benchmarks/trip_optimizer.py [--sizes 10000 100000 1000000] [--repeat 5]
+#
+# 随机生成出行清单（距离、出行方式、人数、会议时长），分别计时：
+#   - 每次出行的排放与减排量（trips.trip_savings）
+#   - 会议时长预算下的贪心求解（trips.optimize_hours，预算为全部候选时长的一半）
+#   - 保留出行次数下的求解（trips.optimize_count，至多替代一半）
+# 并给出贪心解与分数背包上界的差距。目标：10万次出行的计算与求解合计在1秒内。
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import factors  # noqa: E402
+import trips  # noqa: E402
+
+MEETING_INTENSITY = 0.1  # kg CO₂/小时，接近默认会议质量
+
+
+def random_trips(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return {
+        "distance_km": rng.uniform(50, 8000, n).round(),
+        "travel_type": rng.integers(len(factors.get().travel_types), size=n),
+        "travelers": rng.integers(1, 5, n).astype(np.float64),
+        "meeting_hours": rng.choice([0.5, 1.0, 1.5, 2.0, 3.0], n),
+        "participants": rng.integers(2, 8, n).astype(np.float64),
+    }
+
+
+def best_of(repeat, func):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="差旅替代优化基准：计算与求解耗时")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000], help="出行次数")
+    parser.add_argument("--repeat", type=int, default=5, help="重复次数（取最快一次）")
+    args = parser.parse_args(argv)
+
+    print(f"{'出行次数':>10}{'减排量 (ms)':>14}{'时长预算 (ms)':>16}{'保留次数 (ms)':>16}{'合计 (ms)':>12}{'与上界差距':>12}")
+    for n in args.sizes:
+        columns = random_trips(n)
+        t_savings, (_, _, saving) = best_of(args.repeat, lambda: trips.trip_savings(
+            meeting_intensity=MEETING_INTENSITY, **columns))
+        hours = columns["meeting_hours"]
+        budget = hours[saving > 0].sum() / 2
+        t_hours, result = best_of(args.repeat, lambda: trips.optimize_hours(saving, hours, budget))
+        t_count, _ = best_of(args.repeat, lambda: trips.optimize_count(saving, n // 2))
+        gap = 1 - result["saving"] / result["upper_bound"] if result["upper_bound"] else 0.0
+        total = t_savings + t_hours + t_count
+        print(f"{n:>10}{t_savings * 1000:>14.1f}{t_hours * 1000:>16.1f}{t_count * 1000:>16.1f}"
+              f"{total * 1000:>12.1f}{gap:>12.2e}")
+
+
+if __name__ == "__main__":
+    main()
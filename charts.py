@@ -0,0 +1,399 @@
+# ==================== 图表渲染 ====================
+# 直接使用 matplotlib.figure.Figure 而不是 pyplot：图形不会注册到 pyplot 的全局图形管理器，
+# 渲染成PNG字节后立即清空释放，长时间运行的服务不会累积图形对象。
+# 输出为纯字节，页面可按绘图数据作为键进行缓存。
+# matplotlib 在第一次绘图时才导入（约0.5秒），页面冷启动与不绘图的重跑不承担这部分开销。
+#
+# 对比图与敏感性图另有浏览器端渲染方式（环境变量 ICT_CHART_BACKEND=vega-lite）：
+# 服务器只发送几行数据与 Vega-Lite 图表描述，由浏览器绘制，省去服务器端光栅化与PNG传输。
+import io
+import os
+
+import numpy as np
+
+DPI = 200  # 与 st.pyplot 默认导出分辨率一致
+# st.image 显示图片的最大宽度（像素）。更宽的图片在每次显示时都会被 Streamlit 解码、缩小并重新编码，
+# 因此宽图按此宽度降低分辨率渲染：显示效果相同，缓存的PNG可直接发送
+MAX_WIDTH = 1460
+
+BACKENDS = ("matplotlib", "vega-lite")
+BACKEND = os.environ.get("ICT_CHART_BACKEND", "matplotlib")
+if BACKEND not in BACKENDS:
+    raise ValueError(f"ICT_CHART_BACKEND 应为 {BACKENDS} 之一，实际为 {BACKEND!r}")
+
+PARAM_LABELS = {
+    # 碳足迹组成部分
+    "视频流媒体": "Video Streaming",
+    "视频会议": "Video Conferencing",
+    "手机生产": "Phone Production",
+    # 侧边栏参数
+    "手机品牌": "Phone Brand",
+    "视频平台": "Video Platform",
+    "视频质量": "Video Quality",
+    "会议质量": "Meeting Quality",
+    "出行方式": "Travel Mode",
+    "单次旅行距离": "Trip Distance",
+    "地区": "Region",
+    "绿色数据中心": "Green Data Center",
+}
+SENSITIVITY_COLORS = ['#FF6B6B', '#4ECDC4', '#45B7D1', '#F7B267', '#9B5DE5',
+                      '#00BBF9', '#F15BB5', '#95A5A6']
+
+
+def new_figure(figsize):
+    """创建图形（首次调用时导入 matplotlib）"""
+    from matplotlib.figure import Figure
+    return Figure(figsize=figsize)
+
+
+def render_png(fig):
+    """把图形渲染为PNG字节，并释放图形占用的资源"""
+    buffer = io.BytesIO()
+    # 紧凑裁剪后的宽度略小于图形宽度，按图形宽度估算即可保证不超过 MAX_WIDTH
+    dpi = min(DPI, MAX_WIDTH // fig.get_figwidth())
+    try:
+        fig.savefig(buffer, format="png", dpi=dpi, bbox_inches="tight")
+    finally:
+        fig.clear()
+    return buffer.getvalue()
+
+
+def comparison_values(total, saving):
+    """对比图的显示数据：两者相差10倍以上时缩放减排量，确保对比明显"""
+    categories = ['Digital Footprint', 'Reduction Potential']
+    values = [total, saving]
+    if saving > 10 * total:
+        # 如果减排远大于排放，调整显示比例
+        values = [total, saving / 10]
+        categories = ['Digital Footprint', 'Reduction Potential (÷10)']
+    elif total > 10 * saving:
+        values = [total, saving * 10]
+        categories = ['Digital Footprint', 'Reduction Potential (×10)']
+    return categories, values
+
+
+def comparison_figure(total, saving):
+    """“ICT: Emissions vs. Reduction” 条形图"""
+    # 更小的图表
+    fig = new_figure((6, 3))
+    draw_comparison(fig.subplots(), total, saving)
+    # 紧凑布局
+    fig.tight_layout()
+    return fig
+
+
+def draw_comparison(ax, total, saving):
+    """在给定坐标轴上绘制对比条形图（页面与批量报告共用）"""
+    categories, values = comparison_values(total, saving)
+    colors = ['#ff6b6b', '#51cf66']
+    bars = ax.bar(categories, values, color=colors)
+
+    ax.set_ylabel('kg CO₂', fontsize=10)
+    ax.set_title('ICT: Emissions vs. Reduction', fontsize=12, fontweight='bold')
+
+    # 数值标签
+    for bar, value in zip(bars, values):
+        height = bar.get_height()
+        ax.text(bar.get_x() + bar.get_width() / 2., height + 5,
+                f'{value:.1f} kg', ha='center', va='bottom', fontsize=9)
+
+    # 设置y轴
+    max_val = max(values) if max(values) > 0 else 100
+    ax.set_ylim(0, max_val * 1.2)
+    ax.yaxis.grid(True, linestyle='--', alpha=0.7)
+
+
+def sensitivity_figure(param_names, sensitivities, component_names, shares):
+    """全局敏感性排序条形图 + 碳足迹构成饼图（名称为中文，图中显示英文）"""
+    fig = new_figure((12, 4))
+    draw_sensitivity(*fig.subplots(1, 2), param_names, sensitivities, component_names, shares)
+    fig.tight_layout()
+    return fig
+
+
+def draw_sensitivity(ax1, ax2, param_names, sensitivities, component_names, shares):
+    """在两个坐标轴上分别绘制敏感性排序条形图与构成饼图（页面与批量报告共用）"""
+    # 左侧：总效应指数条形图（最敏感的参数在最上方）
+    labels = [PARAM_LABELS.get(name, name) for name in param_names][::-1]
+    sensitivities = list(sensitivities)[::-1]
+    colors = SENSITIVITY_COLORS[:len(labels)][::-1]
+    bars1 = ax1.barh(labels, sensitivities, color=colors)
+
+    ax1.set_xlabel('Total-order Sobol Index (% of variance)')
+    ax1.set_title('Sensitivity Ranking')
+    ax1.set_xlim(0, max(max(sensitivities) * 1.2, 1))
+
+    # 在条形上添加数值
+    for bar, value in zip(bars1, sensitivities):
+        width = bar.get_width()
+        ax1.text(width + 0.2, bar.get_y() + bar.get_height() / 2,
+                 f'{value:.1f}%', va='center', ha='left')
+
+    # 右侧：贡献占比饼图
+    labels = [PARAM_LABELS.get(name, name) for name in component_names]
+    sizes = list(shares)
+    colors = SENSITIVITY_COLORS[:len(labels)]
+
+    # 如果有其他贡献，添加"其他"类别
+    total_covered = sum(sizes)
+    if total_covered < 100:
+        labels.append("Other")
+        sizes.append(100 - total_covered)
+        colors.append('#95A5A6')
+
+    ax2.pie(sizes, labels=labels, colors=colors, autopct='%1.1f%%',
+            startangle=90, textprops={'fontsize': 10})
+    ax2.set_title('Footprint Composition')
+
+
+def uncertainty_figure(total_counts, total_edges, saving_counts, saving_edges):
+    """蒙特卡洛分布直方图：左为年碳足迹，右为减排潜力"""
+    fig = new_figure((8, 3))
+    axes = fig.subplots(1, 2)
+
+    panels = [
+        (axes[0], total_counts, total_edges, '#ff6b6b', 'Digital Footprint'),
+        (axes[1], saving_counts, saving_edges, '#51cf66', 'Reduction Potential'),
+    ]
+    for ax, counts, edges, color, title in panels:
+        edges = np.asarray(edges)
+        share = np.asarray(counts) / max(sum(counts), 1) * 100
+        ax.bar(edges[:-1], share, width=np.diff(edges), align='edge', color=color, alpha=0.8)
+        ax.locator_params(axis='x', nbins=5)
+        ax.set_xlabel('kg CO₂', fontsize=10)
+        ax.set_ylabel('Share of draws (%)', fontsize=10)
+        ax.set_title(title, fontsize=12, fontweight='bold')
+        ax.yaxis.grid(True, linestyle='--', alpha=0.7)
+
+    fig.tight_layout()
+    return fig
+
+
+def grid_profile_figure(intensity, video_usage, meeting_usage):
+    """典型日（全年平均）电网碳强度曲线与使用时段：intensity 等为24个小时值"""
+    fig = new_figure((6, 3))
+    ax = fig.subplots()
+    hours = np.arange(24)
+
+    ax.bar(hours, video_usage, color='#ff6b6b', alpha=0.6, label='Video Streaming (h)')
+    ax.bar(hours, meeting_usage, bottom=video_usage, color='#4ECDC4', alpha=0.6,
+           label='Video Conferencing (h)')
+    ax.set_xlabel('Hour of Day', fontsize=10)
+    ax.set_ylabel('Usage (h/day)', fontsize=10)
+    ax.set_xticks(range(0, 24, 3))
+
+    ax_grid = ax.twinx()
+    ax_grid.plot(hours, intensity, color='#333333', linewidth=2, label='Grid Intensity')
+    ax_grid.set_ylabel('kg CO₂/kWh', fontsize=10)
+    ax_grid.set_ylim(0, max(intensity) * 1.2)
+
+    ax.set_title('Grid Intensity vs. Usage Timing', fontsize=12, fontweight='bold')
+    handles = ax.get_legend_handles_labels()
+    grid_handles = ax_grid.get_legend_handles_labels()
+    ax.legend(handles[0] + grid_handles[0], handles[1] + grid_handles[1], fontsize=8,
+              loc='upper center', bbox_to_anchor=(0.5, -0.25), ncol=3, frameon=False)
+
+    fig.tight_layout()
+    return fig
+
+
+def sweep_figure(x, y, z, marker, xlabel, ylabel, title):
+    """情景扫描热力图 + 等值线：z 的形状为 (len(y), len(x))，marker 为当前滑块位置 (x, y)"""
+    fig = new_figure((6, 4))
+    ax = fig.subplots()
+    z = np.asarray(z)
+
+    # 含负值（如目标年限短于当前年限）时使用以0为中心的红绿色阶
+    limit = max(np.abs(z).max(), 1e-9)
+    if z.min() < 0:
+        mesh = ax.pcolormesh(x, y, z, cmap='RdYlGn', vmin=-limit, vmax=limit, shading='auto')
+    else:
+        mesh = ax.pcolormesh(x, y, z, cmap='Greens', vmin=0, vmax=limit, shading='auto')
+    contours = ax.contour(x, y, z, levels=6, colors='#333333', linewidths=0.8)
+    ax.clabel(contours, fmt='%.0f kg', fontsize=8)
+    fig.colorbar(mesh, ax=ax, label='Annual Reduction (kg CO₂)')
+
+    ax.plot(*marker, marker='o', markersize=9, markerfacecolor='white', markeredgecolor='#ff6b6b',
+            markeredgewidth=2)
+    ax.set_xlabel(xlabel, fontsize=10)
+    ax.set_ylabel(ylabel, fontsize=10)
+    ax.set_title(title, fontsize=12, fontweight='bold')
+
+    fig.tight_layout()
+    return fig
+
+
+def savings_curve_figure(hours, saving, budget=None):
+    """差旅替代优化的累计减排曲线：横轴为累计会议时长，budget 为会议时长预算（可选）"""
+    fig = new_figure((6, 3.5))
+    ax = fig.subplots()
+    ax.plot(hours, saving, color='#4ECDC4', linewidth=2)
+    ax.fill_between(hours, saving, color='#4ECDC4', alpha=0.2)
+    if budget is not None:
+        ax.axvline(budget, color='#FF6B6B', linestyle='--', linewidth=1.2, label='Budget')
+        ax.legend(fontsize=9)
+    ax.set_xlabel('Cumulative Meeting Hours', fontsize=10)
+    ax.set_ylabel('Cumulative Reduction (kg CO₂)', fontsize=10)
+    ax.set_title('Trip Substitution: Savings Curve', fontsize=12, fontweight='bold')
+    ax.grid(alpha=0.3)
+    fig.tight_layout()
+    return fig
+
+
+def trend_figure(periods, means, lows, highs, ylabel):
+    """计算历史趋势：各周期的平均值（折线）与最小-最大范围（阴影）"""
+    fig = new_figure((8, 3.5))
+    ax = fig.subplots()
+    x = np.arange(len(periods))
+    ax.fill_between(x, lows, highs, color='#45B7D1', alpha=0.2, label='Min - Max')
+    ax.plot(x, means, color='#45B7D1', marker='o', markersize=4, linewidth=2, label='Mean')
+    step = max(len(periods) // 12, 1)  # 最多约12个刻度标签
+    ax.set_xticks(x[::step], [periods[i] for i in range(0, len(periods), step)], rotation=30, ha='right',
+                  fontsize=8)
+    ax.set_ylabel(ylabel, fontsize=10)
+    ax.set_title('Calculation History', fontsize=12, fontweight='bold')
+    ax.grid(alpha=0.3)
+    ax.legend(fontsize=9)
+    fig.tight_layout()
+    return fig
+
+
+def projection_figure(years, device, video, meeting, total_band, saving_band):
+    """多年预测：左为设定路径的逐年排放构成（堆叠），右为累计排放与累计减排（中位数与 P5-P95 范围）"""
+    fig = new_figure((11, 4))
+    ax1, ax2 = fig.subplots(1, 2)
+    ax1.stackplot(years, device, video, meeting, colors=['#45B7D1', '#FF6B6B', '#4ECDC4'],
+                  labels=['Phone Production', 'Video Streaming', 'Video Conferencing'], alpha=0.85)
+    ax1.set_xlabel('Year', fontsize=10)
+    ax1.set_ylabel('Annual Emissions (kg CO₂)', fontsize=10)
+    ax1.set_title('Annual Footprint (selected pathway)', fontsize=12, fontweight='bold')
+    ax1.legend(fontsize=8, loc='upper right')
+    ax1.grid(alpha=0.3)
+
+    for (low, median, high), color, label in ((total_band, '#FF6B6B', 'Cumulative Emissions'),
+                                              (saving_band, '#4ECDC4', 'Cumulative Reduction')):
+        ax2.fill_between(years, low, high, color=color, alpha=0.2)
+        ax2.plot(years, median, color=color, linewidth=2, label=label)
+    ax2.set_xlabel('Year', fontsize=10)
+    ax2.set_ylabel('kg CO₂', fontsize=10)
+    ax2.set_title('Cumulative (median, P5-P95 of pathways)', fontsize=12, fontweight='bold')
+    ax2.legend(fontsize=8, loc='upper left')
+    ax2.grid(alpha=0.3)
+    fig.tight_layout()
+    return fig
+
+
+def comparison_png(total, saving):
+    return render_png(comparison_figure(total, saving))
+
+
+def sensitivity_png(param_names, sensitivities, component_names, shares):
+    return render_png(sensitivity_figure(param_names, sensitivities, component_names, shares))
+
+
+def uncertainty_png(total_counts, total_edges, saving_counts, saving_edges):
+    return render_png(uncertainty_figure(total_counts, total_edges, saving_counts, saving_edges))
+
+
+def grid_profile_png(intensity, video_usage, meeting_usage):
+    return render_png(grid_profile_figure(intensity, video_usage, meeting_usage))
+
+
+def sweep_png(x, y, z, marker, xlabel, ylabel, title):
+    return render_png(sweep_figure(x, y, z, marker, xlabel, ylabel, title))
+
+
+def savings_curve_png(hours, saving, budget=None):
+    return render_png(savings_curve_figure(hours, saving, budget))
+
+
+def trend_png(periods, means, lows, highs, ylabel):
+    return render_png(trend_figure(periods, means, lows, highs, ylabel))
+
+
+def projection_png(years, device, video, meeting, total_band, saving_band):
+    return render_png(projection_figure(years, device, video, meeting, total_band, saving_band))
+
+
+# ==================== 浏览器端渲染（Vega-Lite） ====================
+# 与上面的 matplotlib 图形使用相同的显示数据（comparison_values 的 ÷10/×10 缩放）、标签与配色。
+def comparison_spec(total, saving):
+    """“ICT: Emissions vs. Reduction” 条形图的 Vega-Lite 描述"""
+    categories, values = comparison_values(total, saving)
+    max_val = max(values) if max(values) > 0 else 100
+    return {
+        "title": {"text": "ICT: Emissions vs. Reduction", "fontSize": 14},
+        "width": 420,
+        "height": 220,
+        "data": {"values": [{"category": c, "value": round(v, 3), "label": f"{v:.1f} kg"}
+                            for c, v in zip(categories, values)]},
+        "encoding": {
+            "x": {"field": "category", "type": "nominal", "sort": None,
+                  "axis": {"title": None, "labelAngle": 0}},
+            "y": {"field": "value", "type": "quantitative", "title": "kg CO₂",
+                  "scale": {"domain": [0, max_val * 1.2]}, "axis": {"gridDash": [4, 4]}},
+        },
+        "layer": [
+            {"mark": {"type": "bar"},
+             "encoding": {"color": {"field": "category", "type": "nominal", "legend": None, "sort": None,
+                                    "scale": {"range": ["#ff6b6b", "#51cf66"]}}}},
+            {"mark": {"type": "text", "baseline": "bottom", "dy": -3},
+             "encoding": {"text": {"field": "label"}}},
+        ],
+    }
+
+
+def sensitivity_spec(param_names, sensitivities, component_names, shares):
+    """全局敏感性排序条形图 + 碳足迹构成饼图的 Vega-Lite 描述"""
+    labels = [PARAM_LABELS.get(name, name) for name in param_names]
+    sensitivities = list(sensitivities)
+    ranking = [{"parameter": label, "value": round(v, 3), "label": f"{v:.1f}%", "color": color}
+               for label, v, color in zip(labels, sensitivities, SENSITIVITY_COLORS)]
+
+    parts = [PARAM_LABELS.get(name, name) for name in component_names]
+    sizes = list(shares)
+    colors = SENSITIVITY_COLORS[:len(parts)]
+    if sum(sizes) < 100:
+        parts.append("Other")
+        sizes.append(100 - sum(sizes))
+        colors.append('#95A5A6')
+    composition = [{"component": part, "share": round(size, 3), "label": f"{size:.1f}%", "color": color}
+                   for part, size, color in zip(parts, sizes, colors)]
+
+    bar_x = {"field": "value", "type": "quantitative", "title": "Total-order Sobol Index (% of variance)",
+             "scale": {"domain": [0, max(max(sensitivities) * 1.2, 1)]}}
+    bar_y = {"field": "parameter", "type": "nominal", "sort": None, "title": None}
+    pie_theta = {"field": "share", "type": "quantitative", "stack": True}
+    return {
+        "hconcat": [
+            {
+                "title": "Sensitivity Ranking",
+                "width": 360,
+                "height": 240,
+                "data": {"values": ranking},
+                "layer": [
+                    {"mark": "bar",
+                     "encoding": {"x": bar_x, "y": bar_y, "color": {"field": "color", "type": "nominal",
+                                                                    "scale": None}}},
+                    {"mark": {"type": "text", "align": "left", "dx": 3},
+                     "encoding": {"x": bar_x, "y": bar_y, "text": {"field": "label"}}},
+                ],
+            },
+            {
+                "title": "Footprint Composition",
+                "width": 240,
+                "height": 240,
+                "data": {"values": composition},
+                "encoding": {"theta": pie_theta,
+                             "order": {"field": "share", "type": "quantitative", "sort": "descending"}},
+                "layer": [
+                    {"mark": {"type": "arc", "outerRadius": 100},
+                     "encoding": {"color": {"field": "color", "type": "nominal", "scale": None}}},
+                    {"mark": {"type": "text", "radius": 120},
+                     "encoding": {"text": {"field": "component"}}},
+                    {"mark": {"type": "text", "radius": 65, "fontSize": 10},
+                     "encoding": {"text": {"field": "label"}}},
+                ],
+            },
+        ],
+    }
@@ -0,0 +1,146 @@
+# ==================== 排放因子注册表 ====================
+# 排放因子不再写死在代码中，而是存放在 data/factors/<版本>.json，每个版本一个文件：
+#   - 每个进程只解析一次，解析结果（FactorTable）由所有会话共享
+#   - 因子存为只读NumPy数组，按选项编码索引
+#   - 文件修改后自动重新加载（最多每 RELOAD_INTERVAL 秒检查一次修改时间），无需重启服务
+#   - 可按版本选择，同一版本号的计算结果可复现
+import hashlib
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass
+
+import numpy as np
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "factors")
+DEFAULT_VERSION = os.environ.get("ICT_FACTORS_VERSION")  # 未设置时使用最新版本
+RELOAD_INTERVAL = 2.0  # 秒
+
+
+@dataclass(frozen=True)
+class FactorTable:
+    """一个版本的排放因子（只读）；选项顺序即编码"""
+    version: str
+    digest: str  # 文件内容哈希，用于缓存键
+    phone_brands: tuple
+    video_platforms: tuple
+    video_qualities: tuple
+    meeting_qualities: tuple
+    travel_types: tuple
+    travel_distances: tuple
+    regions: tuple
+    phone_carbon: np.ndarray
+    platform_factor: np.ndarray
+    quality_factor: np.ndarray
+    meeting_factor: np.ndarray
+    travel_factor: np.ndarray  # 行为出行方式，列为距离档位
+    typical_distance: np.ndarray
+    region_factor: np.ndarray
+    base_intensity: float
+    base_meeting_intensity: float
+    green_data_center_factor: float
+    network_energy: float           # 网络传输能耗 kWh/GB
+    data_center_energy: float       # 数据中心能耗 kWh/GB
+    gigabytes_per_hour: np.ndarray  # 各视频画质每小时数据量 GB
+    sources: dict
+
+
+def _readonly(values):
+    array = np.array(values, dtype=np.float64)
+    array.setflags(write=False)
+    return array
+
+
+def parse(raw, digest=""):
+    """把版本文件内容（dict）转换为 FactorTable"""
+    phone = raw["phone_carbon"]["values"]
+    video = raw["video"]
+    meeting = raw["meeting"]["quality_factor"]
+    travel = raw["travel"]["factors"]
+    distance = raw["travel"]["typical_distance"]
+    region = raw["electricity"]["region_factor"]
+    data_volume = raw["data_volume"]
+    travel_types = tuple(travel)
+    travel_distances = tuple(distance)
+    for name in travel_types:
+        if tuple(travel[name]) != travel_distances:
+            raise ValueError(f"{raw['version']}: “{name}”的距离档位与 typical_distance 不一致")
+    if any(a >= b for a, b in zip(list(distance.values()), list(distance.values())[1:])):
+        raise ValueError(f"{raw['version']}: typical_distance 应按距离从短到长排列（旅行排放因子在其间插值）")
+    if tuple(data_volume["gigabytes_per_hour"]) != tuple(video["quality_factor"]):
+        raise ValueError(f"{raw['version']}: gigabytes_per_hour 的画质与视频 quality_factor 不一致")
+
+    return FactorTable(
+        version=raw["version"],
+        digest=digest,
+        phone_brands=tuple(phone),
+        video_platforms=tuple(video["platform_factor"]),
+        video_qualities=tuple(video["quality_factor"]),
+        meeting_qualities=tuple(meeting),
+        travel_types=travel_types,
+        travel_distances=travel_distances,
+        regions=tuple(region),
+        phone_carbon=_readonly(list(phone.values())),
+        platform_factor=_readonly(list(video["platform_factor"].values())),
+        quality_factor=_readonly(list(video["quality_factor"].values())),
+        meeting_factor=_readonly(list(meeting.values())),
+        travel_factor=_readonly([[travel[t][d] for d in travel_distances] for t in travel_types]),
+        typical_distance=_readonly(list(distance.values())),
+        region_factor=_readonly(list(region.values())),
+        base_intensity=float(video["base_intensity"]),
+        base_meeting_intensity=float(raw["meeting"]["base_intensity"]),
+        green_data_center_factor=float(raw["electricity"]["green_data_center_factor"]),
+        network_energy=float(data_volume["network"]),
+        data_center_energy=float(data_volume["data_center"]),
+        gigabytes_per_hour=_readonly(list(data_volume["gigabytes_per_hour"].values())),
+        sources={key: value["source"] for key, value in raw.items()
+                 if isinstance(value, dict) and "source" in value},
+    )
+
+
+def versions(data_dir=DATA_DIR):
+    """可用版本列表（按版本号排序，最后一个为最新）"""
+    names = [f[:-5] for f in os.listdir(data_dir) if f.endswith(".json")]
+    return sorted(names, key=lambda v: [int(p) if p.isdigit() else p for p in v.split(".")])
+
+
+def version_path(version, data_dir=DATA_DIR):
+    return os.path.join(data_dir, f"{version}.json")
+
+
+def load(version=None, data_dir=DATA_DIR):
+    """解析指定版本的因子文件（不使用缓存）"""
+    version = version or DEFAULT_VERSION or versions(data_dir)[-1]
+    with open(version_path(version, data_dir), "rb") as f:
+        content = f.read()
+    table = parse(json.loads(content.decode("utf-8")), hashlib.sha256(content).hexdigest()[:16])
+    if table.version != version:
+        raise ValueError(f"文件 {version}.json 中的版本号为 {table.version}")
+    return table
+
+
+# 进程内缓存：(目录, 请求的版本) -> (文件修改时间, 上次检查时间, FactorTable)
+_cache = {}
+_lock = threading.Lock()
+
+
+def get(version=None, data_dir=DATA_DIR):
+    """取得指定版本（默认最新）的因子表（进程内共享）；文件变化后自动重新加载"""
+    key = (data_dir, version)
+    now = time.monotonic()
+    entry = _cache.get(key)
+    if entry is not None and now - entry[1] < RELOAD_INTERVAL:
+        return entry[2]
+
+    with _lock:
+        # 重新确定版本号（可能新增了更新的版本文件）并检查文件修改时间
+        resolved = version or DEFAULT_VERSION or versions(data_dir)[-1]
+        mtime = os.stat(version_path(resolved, data_dir)).st_mtime_ns
+        entry = _cache.get(key)
+        if entry is None or entry[0] != mtime or entry[2].version != resolved:
+            entry = (mtime, now, load(resolved, data_dir))
+        else:
+            entry = (mtime, now, entry[2])
+        _cache[key] = entry
+        return entry[2]
@@ -0,0 +1,169 @@
+# ==================== ICT碳足迹计算引擎 ====================
+# 与界面无关的计算逻辑：页面与批量任务共用同一套公式。
+# 所有函数都接受标量或NumPy数组（按元素广播），一次向量化计算即可处理大批量用户画像。
+import numpy as np
+
+import factors
+
+# ==================== 排放因子表 ====================
+# 因子来自版本化的因子文件（见 factors.py 与 data/factors/）。各计算函数的 table 参数默认取 factors.get()，
+# 即当前最新版本，因子文件修改或新增版本后自动生效；需要指定版本时把 factors.get(版本) 作为 table 传入。
+# 因子表中各选项的顺序即编码（与侧边栏选项顺序一致），批量数据以整数编码表示各项选择。
+
+
+def encode(labels, options):
+    """把选项标签（标量或数组）转换为整数编码，未知标签抛出 ValueError"""
+    lookup = {name: i for i, name in enumerate(options)}
+    labels = np.asarray(labels, dtype=object)
+    try:
+        codes = [lookup[label] for label in labels.ravel()]
+    except KeyError as e:
+        raise ValueError(f"未知选项: {e.args[0]}") from None
+    return np.array(codes, dtype=np.intp).reshape(labels.shape)
+
+
+# ==================== 派生参数 ====================
+# 各派生参数单独成函数，供依赖图（graph.py）逐项计算；derive_factors 一次计算全部
+def derive_video_intensity(video_platform, video_quality, table=None):
+    """视频流媒体强度（kg CO₂/小时）= 基准强度 × 平台系数 × 画质系数"""
+    t = table or factors.get()
+    return t.base_intensity * t.platform_factor[video_platform] * t.quality_factor[video_quality]
+
+
+def derive_meeting_intensity(meeting_quality, table=None):
+    """视频会议强度（kg CO₂/小时）"""
+    t = table or factors.get()
+    return t.base_meeting_intensity * t.meeting_factor[meeting_quality]
+
+
+def derive_flight_factor(travel_type, km, table=None):
+    """旅行排放因子（kg CO₂/公里·人），随单次旅行距离 km 连续变化：各距离档位的因子位于其典型距离处，
+    其间线性插值，短于最短、长于最长典型距离时取两端的值（典型距离处与按档位查表相同）。
+    travel_type 与 km 可为任意可广播的数组，大批量出行一次向量化计算"""
+    t = table or factors.get()
+    distance = t.typical_distance.astype(np.float64)
+    slope = np.diff(t.travel_factor, axis=1) / np.diff(distance)
+    km = np.clip(km, distance[0], distance[-1])
+    # 每段折线以左端点的因子加斜率表示：定位所在段（4个档位只有3段）后逐元素取值，典型距离处与查表完全相同
+    segment = np.searchsorted(distance[1:-1], km, side="right")
+    index = segment + np.multiply(travel_type, len(distance) - 1)
+    return t.travel_factor[:, :-1].ravel()[index] + slope.ravel()[index] * (km - distance[segment])
+
+
+def derive_electricity_carbon(region, green_data_center=False, table=None):
+    """电力碳强度（kg CO₂/kWh），选择绿色数据中心时按绿电系数折减"""
+    t = table or factors.get()
+    electricity_carbon = t.region_factor[region]
+    return np.where(green_data_center, electricity_carbon * t.green_data_center_factor, electricity_carbon)
+
+
+def derive_carbon_per_gigabyte(region, green_data_center=False, table=None):
+    """每GB数据传输的排放（kg CO₂/GB）：网络按所在地区电网计算，数据中心选择绿电时按绿电系数折减"""
+    t = table or factors.get()
+    return data_volume_carbon(1.0, derive_electricity_carbon(region, False, t),
+                              derive_electricity_carbon(region, green_data_center, t), t)
+
+
+def derive_data_volume_intensity(video_quality, region, green_data_center=False, table=None):
+    """按数据量估算的视频流媒体强度（kg CO₂/小时）= 该画质每小时数据量 × 每GB排放（不含终端设备用电）"""
+    t = table or factors.get()
+    return t.gigabytes_per_hour[video_quality] * derive_carbon_per_gigabyte(region, green_data_center, t)
+
+
+def derive_factors(phone_brand, video_platform, video_quality, meeting_quality,
+                   travel_type, travel_distance, region, green_data_center=False, table=None, trip_km=None):
+    """由选项编码计算派生参数（即侧边栏各项的计算结果），编码可为标量或数组；table 默认为 factors.get()（最新版本）。
+    给出 trip_km（单次旅行距离，公里）时旅行排放因子按距离曲线计算，travel_distance 不起作用（可为 None）"""
+    t = table or factors.get()
+    if trip_km is None:
+        flight_factor = t.travel_factor[travel_type, travel_distance]
+        typical_distance = t.typical_distance[travel_distance]
+    else:
+        flight_factor = derive_flight_factor(travel_type, trip_km, t)
+        typical_distance = trip_km
+    return {
+        "estimated_phone_carbon": t.phone_carbon[phone_brand],
+        "video_intensity": derive_video_intensity(video_platform, video_quality, t),
+        "meeting_intensity": derive_meeting_intensity(meeting_quality, t),
+        "flight_factor": flight_factor,
+        "typical_distance": typical_distance,
+        "electricity_carbon": derive_electricity_carbon(region, green_data_center, t),
+    }
+
+
+# ==================== 碳足迹与减排量 ====================
+# 各分项（kg CO₂/年）：页面、情景选项卡、批量任务与接口共用
+def video_carbon(video, video_intensity):
+    """视频流媒体：每天小时数 × 强度 × 365天"""
+    return np.multiply(video, video_intensity) * 365
+
+
+def meeting_carbon(meetings, meeting_intensity):
+    """视频会议：每周小时数 × 强度 × 52周"""
+    return np.multiply(meetings, meeting_intensity) * 52
+
+
+def phone_carbon(estimated_phone_carbon, phone_years):
+    """设备生产：生产排放按换机周期分摊到每年"""
+    return np.divide(estimated_phone_carbon, phone_years)
+
+
+def flight_carbon(km, flight_factor):
+    """被替代的旅行排放"""
+    return np.multiply(km, flight_factor)
+
+
+def data_volume_carbon(gigabytes, electricity_carbon, data_center_carbon=None, table=None):
+    """按数据量的传输排放（kg CO₂）= 数据量(GB) × (网络能耗 × electricity_carbon + 数据中心能耗 × data_center_carbon)，
+    能耗单位 kWh/GB；data_center_carbon 默认与 electricity_carbon 相同"""
+    t = table or factors.get()
+    if data_center_carbon is None:
+        data_center_carbon = electricity_carbon
+    return np.multiply(gigabytes, np.add(np.multiply(t.network_energy, electricity_carbon),
+                                         np.multiply(t.data_center_energy, data_center_carbon)))
+
+
+def annual_footprint(video, meetings, phone_years, video_intensity, meeting_intensity,
+                     estimated_phone_carbon):
+    """年数字碳足迹（kg CO₂）：视频流媒体、视频会议、设备生产三部分及合计"""
+    video_part = video_carbon(video, video_intensity)
+    meeting_part = meeting_carbon(meetings, meeting_intensity)
+    phone_part = phone_carbon(estimated_phone_carbon, phone_years)
+    return {
+        "video_carbon": video_part,
+        "meeting_carbon": meeting_part,
+        "phone_carbon": phone_part,
+        "total": video_part + meeting_part + phone_part,
+    }
+
+
+def travel_saving(km, flight_factor, meetings, meeting_intensity):
+    """视频会议替代差旅的减排量（kg CO₂）= 旅行排放 - 视频会议排放"""
+    flight_part = flight_carbon(km, flight_factor)
+    meeting_part = meeting_carbon(meetings, meeting_intensity)
+    return {
+        "flight_carbon": flight_part,
+        "meeting_carbon": meeting_part,
+        "saving": flight_part - meeting_part,
+    }
+
+
+def score(video, meetings, phone_years, km, derived):
+    """由派生参数（derive_factors 或情景立方体的查表结果）计算各分项、合计与减排量"""
+    result = annual_footprint(video, meetings, phone_years,
+                              derived["video_intensity"], derived["meeting_intensity"],
+                              derived["estimated_phone_carbon"])
+    saving = travel_saving(km, derived["flight_factor"], meetings, derived["meeting_intensity"])
+    result["flight_carbon"] = saving["flight_carbon"]
+    result["saving"] = saving["saving"]
+    result["electricity_carbon"] = derived["electricity_carbon"]
+    return result
+
+
+def evaluate_profiles(video, meetings, phone_years, km,
+                      phone_brand, video_platform, video_quality, meeting_quality,
+                      travel_type, travel_distance, region, green_data_center=False, table=None, trip_km=None):
+    """批量画像一次向量化计算：输入为同形状（或可广播）的数组，返回各分项、合计与减排量数组"""
+    derived = derive_factors(phone_brand, video_platform, video_quality, meeting_quality,
+                             travel_type, travel_distance, region, green_data_center, table, trip_km)
+    return score(video, meetings, phone_years, km, derived)
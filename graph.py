@@ -0,0 +1,215 @@
+# ==================== 派生参数依赖图 ====================
+# 页面原先在每次重跑时自上而下重新计算全部派生参数与各选项卡的分项，同样的公式散落在多处。
+# 本模块把它们表示为带记忆的依赖图（每个会话一份，保存在 st.session_state）：
+#   - 输入节点由页面在每次重跑时 set()；值未变化时版本号不变
+#   - 计算节点按需求值：依赖的版本号与上次计算时相同则直接返回记忆值（计为“跳过”），否则重新计算；
+#     重新计算的结果与原值相同时版本号也不变，下游节点随之跳过（例如切换到系数相同的选项）
+#   - 输入或覆盖未变化时（轮次号不变），已检查过的节点直接返回，不再逐级检查依赖
+#   - 手动覆盖（高级设置、会议记录）用 override() 固定某个计算节点的值，取消后恢复按依赖计算；
+#     按依赖计算的值另行记忆（derived()），覆盖期间也可取得，不因覆盖而重复计算
+# 每个节点记录计算与跳过次数，进程内总数导出到 metrics（启用时显示在开发者面板）。
+import threading
+from collections import Counter
+
+import numpy as np
+
+import factors
+import footprint as fp
+import metrics
+import results
+
+# 页面可手动覆盖的计算节点（高级设置；会议记录覆盖会议强度）
+OVERRIDABLE = ("video_intensity", "meeting_intensity", "estimated_phone_carbon", "flight_factor")
+
+# 进程内总数（所有会话）
+_totals = Counter()
+_totals_lock = threading.Lock()
+
+
+def _same(a, b):
+    """判断节点值是否未变化（NumPy 数组按元素比较，无法比较的对象按同一对象判断）"""
+    if a is b:
+        return True
+    if isinstance(a, np.ndarray) or isinstance(b, np.ndarray):
+        return np.array_equal(a, b)
+    try:
+        return bool(a == b)
+    except (TypeError, ValueError):
+        return False
+
+
+class Graph:
+    """带记忆的依赖图（非线程安全：每个会话一份，只在该会话的脚本线程中使用）"""
+
+    def __init__(self):
+        self._inputs = set()
+        self._nodes = {}      # 节点名 -> (依赖列表, 计算函数)
+        self._values = {}     # 节点名 -> 当前值（计算节点为覆盖值或按依赖计算的值）
+        self._versions = {}   # 节点名 -> 当前值的版本号（值变化时加一）
+        self._derived = {}    # 计算节点名 -> 按依赖计算的值
+        self._seen = {}       # 计算节点名 -> 上次计算时各依赖的版本号
+        self._overrides = {}
+        self._epoch = 0       # 输入或覆盖变化时加一
+        self._checked = {}    # 计算节点名 -> 上次检查依赖时的轮次号
+        self.computed = Counter()
+        self.skipped = Counter()
+
+    # ---------- 定义 ----------
+    def input(self, name, value=None):
+        self._inputs.add(name)
+        self._values[name] = value
+        self._versions[name] = 0
+
+    def node(self, name, deps, func):
+        """定义计算节点：func 依次接收 deps 中各节点的值"""
+        self._nodes[name] = (tuple(deps), func)
+        self._versions[name] = 0
+
+    # ---------- 输入与覆盖 ----------
+    def _assign(self, name, value):
+        if name not in self._values or not _same(self._values[name], value):
+            self._values[name] = value
+            self._versions[name] += 1
+            return True
+        return False
+
+    def set(self, name, value):
+        """设置输入节点的值"""
+        if name not in self._inputs:
+            raise KeyError(f"{name} 不是输入节点")
+        if self._assign(name, value):
+            self._epoch += 1
+
+    def update(self, **values):
+        for name, value in values.items():
+            self.set(name, value)
+
+    def override(self, name, value):
+        """手动固定计算节点的值；value 为 None 时取消覆盖"""
+        if name not in self._nodes:
+            raise KeyError(f"{name} 不是计算节点")
+        if value is None:
+            if self._overrides.pop(name, None) is None:
+                return
+        elif name in self._overrides and _same(self._overrides[name], value):
+            return
+        else:
+            self._overrides[name] = value
+        self._epoch += 1
+
+    # ---------- 取值 ----------
+    def derived(self, name):
+        """按依赖计算的值（忽略覆盖）：依赖未变化时返回记忆值"""
+        if self._checked.get(name) == self._epoch:
+            return self._derived[name]
+        self._checked[name] = self._epoch
+        deps, func = self._nodes[name]
+        args = [self.get(dep) for dep in deps]
+        seen = tuple(self._versions[dep] for dep in deps)
+        if self._seen.get(name) == seen:
+            self.skipped[name] += 1
+            with _totals_lock:
+                _totals["skipped"] += 1
+            return self._derived[name]
+        value = self._derived[name] = func(*args)
+        self._seen[name] = seen
+        self.computed[name] += 1
+        with _totals_lock:
+            _totals["computed"] += 1
+        return value
+
+    def get(self, name):
+        """节点的当前值（计算节点有覆盖时取覆盖值）"""
+        if name in self._inputs:
+            return self._values[name]
+        value = self._overrides[name] if name in self._overrides else self.derived(name)
+        self._assign(name, value)
+        return value
+
+    def __getitem__(self, name):
+        return self.get(name)
+
+    def stats(self):
+        """各计算节点的 (节点名, 计算次数, 跳过次数)"""
+        return [(name, self.computed[name], self.skipped[name]) for name in self._nodes]
+
+
+def _scalar(value):
+    return float(value)
+
+
+def build(table=None):
+    """页面的依赖图：侧边栏选项编码与数字习惯为输入，派生参数、计算器结果与各选项卡的分项为计算节点"""
+    g = Graph()
+    g.input("table", table or factors.get())
+    for name in ("phone_brand", "video_platform", "video_quality", "meeting_quality",
+                 "travel_type", "region"):
+        g.input(name, 0)
+    g.input("green_data_center", False)
+    g.input("video", 2.0)
+    g.input("meetings", 3.0)
+    g.input("phone_years", 2)
+    g.input("km", 1000)
+    g.input("trip_km", 750)  # 单次旅行距离（旅行排放因子随之连续变化）
+
+    # 派生参数（侧边栏）
+    g.node("estimated_phone_carbon", ["table", "phone_brand"], lambda t, brand: float(t.phone_carbon[brand]))
+    g.node("video_intensity", ["table", "video_platform", "video_quality"],
+           lambda t, platform, quality: _scalar(fp.derive_video_intensity(platform, quality, t)))
+    g.node("meeting_intensity", ["table", "meeting_quality"],
+           lambda t, quality: _scalar(fp.derive_meeting_intensity(quality, t)))
+    g.node("flight_factor", ["table", "travel_type", "trip_km"],
+           lambda t, travel_type, trip_km: _scalar(fp.derive_flight_factor(travel_type, trip_km, t)))
+    g.node("electricity_carbon", ["table", "region", "green_data_center"],
+           lambda t, region, green: _scalar(fp.derive_electricity_carbon(region, green, t)))
+    g.node("data_volume_intensity", ["table", "video_quality", "region", "green_data_center"],
+           lambda t, quality, region, green: _scalar(fp.derive_data_volume_intensity(quality, region, green, t)))
+
+    # 计算器：碳足迹各分项与减排量（经跨会话结果缓存 results，相同输入的会话共用结果）
+    g.node("footprint", ["video", "meetings", "phone_years", "video_intensity", "meeting_intensity",
+                         "estimated_phone_carbon"], results.footprint)
+    g.node("travel_saving", ["km", "flight_factor", "meetings", "meeting_intensity"], results.travel_saving)
+    for name in ("video_carbon", "meeting_carbon", "phone_carbon", "total"):
+        g.node(name, ["footprint"], lambda f, name=name: f[name])
+    for name in ("flight_carbon", "saving"):
+        g.node(name, ["travel_saving"], lambda s, name=name: s[name])
+    g.node("composition", ["video_carbon", "meeting_carbon", "phone_carbon", "total"],
+           lambda v, m, p, total: sorted(
+               [("视频流媒体", v / total * 100), ("视频会议", m / total * 100), ("手机生产", p / total * 100)]
+               if total > 0 else [("视频流媒体", 0.0), ("视频会议", 0.0), ("手机生产", 0.0)],
+               key=lambda x: x[1], reverse=True))
+
+    # 技术优化情景
+    g.input("green_power_ratio", 50)
+    g.input("compression_improvement", 20)
+    g.node("green_power_reduction", ["video_carbon", "meeting_carbon", "green_power_ratio"],
+           lambda v, m, ratio: (v + m) * (ratio / 100))
+    g.node("compression_reduction", ["video_carbon", "compression_improvement"],
+           lambda v, improvement: v * (improvement / 100))
+
+    # 设备生命周期优化
+    g.input("current_phone_years", 2)
+    g.input("target_phone_years", 3)
+    g.input("device_sharing", 50)
+    g.node("current_annual_phone_carbon", ["estimated_phone_carbon", "current_phone_years"],
+           lambda *a: _scalar(fp.phone_carbon(*a)))
+    g.node("target_annual_phone_carbon", ["estimated_phone_carbon", "target_phone_years"],
+           lambda *a: _scalar(fp.phone_carbon(*a)))
+    g.node("lifetime_reduction", ["current_annual_phone_carbon", "target_annual_phone_carbon"],
+           lambda current, target: current - target)
+    g.node("sharing_reduction", ["phone_carbon", "device_sharing"],
+           lambda p, sharing: p * (sharing / 100) * 0.5)  # 系数调整
+
+    # 自定义参数调整：强度、生产排放与旅行因子按比例调整后各分项的变化
+    g.input("video_adjustment", 0)
+    g.input("phone_adjustment", 0)
+    g.input("flight_adjustment", 0)
+    g.node("video_change", ["video_carbon", "video_adjustment"], lambda v, adj: v * (adj / 100))
+    g.node("phone_change", ["phone_carbon", "phone_adjustment"], lambda p, adj: p * (adj / 100))
+    g.node("flight_change", ["flight_carbon", "flight_adjustment"], lambda f, adj: f * (adj / 100))
+    return g
+
+
+metrics.register("ict_graph_computed_total", "依赖图节点重新计算次数", "counter", lambda: _totals["computed"])
+metrics.register("ict_graph_skipped_total", "依赖图节点因依赖未变化而跳过的次数", "counter",
+                 lambda: _totals["skipped"])
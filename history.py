@@ -0,0 +1,214 @@
+# ==================== 计算历史 ====================
+# 每次计算（碳足迹 / 减排潜力）的输入、所用因子、结果与时间保存到本地 SQLite 数据库
+# （默认 .cache/history.sqlite，环境变量 ICT_HISTORY_DB 指定路径，设为空字符串时不保存）：
+#   - WAL 模式：写入不阻塞页面读取
+#   - 页面只把记录放入队列，由后台线程按批（一个事务）写入，不占用页面重跑时间
+#   - 明细表按 (用户, 时间) 与时间建索引；同一事务内维护按 (用户, 类型, 日期) 汇总的日表，
+#     趋势图只读日表（每天一行），明细按 (时间, id) 键集分页，数千万行时查询耗时与总行数无关
+import atexit
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+import metrics
+
+PATH = os.environ.get(
+    "ICT_HISTORY_DB",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "history.sqlite")
+)
+BATCH_SIZE = 1000      # 每个写事务的最大记录数
+FLUSH_INTERVAL = 0.5   # 秒，队列中记录的最长等待时间
+KINDS = ("footprint", "saving")
+BUCKETS = {"day": "%Y-%m-%d", "week": "%Y-W%W", "month": "%Y-%m"}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS calculations (
+    id INTEGER PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    created_at REAL NOT NULL,          -- Unix 时间（秒）
+    kind TEXT NOT NULL,                -- footprint / saving
+    factors_version TEXT NOT NULL,
+    inputs TEXT NOT NULL,              -- JSON：数字习惯与侧边栏选项
+    factors TEXT NOT NULL,             -- JSON：实际使用的排放因子
+    outputs TEXT NOT NULL,             -- JSON：各分项结果
+    value REAL NOT NULL                -- 合计（footprint）或净减排（saving），kg CO₂
+);
+CREATE INDEX IF NOT EXISTS calculations_user_time ON calculations (user_id, created_at);
+CREATE INDEX IF NOT EXISTS calculations_time ON calculations (created_at);
+CREATE TABLE IF NOT EXISTS daily (
+    user_id TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    day TEXT NOT NULL,                 -- 本地日期 YYYY-MM-DD
+    count INTEGER NOT NULL,
+    sum REAL NOT NULL,
+    min REAL NOT NULL,
+    max REAL NOT NULL,
+    last REAL NOT NULL,
+    PRIMARY KEY (user_id, kind, day)
+) WITHOUT ROWID;
+"""
+
+UPSERT_DAILY = """
+INSERT INTO daily (user_id, kind, day, count, sum, min, max, last) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (user_id, kind, day) DO UPDATE SET
+    count = count + excluded.count,
+    sum = sum + excluded.sum,
+    min = min(min, excluded.min),
+    max = max(max, excluded.max),
+    last = excluded.last
+"""
+
+
+def connect(path):
+    conn = sqlite3.connect(path, timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")  # WAL 模式下只在检查点同步，断电最多丢失最近的事务
+    return conn
+
+
+def write_batch(conn, records):
+    """在一个事务中写入一批记录并更新日表"""
+    daily = {}
+    for r in records:
+        key = (r[0], r[2], time.strftime("%Y-%m-%d", time.localtime(r[1])))
+        value = r[-1]
+        entry = daily.get(key)
+        daily[key] = ((1, value, value, value, value) if entry is None else
+                      (entry[0] + 1, entry[1] + value, min(entry[2], value), max(entry[3], value), value))
+    with conn:
+        conn.executemany(
+            "INSERT INTO calculations (user_id, created_at, kind, factors_version, inputs, factors, outputs, value)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?)", records)
+        conn.executemany(UPSERT_DAILY, [key + entry for key, entry in daily.items()])
+
+
+class HistoryStore:
+    """后台批量写入 + 线程各自的只读连接"""
+
+    def __init__(self, path=PATH, batch_size=BATCH_SIZE, flush_interval=FLUSH_INTERVAL):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue()
+        self._local = threading.local()
+        self._writer = None
+        self._start_lock = threading.Lock()
+        self.written = 0
+        self.errors = 0
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with connect(path) as conn:
+            conn.executescript(SCHEMA)
+        conn.close()
+
+    # ---------- 写入 ----------
+    def record(self, user_id, kind, inputs, factors, outputs, factors_version, created_at=None):
+        """放入写入队列后立即返回"""
+        value = outputs["total"] if kind == "footprint" else outputs["saving"]
+        self._queue.put((
+            user_id, time.time() if created_at is None else created_at, kind, factors_version,
+            json.dumps(inputs, ensure_ascii=False), json.dumps(factors), json.dumps(outputs), float(value),
+        ))
+        if self._writer is None:
+            with self._start_lock:
+                if self._writer is None:
+                    self._writer = threading.Thread(target=self._run, name="history-writer", daemon=True)
+                    self._writer.start()
+
+    def _run(self):
+        conn = connect(self.path)
+        while True:
+            records = [self._queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while len(records) < self.batch_size:
+                try:
+                    records.append(self._queue.get(timeout=max(deadline - time.monotonic(), 0)))
+                except queue.Empty:
+                    break
+            try:
+                write_batch(conn, records)
+                self.written += len(records)
+            except sqlite3.Error:
+                self.errors += len(records)
+            finally:
+                for _ in records:
+                    self._queue.task_done()
+
+    def pending(self):
+        return self._queue.qsize()
+
+    def flush(self):
+        """等待队列中的记录全部写入"""
+        self._queue.join()
+
+    # ---------- 查询 ----------
+    def _reader(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = connect(self.path)
+        return conn
+
+    def trend(self, user_id, kind, bucket="day", since=None):
+        """按日/周/月汇总的趋势：[(周期, 次数, 平均值, 最小值, 最大值)]，只读日表"""
+        sql = (f"SELECT strftime('{BUCKETS[bucket]}', day) AS period, sum(count), sum(sum) / sum(count),"
+               " min(min), max(max) FROM daily WHERE user_id = ? AND kind = ?")
+        params = [user_id, kind]
+        if since is not None:
+            sql += " AND day >= ?"
+            params.append(since)
+        return self._reader().execute(sql + " GROUP BY period ORDER BY period", params).fetchall()
+
+    def page(self, user_id, limit=20, before=None):
+        """最近的计算记录（新到旧）；before 为上一页最后一条的 (created_at, id)，用于键集分页"""
+        sql = ("SELECT id, created_at, kind, factors_version, inputs, outputs, value FROM calculations"
+               " WHERE user_id = ?")
+        params = [user_id]
+        if before is not None:
+            sql += " AND (created_at, id) < (?, ?)"
+            params.extend(before)
+        rows = self._reader().execute(sql + " ORDER BY created_at DESC, id DESC LIMIT ?", params + [limit])
+        return [{
+            "id": row[0], "created_at": row[1], "kind": row[2], "factors_version": row[3],
+            "inputs": json.loads(row[4]), "outputs": json.loads(row[5]), "value": row[6],
+        } for row in rows]
+
+    def count(self, user_id):
+        """用户的记录总数（由日表求和）"""
+        return self._reader().execute("SELECT coalesce(sum(count), 0) FROM daily WHERE user_id = ?",
+                                      (user_id,)).fetchone()[0]
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def store():
+    """进程内共享的历史库（首次使用时打开）；未启用时返回 None"""
+    global _store
+    if not PATH:
+        return None
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = HistoryStore(PATH)
+                atexit.register(_store.flush)
+    return _store
+
+
+def record(user_id, kind, inputs, factors, outputs, factors_version):
+    """记录一次计算（未启用时为空操作）"""
+    s = store()
+    if s is not None:
+        s.record(user_id, kind, inputs, factors, outputs, factors_version)
+
+
+metrics.register("ict_history_written_total", "已写入历史库的记录数", "counter",
+                 lambda: _store.written if _store else 0)
+metrics.register("ict_history_errors_total", "写入失败的记录数", "counter",
+                 lambda: _store.errors if _store else 0)
+metrics.register("ict_history_pending", "等待写入的记录数", "gauge",
+                 lambda: _store.pending() if _store else 0)
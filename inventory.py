@@ -0,0 +1,236 @@
+# ==================== 设备清单（家庭/机构） ====================
+# 页面只计算一部手机（品牌 + 换机周期）。本模块按台记录手机、笔记本电脑、显示器、平板电脑、路由器等设备，
+# 计算每台设备的年化排放：
+#   生产排放分摊 = 生产碳排放 / 使用年限
+#   使用排放     = 功率(W) × 每天使用小时 × 365 / 1000 × 电力碳强度（electricity_carbon，按设备所在地区）
+# 清单以结构数组保存：每列一个定长类型的 NumPy 数组（类型、地区为 uint8，归属为 uint32，
+# 其余为 float32），每台设备 22 字节，不为每台设备创建 Python 对象，1000万台约 220 MB；
+# 每种分组首次汇总时以 np.bincount 整列累加一次部分和（台数、生产排放分摊、按地区分开的年耗电量）并缓存，
+# 之后任意电力碳强度下的汇总只是对部分和的矩阵运算，按类型/地区在毫秒内完成。
+#
+# CSV 第一行为表头：device_type（设备类型，见 DEVICE_TYPES）、region（地区，与侧边栏标签相同，
+# 默认“中国（中等偏上）”）、owner（家庭/部门编号，默认0）、count（台数，默认1）；
+# embodied_carbon、lifetime_years、power_w、hours_per_day 可选，缺失或为空时取该类型的典型值。
+import csv
+import io
+from dataclasses import dataclass
+
+import numpy as np
+
+import factors
+import footprint as fp
+
+DEVICE_TYPES = ("手机", "笔记本电脑", "显示器", "平板电脑", "路由器")
+# 各类型的典型值（按 DEVICE_TYPES 顺序）：生产碳排放 kg CO₂、使用年限、使用时平均功率 W、每天使用小时
+CATALOG = {
+    "embodied_carbon": np.array([70, 300, 350, 100, 40], dtype=np.float32),
+    "lifetime_years": np.array([3, 4, 6, 4, 5], dtype=np.float32),
+    "power_w": np.array([2, 30, 25, 5, 8], dtype=np.float32),
+    "hours_per_day": np.array([4, 8, 8, 2, 24], dtype=np.float32),
+}
+SPEC_COLUMNS = tuple(CATALOG)
+DEFAULT_REGION = "中国（中等偏上）"
+GROUPS = ("device_type", "region", "owner")
+DTYPES = {
+    "device_type": np.uint8,
+    "region": np.uint8,
+    "owner": np.uint32,
+    "embodied_carbon": np.float32,
+    "lifetime_years": np.float32,
+    "power_w": np.float32,
+    "hours_per_day": np.float32,
+}
+
+
+@dataclass(frozen=True)
+class Inventory:
+    """设备清单（结构数组）：第 i 台设备为各列的第 i 个元素"""
+    device_type: np.ndarray      # uint8，DEVICE_TYPES 中的编码
+    region: np.ndarray           # uint8，因子表 regions 中的编码
+    owner: np.ndarray            # uint32，家庭/部门编号
+    embodied_carbon: np.ndarray  # float32，kg CO₂
+    lifetime_years: np.ndarray   # float32
+    power_w: np.ndarray          # float32
+    hours_per_day: np.ndarray    # float32
+
+    def __post_init__(self):
+        n = len(self.device_type)
+        for name, dtype in DTYPES.items():
+            column = np.ascontiguousarray(np.broadcast_to(getattr(self, name), n), dtype=dtype)
+            object.__setattr__(self, name, column)
+        if n and (self.lifetime_years.min() <= 0):
+            raise ValueError("使用年限必须大于0")
+        object.__setattr__(self, "_cache", {})  # 分组部分和（清单不可变，计算一次即可）
+
+    def __len__(self):
+        return len(self.device_type)
+
+    @property
+    def nbytes(self):
+        return sum(getattr(self, name).nbytes for name in DTYPES)
+
+    # ---------- 年化排放（每台设备） ----------
+    def annual_embodied(self):
+        """生产排放分摊（kg CO₂/年）"""
+        return self.embodied_carbon / self.lifetime_years
+
+    def annual_energy(self):
+        """年耗电量（kWh）"""
+        return self.power_w * self.hours_per_day * np.float32(365 / 1000)
+
+    def annual_use(self, electricity_carbon=None, table=None):
+        """使用排放（kg CO₂/年）：electricity_carbon 为标量或按地区编码的数组，默认为各地区的电力碳强度"""
+        regional = regional_carbon(electricity_carbon, table)
+        return self.annual_energy() * regional.astype(np.float32)[self.region]
+
+    def _sums(self, by, regions):
+        """分组部分和 (台数[g], 生产排放分摊[g], 年耗电量[g, 地区])，首次调用时整列累加一次后缓存。
+        使用排放对各地区的电力碳强度是线性的，按地区分开累加耗电量后，任意碳强度下的汇总只需一次矩阵乘法"""
+        key = by or "device_type"  # 合计由按类型的部分和相加
+        if (key, regions) in self._cache:
+            return self._cache[key, regions]
+        keys = getattr(self, key)
+        groups = {"device_type": len(DEVICE_TYPES), "region": regions}.get(key)
+        if groups is None:
+            groups = int(keys.max()) + 1 if len(self) else 0
+        energy = np.bincount(keys.astype(np.intp) * regions + self.region, weights=self.annual_energy(),
+                             minlength=groups * regions)
+        sums = (np.bincount(keys, minlength=groups),
+                np.bincount(keys, weights=self.annual_embodied(), minlength=groups).astype(np.float64),
+                energy.astype(np.float64).reshape(groups, regions))
+        for array in sums:
+            array.setflags(write=False)  # 汇总结果直接返回缓存的数组
+        self._cache[key, regions] = sums
+        return sums
+
+    def summary(self, by=None, electricity_carbon=None, table=None):
+        """年化排放汇总：返回 dict（devices / embodied / use / total）；
+        by 为 None 时为合计（标量），否则为按 device_type / region / owner 分组的数组（下标即编码）；
+        electricity_carbon 为标量或按地区编码的数组，默认为各地区的电力碳强度"""
+        if by is not None and by not in GROUPS:
+            raise ValueError(f"by 应为 {GROUPS} 之一，实际为 {by!r}")
+        regional = regional_carbon(electricity_carbon, table)
+        devices, embodied, energy = self._sums(by, len(regional))
+        result = {"devices": devices, "embodied": embodied, "use": energy @ regional}
+        if by is None:
+            result = {"devices": int(devices.sum()), "embodied": float(embodied.sum()),
+                      "use": float(result["use"].sum())}
+        result["total"] = result["embodied"] + result["use"]
+        return result
+
+    # ---------- 保存与读取 ----------
+    def save(self, path):
+        """保存为 .npz（各列原样保存）"""
+        np.savez(path, **{name: getattr(self, name) for name in DTYPES})
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls(**{name: data[name] for name in DTYPES})
+
+
+def regional_carbon(electricity_carbon=None, table=None):
+    """按地区编码的电力碳强度（kg CO₂/kWh）：默认取因子表各地区的值；标量对所有地区相同"""
+    t = table or factors.get()
+    if electricity_carbon is None:
+        # 终端设备的用电与数据中心是否使用绿电无关
+        return fp.derive_electricity_carbon(np.arange(len(t.regions)), False, t).astype(np.float64)
+    return np.broadcast_to(np.asarray(electricity_carbon, dtype=np.float64), len(t.regions))
+
+
+def from_types(device_type, region, owner=0, **specs):
+    """由各设备的类型编码生成清单；未给出的参数（SPEC_COLUMNS）取该类型的典型值"""
+    device_type = np.asarray(device_type, dtype=np.uint8)
+    columns = {name: specs[name] if specs.get(name) is not None else CATALOG[name][device_type]
+               for name in SPEC_COLUMNS}
+    return Inventory(device_type, region, owner, **columns)
+
+
+def from_counts(counts, region, owner=0, **specs):
+    """按类型台数生成清单（如一个家庭）；specs 为按类型给出的参数（长度与 DEVICE_TYPES 相同）"""
+    counts = np.asarray(counts, dtype=np.intp)
+    device_type = np.repeat(np.arange(len(DEVICE_TYPES), dtype=np.uint8), counts)
+    columns = {name: np.repeat(np.asarray(specs[name] if specs.get(name) is not None else CATALOG[name],
+                                          dtype=np.float32), counts)
+               for name in SPEC_COLUMNS}
+    return Inventory(device_type, region, owner, **columns)
+
+
+def concat(inventories):
+    """合并多个清单"""
+    return Inventory(**{name: np.concatenate([getattr(inv, name) for inv in inventories]) for name in DTYPES})
+
+
+def _number(text):
+    try:
+        return float(text)
+    except ValueError:
+        return np.nan
+
+
+def _integers(values, name, lines, high=None):
+    """把一列文本转换为非负整数（int64），非整数、负数或超过 high 时抛出 ValueError（lines 为各值所在行号）"""
+    numbers = np.array([_number(value) for value in values], dtype=np.float64)
+    limit = np.iinfo(np.int64).max if high is None else high
+    bad = np.flatnonzero(~((numbers == np.round(numbers)) & (numbers >= 0) & (numbers <= limit)))
+    if len(bad):
+        expected = "非负整数" if high is None else f"0–{high} 的整数"
+        raise ValueError(f"第 {lines[bad[0]]} 行：{name} 应为{expected}，实际为 {values[bad[0]]!r}")
+    return numbers.astype(np.int64)
+
+
+def _specs(values, name, lines, positive=False):
+    """把一列设备参数文本转换为数值，空白为 NaN（取典型值）；非数值、非有限值、负数（positive 时为非正数）
+    抛出 ValueError（lines 为各值所在行号）"""
+    numbers = np.array([_number(value) if value else np.nan for value in values], dtype=np.float64)
+    valid = np.isfinite(numbers) & ((numbers > 0) if positive else (numbers >= 0))
+    bad = np.flatnonzero(~valid & np.array([bool(value) for value in values], dtype=bool))
+    if len(bad):
+        expected = "有限的正数" if positive else "有限的非负数"
+        raise ValueError(f"第 {lines[bad[0]]} 行：{name} 应为{expected}，实际为 {values[bad[0]]!r}")
+    return numbers
+
+
+def read_inventory(f, table=None):
+    """读取设备清单CSV（文本文件对象）"""
+    t = table or factors.get()
+    reader = csv.reader(f)
+    header = [name.strip() for name in next(reader, [])]
+    if not header:
+        raise ValueError("设备清单为空")
+    if "device_type" not in header:
+        raise ValueError("设备清单需要 device_type 列")
+    rows, lines = [], []
+    for row in reader:
+        if not row:
+            continue
+        if len(row) != len(header):
+            raise ValueError(f"第 {reader.line_num} 行有 {len(row)} 列，表头有 {len(header)} 列")
+        rows.append(row)
+        lines.append(reader.line_num)
+
+    def column(name, default):
+        if name in header:
+            i = header.index(name)
+            return [row[i].strip() or default for row in rows]
+        return [default] * len(rows)
+
+    count = _integers(column("count", "1"), "count", lines)
+    owner = _integers(column("owner", "0"), "owner", lines, np.iinfo(np.uint32).max)
+    device_type = fp.encode(column("device_type", ""), DEVICE_TYPES)
+    specs = {}
+    for name in SPEC_COLUMNS:
+        # 空白处取该类型的典型值
+        values = _specs(column(name, ""), name, lines, positive=name == "lifetime_years")
+        specs[name] = np.where(np.isnan(values), CATALOG[name][device_type], values).astype(np.float32)
+    inventory = from_types(device_type, fp.encode(column("region", DEFAULT_REGION), t.regions),
+                           owner, **specs)
+    if (count == 1).all():
+        return inventory
+    return Inventory(**{name: np.repeat(getattr(inventory, name), count) for name in DTYPES})
+
+
+def read_bytes(content, table=None):
+    """页面上传的文件内容（bytes）"""
+    with io.TextIOWrapper(io.BytesIO(content), encoding="utf-8-sig", newline="") as f:
+        return read_inventory(f, table)
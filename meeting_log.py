@@ -0,0 +1,291 @@
+# ==================== 会议记录导入 ====================
+# 用法：python meeting_log.py calendar.ics|calendar.csv summary.csv [--by person|team|week]
+#                             [--chunk-size 100000] [--factors-version 2023.1]
+#
+# 页面公式 meeting_carbon = 每周时长 × 强度 × 52 假设每周会议量恒定；本模块改为读取日历导出的
+# 实际会议，逐场计算排放，并与每场会议替代的差旅比较：
+#   会议排放 = 时长(小时) × 参会人数 × 会议基准强度 × 会议质量系数
+#   差旅排放 = 每位出行者的往返距离 × 出行人数 × 出行方式排放因子（随单程距离连续变化，见 fp.derive_flight_factor）
+#   减排量   = 差旅排放 − 会议排放（只对替代了差旅的会议计算）
+# 文件按行流式解析，每次只处理 chunk_size 场会议，按人员/团队/周用 np.unique + np.bincount
+# 向量化分组累加，内存占用只与分组数有关，与文件大小无关（可处理数百万场会议）。
+#
+# CSV 第一行为表头：
+#   start（开始时间，ISO 8601，如 2024-03-05 09:30）、duration_minutes（或 end）、
+#   participants（参会人数，默认1）、quality（会议质量，与侧边栏标签相同，默认“平衡模式”）、
+#   person、team、travel_km（每位出行者被替代的往返距离，默认0）、travelers（出行人数，默认0）、
+#   travel_type（被替代的出行方式，默认“国内航班”）
+# ICS 读取 VEVENT 的 DTSTART、DTEND/DURATION、ORGANIZER（人员）、ATTENDEE（人数）、CATEGORIES（团队），
+# 以及可选的 X-ICT-QUALITY、X-ICT-TRAVEL-KM、X-ICT-TRAVELERS、X-ICT-TRAVEL-TYPE；
+# 全天事件不是会议，跳过；时间按文件中的本地时间处理，不做时区换算。
+# 每行（每个事件）的排放整体计入该行的人员/团队：每场会议一行时计入组织者，每位参会者一行
+# （participants=1）时即为各人自己的份额。
+import argparse
+import csv
+import io
+import re
+import sys
+from itertools import islice
+
+import numpy as np
+
+import factors
+import footprint as fp
+
+DIMENSIONS = ("person", "team", "week")
+VALUE_COLUMNS = ["meetings", "hours", "participant_hours", "meeting_carbon", "travel_carbon", "saving"]
+DEFAULTS = {
+    "participants": "1",
+    "quality": "平衡模式",
+    "person": "",
+    "team": "",
+    "travel_km": "0",
+    "travelers": "0",
+    "travel_type": "国内航班",
+}
+
+
+# ==================== 解析 ====================
+def _iter_chunks(records, chunk_size):
+    while True:
+        rows = list(islice(records, chunk_size))
+        if not rows:
+            return
+        yield rows
+
+
+def _csv_records(f):
+    reader = csv.reader(f)
+    header = [name.strip() for name in next(reader, [])]
+    if not header:
+        raise ValueError("会议记录为空")
+    if "start" not in header or not ({"duration_minutes", "end"} & set(header)):
+        raise ValueError("会议CSV需要 start 列以及 duration_minutes 或 end 列")
+    for row in reader:
+        if not row:
+            continue
+        if len(row) != len(header):
+            raise ValueError(f"第 {reader.line_num} 行有 {len(row)} 列，表头有 {len(header)} 列")
+        yield dict(zip(header, row))
+
+
+_DURATION = re.compile(r"P(?:(\d+)W)?(?:(\d+)D)?(?:T(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?)?$")
+
+
+def _ics_time(value):
+    """20240305T093000(Z) -> 2024-03-05T09:30:00；全天日期返回 None"""
+    value = value.rstrip("Z")
+    if "T" not in value:
+        return None
+    return f"{value[0:4]}-{value[4:6]}-{value[6:8]}T{value[9:11]}:{value[11:13]}:{value[13:15] or '00'}"
+
+
+def _ics_minutes(duration):
+    match = _DURATION.match(duration.strip().lstrip("+"))
+    if not match:
+        raise ValueError(f"无法解析的 DURATION: {duration}")
+    weeks, days, hours, minutes, seconds = (int(x or 0) for x in match.groups())
+    return ((weeks * 7 + days) * 24 + hours) * 60 + minutes + seconds / 60
+
+
+def _ics_lines(f):
+    """展开折行（以空格或制表符开头的行接续上一行）"""
+    current = None
+    for line in f:
+        line = line.rstrip("\r\n")
+        if line[:1] in (" ", "\t") and current is not None:
+            current += line[1:]
+            continue
+        if current is not None:
+            yield current
+        current = line
+    if current is not None:
+        yield current
+
+
+def _ics_records(f):
+    event = None
+    for line in _ics_lines(f):
+        if line == "BEGIN:VEVENT":
+            event = {"attendees": []}
+            continue
+        if event is None:
+            continue
+        if line == "END:VEVENT":
+            record = _ics_event(event)
+            if record is not None:
+                yield record
+            event = None
+            continue
+        name, _, value = line.partition(":")
+        name = name.split(";", 1)[0].upper()
+        if name == "ATTENDEE":
+            event["attendees"].append(value.lower())
+        else:
+            event[name] = value
+
+
+def _ics_event(event):
+    start = _ics_time(event.get("DTSTART", ""))
+    if start is None:
+        return None
+    if "DTEND" in event:
+        end = _ics_time(event["DTEND"])
+        minutes = (np.datetime64(end) - np.datetime64(start)) / np.timedelta64(1, "m")
+    else:
+        minutes = _ics_minutes(event.get("DURATION", "PT0M"))
+    organizer = event.get("ORGANIZER", "")
+    attendees = event["attendees"]
+    participants = len(attendees) + (1 if organizer and organizer.lower() not in attendees else 0)
+    return {
+        "start": start,
+        "duration_minutes": str(minutes),
+        "participants": str(max(participants, 1)),
+        "quality": event.get("X-ICT-QUALITY", DEFAULTS["quality"]),
+        "person": re.sub(r"^mailto:", "", organizer, flags=re.IGNORECASE),
+        "team": event.get("CATEGORIES", "").split(",")[0],
+        "travel_km": event.get("X-ICT-TRAVEL-KM", "0"),
+        "travelers": event.get("X-ICT-TRAVELERS", "0"),
+        "travel_type": event.get("X-ICT-TRAVEL-TYPE", DEFAULTS["travel_type"]),
+    }
+
+
+def read_chunks(f, fmt, chunk_size=100_000):
+    """从文本文件流式读取会议记录，每次产出 chunk_size 条（dict 列表）；fmt 为 "csv" 或 "ics" """
+    records = _csv_records(f) if fmt == "csv" else _ics_records(f)
+    return _iter_chunks(records, chunk_size)
+
+
+# ==================== 逐场计算 ====================
+def _column(rows, name):
+    default = DEFAULTS.get(name, "")
+    return [row.get(name) or default for row in rows]
+
+
+def meeting_emissions(rows, table=None):
+    """一块会议记录的逐场结果：开始时间、各数值列（与 VALUE_COLUMNS 对应）及分组标签"""
+    t = table or factors.get()
+    start = np.array(_column(rows, "start"), dtype="datetime64[m]")
+    if rows and "duration_minutes" in rows[0]:
+        minutes = np.array(_column(rows, "duration_minutes"), dtype=np.float64)
+    else:
+        minutes = (np.array(_column(rows, "end"), dtype="datetime64[m]") - start).astype(np.float64)
+    hours = np.maximum(minutes, 0) / 60
+    participants = np.array(_column(rows, "participants"), dtype=np.float64)
+    quality = fp.encode(_column(rows, "quality"), t.meeting_qualities)
+    travel_km = np.array(_column(rows, "travel_km"), dtype=np.float64)
+    travelers = np.array(_column(rows, "travelers"), dtype=np.float64)
+    travel_type = fp.encode(_column(rows, "travel_type"), t.travel_types)
+
+    participant_hours = hours * participants
+    meeting_carbon = participant_hours * t.base_meeting_intensity * t.meeting_factor[quality]
+    # travel_km 为往返距离，排放因子曲线按单程距离定义
+    travel_carbon = travel_km * travelers * fp.derive_flight_factor(travel_type, travel_km / 2, t)
+    saving = np.where(travelers > 0, travel_carbon - meeting_carbon, 0.0)
+
+    # 周标签：该周周一的日期（1970-01-01 为周四）
+    days = start.astype("datetime64[D]")
+    monday = days - (days.astype(np.int64) + 3) % 7
+    labels = {
+        "person": np.array(_column(rows, "person"), dtype=str),
+        "team": np.array(_column(rows, "team"), dtype=str),
+        "week": monday.astype(str),
+    }
+    values = np.vstack([np.ones_like(hours), hours, participant_hours, meeting_carbon, travel_carbon, saving])
+    return start, values, labels
+
+
+# ==================== 分组汇总 ====================
+class GroupSums:
+    """按标签分组累加：每块内 np.unique 得到组内编号，再用 np.bincount 一次累加各数值列"""
+
+    def __init__(self):
+        self.index = {}  # 标签 -> 组编号
+        self.sums = np.zeros((len(VALUE_COLUMNS), 0))
+
+    def add(self, labels, values):
+        uniques, inverse = np.unique(labels, return_inverse=True)
+        ids = np.array([self.index.setdefault(label, len(self.index)) for label in uniques.tolist()],
+                       dtype=np.intp)
+        if len(self.index) > self.sums.shape[1]:
+            grown = np.zeros((len(VALUE_COLUMNS), max(len(self.index), 2 * self.sums.shape[1])))
+            grown[:, :self.sums.shape[1]] = self.sums
+            self.sums = grown
+        groups = ids[inverse.ravel()]
+        for row, column in zip(self.sums, values):
+            row += np.bincount(groups, column, minlength=len(row))
+
+    def rows(self):
+        """[(标签, {列名: 合计})]，按标签排序"""
+        return [(label, dict(zip(VALUE_COLUMNS, self.sums[:, i].tolist())))
+                for label, i in sorted(self.index.items())]
+
+
+def summarize(f, fmt, chunk_size=100_000, table=None, dimensions=DIMENSIONS):
+    """流式汇总整个会议记录文件"""
+    groups = {name: GroupSums() for name in dimensions}
+    totals = np.zeros(len(VALUE_COLUMNS))
+    first = last = None
+    for rows in read_chunks(f, fmt, chunk_size):
+        start, values, labels = meeting_emissions(rows, table)
+        totals += values.sum(axis=1)
+        first = start.min() if first is None else min(first, start.min())
+        last = start.max() if last is None else max(last, start.max())
+        for name in dimensions:
+            groups[name].add(labels[name], values)
+    # 记录覆盖的周数（至少1周），用于折算为每周/每年
+    weeks = 1.0 if first is None else max((last - first) / np.timedelta64(1, "D") + 1, 7) / 7
+    return {
+        "groups": groups,
+        "totals": dict(zip(VALUE_COLUMNS, totals.tolist())),
+        "weeks": float(weeks),
+    }
+
+
+def personal_profile(summary):
+    """把一个人的会议记录折算为页面使用的“每周会议时长”（参会人·小时）与按实际会议加权的会议强度
+    （每参会人·小时），两者相乘再乘52即为记录折算到每年的会议排放"""
+    totals = summary["totals"]
+    weekly_hours = totals["participant_hours"] / summary["weeks"]
+    intensity = totals["meeting_carbon"] / totals["participant_hours"] if totals["participant_hours"] else 0.0
+    return weekly_hours, intensity
+
+
+def detect_format(name):
+    return "ics" if name.lower().endswith((".ics", ".ical", ".ifb")) else "csv"
+
+
+def summarize_bytes(content, name, table=None):
+    """页面上传的文件内容（bytes）"""
+    with io.TextIOWrapper(io.BytesIO(content), encoding="utf-8-sig", newline="") as f:
+        return summarize(f, detect_format(name), table=table)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="由日历导出（ICS/CSV）逐场计算会议排放与替代差旅的减排量")
+    parser.add_argument("input", help="会议记录文件（.ics 或 .csv，UTF-8）")
+    parser.add_argument("output", help="汇总结果CSV文件")
+    parser.add_argument("--by", choices=DIMENSIONS, default="team", help="汇总维度（默认 team）")
+    parser.add_argument("--chunk-size", type=int, default=100_000, help="每块会议数（默认100000）")
+    parser.add_argument("--factors-version", default=None,
+                        help=f"排放因子版本（可选：{', '.join(factors.versions())}；默认最新）")
+    args = parser.parse_args(argv)
+
+    table = factors.get(args.factors_version)
+    with open(args.input, newline="", encoding="utf-8-sig") as f:
+        summary = summarize(f, detect_format(args.input), args.chunk_size, table, dimensions=(args.by,))
+
+    with open(args.output, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow([args.by] + VALUE_COLUMNS)
+        for label, sums in summary["groups"][args.by].rows():
+            writer.writerow([label, int(sums["meetings"])] + [f"{sums[name]:.3f}" for name in VALUE_COLUMNS[1:]])
+
+    totals = summary["totals"]
+    print(f"共 {int(totals['meetings'])} 场会议，{totals['hours']:.1f} 小时（{summary['weeks']:.1f} 周）；"
+          f"会议排放 {totals['meeting_carbon']:.1f} kg，替代差旅排放 {totals['travel_carbon']:.1f} kg，"
+          f"净减排 {totals['saving']:.1f} kg -> {args.output}（排放因子版本 {table.version}）", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+# ==================== 重跑性能指标 ====================
+# 可选的页面插桩：设置环境变量 ICT_METRICS=1 后启用，默认关闭（关闭时各计时点为空操作）。
+#   - 每次页面重跑记录各部分耗时与重跑期间的内存分配峰值（tracemalloc）
+#   - 进程内按部分汇总为计数器与直方图，供页面底部的开发者面板显示
+#   - 汇总结果以 Prometheus 文本格式定期写入本地文件（默认 .cache/metrics.prom），
+#     可由 node_exporter 的 textfile collector 等方式采集，用于观察线上性能回退
+# 注意：tracemalloc 统计的是整个进程，多个会话同时重跑时内存峰值会相互叠加，只能作近似参考。
+import bisect
+import functools
+import os
+import tempfile
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+
+ENABLED = os.environ.get("ICT_METRICS", "") not in ("", "0")
+METRICS_FILE = os.environ.get(
+    "ICT_METRICS_FILE",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "metrics.prom")
+)
+EXPORT_INTERVAL = 5.0  # 秒，两次写文件的最小间隔
+
+SECONDS_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BYTES_BUCKETS = tuple(m * 10 ** e for e in range(5, 10) for m in (1, 2.5, 5))  # 100KB - 5GB
+
+
+class Histogram:
+    """累积直方图（Prometheus 语义：各桶为 ≤ 上界的累计次数）"""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # 最后一个为 +Inf
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    @property
+    def count(self):
+        return sum(self.counts)
+
+    def cumulative(self):
+        total = 0
+        for bound, n in zip(self.buckets + (float("inf"),), self.counts):
+            total += n
+            yield bound, total
+
+
+# 进程内汇总（所有会话共享）
+_lock = threading.Lock()
+_reruns = 0
+_sections = {}  # 部分名称 -> Histogram（秒）
+_rerun_seconds = Histogram(SECONDS_BUCKETS)
+_rerun_peak_bytes = Histogram(BYTES_BUCKETS)
+_last_export = 0.0
+_collectors = []  # 其他模块登记的计数器/仪表：(名称, 说明, 类型, 取值函数)
+
+# 当前重跑（每个会话的脚本在各自线程中运行）
+_local = threading.local()
+
+if ENABLED and not tracemalloc.is_tracing():
+    tracemalloc.start()
+
+
+def _record(name, seconds):
+    with _lock:
+        histogram = _sections.get(name)
+        if histogram is None:
+            histogram = _sections[name] = Histogram(SECONDS_BUCKETS)
+        histogram.observe(seconds)
+    rerun = getattr(_local, "rerun", None)
+    if rerun is not None:
+        rerun["sections"][name] = rerun["sections"].get(name, 0.0) + seconds
+
+
+@contextmanager
+def _timed_section(name):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _record(name, time.perf_counter() - start)
+
+
+def register(name, help_text, kind, func):
+    """登记由其他模块维护的计数器（counter）或仪表（gauge），导出时调用 func() 取当前值"""
+    _collectors.append((name, help_text, kind, func))
+
+
+def section(name):
+    """计时一个页面部分：with metrics.section("sidebar"): ..."""
+    return _timed_section(name) if ENABLED else nullcontext()
+
+
+def timed(name):
+    """计时整个函数的装饰器；用于 st.fragment 片段，片段单独重跑时同样计时"""
+    def decorator(func):
+        if not ENABLED:
+            return func
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with _timed_section(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def begin_rerun():
+    """页面脚本开始时调用"""
+    if not ENABLED:
+        return
+    tracemalloc.reset_peak()
+    _local.rerun = {
+        "start": time.perf_counter(),
+        "memory": tracemalloc.get_traced_memory()[0],
+        "sections": {},
+    }
+
+
+def end_rerun():
+    """页面脚本结束时调用，返回本次重跑的记录（未启用时返回 None）"""
+    global _reruns
+    rerun = getattr(_local, "rerun", None)
+    if not ENABLED or rerun is None:
+        return None
+    _local.rerun = None
+    rerun["seconds"] = time.perf_counter() - rerun["start"]
+    rerun["peak_bytes"] = max(tracemalloc.get_traced_memory()[1] - rerun["memory"], 0)
+    with _lock:
+        _reruns += 1
+        _rerun_seconds.observe(rerun["seconds"])
+        _rerun_peak_bytes.observe(rerun["peak_bytes"])
+    if time.monotonic() - _last_export >= EXPORT_INTERVAL:
+        export()
+    return rerun
+
+
+def reruns():
+    """本进程累计的完整重跑次数"""
+    return _reruns
+
+
+def summary():
+    """各部分的汇总统计：[(名称, 次数, 平均秒, 最大秒)]"""
+    with _lock:
+        return [(name, h.count, h.sum / h.count, h.max) for name, h in sorted(_sections.items())]
+
+
+def _histogram_lines(name, histogram, labels=""):
+    prefix = labels + "," if labels else ""
+    lines = [f'{name}_bucket{{{prefix}le="{"+Inf" if bound == float("inf") else f"{bound:g}"}"}} {n}'
+             for bound, n in histogram.cumulative()]
+    suffix = f"{{{labels}}}" if labels else ""
+    lines.append(f"{name}_sum{suffix} {histogram.sum:.6f}")
+    lines.append(f"{name}_count{suffix} {histogram.count}")
+    return lines
+
+
+def render():
+    """以 Prometheus 文本格式输出当前汇总"""
+    with _lock:
+        lines = [
+            "# HELP ict_reruns_total 页面完整重跑次数",
+            "# TYPE ict_reruns_total counter",
+            f"ict_reruns_total {_reruns}",
+            "# HELP ict_rerun_seconds 每次完整重跑耗时（秒）",
+            "# TYPE ict_rerun_seconds histogram",
+            *_histogram_lines("ict_rerun_seconds", _rerun_seconds),
+            "# HELP ict_rerun_peak_bytes 每次重跑期间的内存分配峰值（字节，tracemalloc）",
+            "# TYPE ict_rerun_peak_bytes histogram",
+            *_histogram_lines("ict_rerun_peak_bytes", _rerun_peak_bytes),
+            "# HELP ict_section_seconds 页面各部分耗时（秒），含片段单独重跑",
+            "# TYPE ict_section_seconds histogram",
+        ]
+        for name, histogram in sorted(_sections.items()):
+            lines.extend(_histogram_lines("ict_section_seconds", histogram, f'section="{name}"'))
+    for name, help_text, kind, func in _collectors:
+        lines.extend([f"# HELP {name} {help_text}", f"# TYPE {name} {kind}", f"{name} {func()}"])
+    return "\n".join(lines) + "\n"
+
+
+def export(path=None):
+    """原子地写出指标文件（先写临时文件再替换，采集方不会读到半个文件）"""
+    global _last_export
+    path = path or METRICS_FILE
+    _last_export = time.monotonic()
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix=".prom")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write(render())
+    os.chmod(tmp, 0o644)
+    os.replace(tmp, path)
@@ -0,0 +1,126 @@
+# ==================== 多年情景预测 ====================
+# 页面把设备生产排放按 “碳排放 / 换机周期” 作为稳态年均值，电网强度与视频画质也固定不变。
+# 本模块逐年（默认 2025-2050）预测：
+#   - 设备更替队列：按年龄分组跟踪在用设备，每年达到换机周期的设备被替换，新购设备计入当年生产排放；
+#     换机周期在过渡期内由当前值线性变为目标值，延长周期的头几年几乎无人换机，队列模型能体现这一点
+#     （稳态下每年新购 1/周期 台，与页面的年均值一致）
+#   - 电网脱碳：各地区电网强度按年降幅指数下降，视频与会议耗电量由基准强度折算（见 timeseries.py）
+#   - 画质升级：画质档位每年上升 quality_growth 档，非整数档位表示相邻两档的用户占比
+# 所有结果为 (路径数, 年数[, 地区数]) 的数组：电网与画质部分一次广播计算，设备队列只对年份循环，
+# 每一步对全部路径向量化，数千条路径在数毫秒内完成。
+import numpy as np
+
+import factors
+import footprint as fp
+from timeseries import REFERENCE_GRID
+
+YEARS = np.arange(2025, 2051)
+
+
+def lifetimes(current_years, target_years, transition_years, years=YEARS):
+    """各年的换机周期 (路径数, 年数)：过渡期内由当前值线性变为目标值"""
+    current = np.atleast_1d(np.asarray(current_years, dtype=np.float64))[:, None]
+    target = np.atleast_1d(np.asarray(target_years, dtype=np.float64))[:, None]
+    transition = np.atleast_1d(np.asarray(transition_years, dtype=np.float64))[:, None]
+    elapsed = np.asarray(years, dtype=np.float64)[None, :] - years[0]
+    progress = np.clip(np.divide(elapsed, transition, out=np.ones(np.broadcast_shapes(
+        elapsed.shape, transition.shape)), where=transition > 0), 0, 1)
+    return np.maximum(current + (target - current) * progress, 1.0)
+
+
+def _hazard(ages, lifetime):
+    """年龄为 ages 的设备在换机周期为 lifetime 时被替换的比例（非整数周期按比例替换）"""
+    return np.clip(ages - lifetime + 1, 0, 1) * (ages >= 1)
+
+
+def device_cohorts(lifetime):
+    """设备更替队列：由各年换机周期 (路径数, 年数) 计算每人每年新购设备数 (路径数, 年数)"""
+    paths, n_years = lifetime.shape
+    ages = np.arange(int(np.ceil(lifetime.max())) + 2)[None, :]
+    # 初始年龄分布：首年换机周期下的稳态（存活函数归一化）
+    survival = np.cumprod(1 - _hazard(ages, lifetime[:, :1]), axis=1)
+    population = survival / survival.sum(axis=1, keepdims=True)
+
+    purchases = np.empty((paths, n_years))
+    aged = np.empty_like(population)
+    for y in range(n_years):
+        aged[:, 0] = 0
+        aged[:, 1:] = population[:, :-1]
+        aged[:, -1] += population[:, -1]
+        replaced = aged * _hazard(ages, lifetime[:, y:y + 1])
+        population = aged - replaced
+        purchases[:, y] = population[:, 0] = replaced.sum(axis=1)
+    return purchases
+
+
+def grid_intensity(grid_decline, years=YEARS, table=None):
+    """各地区电网强度 (路径数, 年数, 地区数)，grid_decline 为年降幅（标量、(路径数,) 或 (路径数, 地区数)）"""
+    t = table or factors.get()
+    decline = np.asarray(grid_decline, dtype=np.float64)
+    if decline.ndim == 1:
+        decline = decline[:, None, None]
+    elif decline.ndim == 2:
+        decline = decline[:, None, :]
+    elapsed = (np.asarray(years) - years[0])[None, :, None]
+    return t.region_factor[None, None, :] * (1 - decline) ** elapsed
+
+
+def quality_multiplier(video_quality, quality_growth, years=YEARS, table=None):
+    """视频强度相对起始画质的倍数 (路径数, 年数)：画质档位逐年上升，按相邻两档占比插值"""
+    t = table or factors.get()
+    growth = np.atleast_1d(np.asarray(quality_growth, dtype=np.float64))[:, None]
+    level = np.minimum(video_quality + growth * (np.asarray(years) - years[0]), len(t.quality_factor) - 1)
+    return np.interp(level, np.arange(len(t.quality_factor)), t.quality_factor) / t.quality_factor[video_quality]
+
+
+def project(video, meetings, km, phone_carbon, video_intensity, meeting_intensity, flight_factor, video_quality,
+            current_years, target_years, transition_years=5, grid_decline=0.03, quality_growth=0.0,
+            years=YEARS, table=None):
+    """逐年预测，路径参数（换机周期、过渡年数、电网年降幅、画质升级速度）可为标量或 (路径数,) 数组
+
+    返回 dict（kg CO₂，人均）：purchases / device_carbon 形状为 (路径数, 年数)；
+    video_carbon、meeting_carbon、total、saving 及累计值 cumulative_total、cumulative_saving
+    形状为 (路径数, 年数, 地区数)。
+    """
+    lifetime = lifetimes(current_years, target_years, transition_years, years)
+    grid = grid_intensity(grid_decline, years, table)
+    quality = quality_multiplier(video_quality, quality_growth, years, table)
+    paths = max(len(lifetime), len(quality), grid.shape[0])
+    lifetime = np.broadcast_to(lifetime, (paths, len(years)))
+
+    purchases = device_cohorts(lifetime)
+    device_carbon = purchases * phone_carbon
+    # 强度基于全球平均电网（REFERENCE_GRID），换算为耗电量后乘以各地区、各年的电网强度
+    video_carbon = fp.video_carbon(video, video_intensity) / REFERENCE_GRID * quality[:, :, None] * grid
+    meeting_carbon = np.broadcast_to(fp.meeting_carbon(meetings, meeting_intensity) / REFERENCE_GRID * grid,
+                                     video_carbon.shape)
+    total = device_carbon[:, :, None] + video_carbon + meeting_carbon
+    saving = km * flight_factor - meeting_carbon
+    return {
+        "years": np.asarray(years),
+        "lifetime": lifetime,
+        "purchases": purchases,
+        "device_carbon": device_carbon,
+        "video_carbon": video_carbon,
+        "meeting_carbon": meeting_carbon,
+        "total": total,
+        "saving": saving,
+        "cumulative_total": np.cumsum(total, axis=1),
+        "cumulative_saving": np.cumsum(saving, axis=1),
+    }
+
+
+def sample_pathways(n, current_years, target_years=(None, None), grid_decline=(0.01, 0.06),
+                    quality_growth=(0.0, 0.15), transition_years=(1, 10), seed=0):
+    """在各参数范围内均匀抽样 n 条路径；目标换机周期范围默认为当前值到当前值 + 3 年"""
+    rng = np.random.default_rng(seed)
+    low, high = target_years
+    low = current_years if low is None else low
+    high = current_years + 3 if high is None else high
+    return {
+        "current_years": np.full(n, float(current_years)),
+        "target_years": rng.uniform(low, high, n),
+        "transition_years": rng.uniform(*transition_years, n),
+        "grid_decline": rng.uniform(*grid_decline, n),
+        "quality_growth": rng.uniform(*quality_growth, n),
+    }
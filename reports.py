@@ -0,0 +1,222 @@
+# ==================== 批量碳足迹报告（命令行） ====================
+# 用法：python reports.py profiles.csv reports/ [--format png|pdf] [--workers 8] [--chunk-size 500]
+#                         [--id-column employee_id] [--factors-version 2023.1]
+#
+# 为输入CSV（列与 batch.py 相同）中的每个画像生成一份报告：对比条形图、敏感性排序、碳足迹构成饼图
+# 与分析结论，版式与页面一致（共用 charts.draw_comparison / draw_sensitivity）。
+#   - 各块在进程池中并行；每个工作进程只创建一次图形与坐标轴，之后每份报告清空坐标轴重绘，
+#     不再逐份创建、销毁图形；版式固定（不做 tight_layout / 紧凑裁剪），每份报告只光栅化一次
+#   - 敏感性分析只取决于数字习惯，工作进程按习惯缓存，习惯相同的员工只计算一次
+#   - 工作进程直接把报告写入输出目录，主进程只按原顺序写出索引；在途块数有上限，内存占用与人数无关
+# 输出目录中另有 index.csv：原有列 + 报告文件名、各分项结果、最敏感参数与占比最大的部分。
+# 编号重复（或清理后文件名相同，如 a/b 与 a_b）的报告在文件名后追加行号，不会相互覆盖。
+# 图中文字为英文（matplotlib 默认字体不含中文字形，与页面图表一致）。
+import argparse
+import csv
+import io
+import os
+import re
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+import numpy as np
+
+import batch
+import charts
+import factors
+import scenarios
+import sensitivity
+
+FORMATS = ("png", "pdf")
+FIGSIZE = (12, 10)
+DPI = 100  # PNG 为 1200×1000 像素
+COMPONENTS = [("视频流媒体", "video_carbon"), ("视频会议", "meeting_carbon"), ("手机生产", "phone_carbon")]
+INDEX_COLUMNS = ["report", "video_carbon", "meeting_carbon", "phone_carbon", "total", "saving",
+                 "most_sensitive", "largest_part"]
+
+_canvas = None  # 每个工作进程复用的 (图形, 坐标轴, 文字)
+
+
+def _report_canvas():
+    """工作进程的报告图形：首次调用时创建，之后只清空坐标轴重绘"""
+    global _canvas
+    if _canvas is None:
+        fig = charts.new_figure(FIGSIZE)
+        grid = fig.add_gridspec(3, 2, height_ratios=[3, 4, 2.4], left=0.14, right=0.97,
+                                top=0.95, bottom=0.03, hspace=0.35, wspace=0.3)
+        axes = {
+            "comparison": fig.add_subplot(grid[0, 0]),
+            "summary": fig.add_subplot(grid[0, 1]),
+            "ranking": fig.add_subplot(grid[1, 0]),
+            "composition": fig.add_subplot(grid[1, 1]),
+            "conclusion": fig.add_subplot(grid[2, :]),
+        }
+        texts = {}
+        for name in ("summary", "conclusion"):
+            axes[name].axis("off")
+            texts[name] = axes[name].text(0, 1, "", va="top", ha="left", fontsize=11, linespacing=1.6,
+                                          transform=axes[name].transAxes)
+        _canvas = (fig, axes, texts)
+    return _canvas
+
+
+@lru_cache(maxsize=4096)
+def _ranking(video, meetings, phone_years, version, digest):
+    """敏感性排序（与页面相同的抽样设置）；碳足迹与出行距离无关，因此不以 km 为键。
+    以因子版本与摘要为键，因子文件重新加载后不沿用旧表的结果"""
+    table = factors.get(version)
+    return tuple(sensitivity.rank(sensitivity.analyze(video, meetings, phone_years, 0, table=table)))
+
+
+def _label(name):
+    return charts.PARAM_LABELS.get(name, name)
+
+
+def summary_text(report_id, values):
+    return "\n".join([
+        f"Carbon report: {report_id}",
+        f"Annual digital footprint: {values['total']:.1f} kg CO₂",
+        f"  Video streaming: {values['video_carbon']:.1f} kg",
+        f"  Video conferencing: {values['meeting_carbon']:.1f} kg",
+        f"  Phone production: {values['phone_carbon']:.1f} kg",
+        f"Reduction potential: {values['saving']:.1f} kg CO₂",
+        "  (video meetings replacing travel)",
+    ])
+
+
+def conclusion_text(ranking, composition):
+    """页面“分析结论”的内容"""
+    most_sensitive, most_st, most_mu = ranking[0]
+    largest_part, largest_share = composition[0]
+    return "\n".join([
+        f"1. Most sensitive parameter: {_label(most_sensitive)}",
+        f"     explains {most_st * 100:.1f}% of footprint variance (total-order index, incl. interactions)",
+        f"     switching it changes the annual footprint by {most_mu:.1f} kg on average",
+        f"     largest share of the current footprint: {_label(largest_part)} ({largest_share:.1f}%)",
+        f"2. Policy implication: measures targeting {_label(most_sensitive)} reduce emissions most effectively,",
+        "     and its accuracy matters most for the assessment",
+        "3. Personal action: focus on the habits behind the most sensitive parameter",
+    ])
+
+
+def render_report(path, fmt, report_id, values, ranking, composition):
+    """在复用的图形上绘制一份报告并写入 path"""
+    fig, axes, texts = _report_canvas()
+    for name in ("comparison", "ranking", "composition"):
+        axes[name].cla()
+    charts.draw_comparison(axes["comparison"], values["total"], values["saving"])
+    charts.draw_sensitivity(axes["ranking"], axes["composition"],
+                            [name for name, _, _ in ranking], [st_index * 100 for _, st_index, _ in ranking],
+                            [name for name, _ in composition], [share for _, share in composition])
+    texts["summary"].set_text(summary_text(report_id, values))
+    texts["conclusion"].set_text("Findings\n" + conclusion_text(ranking, composition))
+    fig.savefig(path, format=fmt, dpi=DPI)
+
+
+def report_name(report_id):
+    """报告文件名（不含扩展名）：编号中文件名不允许的字符替换为下划线"""
+    return re.sub(r"[^\w.-]", "_", str(report_id)).strip(".") or "_"
+
+
+def report_ids(header, rows, first_row, id_column=None):
+    """各行的报告编号：取 id_column 列，缺少该列时为行号"""
+    if id_column in header:
+        i = header.index(id_column)
+        return [row[i] for row in rows]
+    return [f"{first_row + i:06d}" for i in range(len(rows))]
+
+
+def unique_names(ids, first_row, seen):
+    """各行的报告文件名（不含扩展名）：与已用文件名（seen，按不区分大小写比较）重复时追加行号"""
+    names = []
+    for i, report_id in enumerate(ids):
+        base = name = report_name(report_id)
+        suffix = 1
+        while name.casefold() in seen:
+            name = f"{base}-{first_row + i:06d}" + (f"-{suffix}" if suffix > 1 else "")
+            suffix += 1
+        seen.add(name.casefold())
+        names.append(name)
+    return names
+
+
+def process_chunk(header, rows, first_row, output_dir, fmt, id_column=None, version=None, names=None):
+    """为一块画像生成报告，返回索引CSV文本（在子进程中执行）；names 为各行的文件名（不含扩展名），
+    默认按编号生成（只在本块内去重）"""
+    result = batch.score_rows(header, rows, version)
+    table = factors.get(version)
+    habits = {name: np.array(batch.column(rows, header, name), dtype=np.float64)
+              for name in ("video", "meetings", "phone_years")}
+    ids = report_ids(header, rows, first_row, id_column)
+    if names is None:
+        names = unique_names(ids, first_row, set())
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for i, row in enumerate(rows):
+        values = {name: float(result[name][i]) for name in batch.RESULT_COLUMNS}
+        report_id = ids[i]
+        ranking = _ranking(habits["video"][i], habits["meetings"][i], habits["phone_years"][i],
+                           table.version, table.digest)
+        total = values["total"]
+        composition = sorted(((label, values[name] / total * 100 if total > 0 else 0)
+                              for label, name in COMPONENTS), key=lambda x: x[1], reverse=True)
+        filename = f"{names[i]}.{fmt}"
+        render_report(os.path.join(output_dir, filename), fmt, report_id, values, ranking, composition)
+        writer.writerow(row + [filename] + [f"{values[name]:.3f}" for name in INDEX_COLUMNS[1:6]]
+                        + [ranking[0][0], composition[0][0]])
+    return buffer.getvalue()
+
+
+def run(input_path, output_dir, fmt="png", chunk_size=500, workers=None, id_column="employee_id", version=None):
+    """流式生成全部报告，返回报告数"""
+    if fmt not in FORMATS:
+        raise ValueError(f"报告格式应为 {FORMATS} 之一，实际为 {fmt!r}")
+    workers = workers or os.cpu_count() or 1
+    table = factors.get(version)
+    max_pending = workers * 2  # 在途块数上限
+    count = 0
+    os.makedirs(output_dir, exist_ok=True)
+    scenarios.load_cube(table=table)  # 在启动工作进程前生成立方体文件
+    with open(input_path, newline="", encoding="utf-8-sig") as fin, \
+            open(os.path.join(output_dir, "index.csv"), "w", newline="", encoding="utf-8") as fout, \
+            ProcessPoolExecutor(max_workers=workers) as pool:
+        reader = csv.reader(fin)
+        header = batch.read_header(reader)
+        csv.writer(fout).writerow(header + INDEX_COLUMNS)
+
+        pending = deque()
+        seen = set()  # 已分配的文件名：各块的文件名在主进程中按顺序分配，跨块也不会重复
+        for rows in batch.iter_chunks(reader, chunk_size, len(header)):
+            names = unique_names(report_ids(header, rows, count + 1, id_column), count + 1, seen)
+            pending.append(pool.submit(process_chunk, header, rows, count + 1, output_dir, fmt, id_column,
+                                       table.version, names))
+            count += len(rows)
+            if len(pending) >= max_pending:
+                fout.write(pending.popleft().result())
+        while pending:
+            fout.write(pending.popleft().result())
+    return count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="批量生成ICT碳足迹报告")
+    parser.add_argument("input", help="输入CSV文件（UTF-8，列与 batch.py 相同）")
+    parser.add_argument("output", help="输出目录")
+    parser.add_argument("--format", choices=FORMATS, default="png", help="报告格式（默认png）")
+    parser.add_argument("--chunk-size", type=int, default=500, help="每块画像数（默认500）")
+    parser.add_argument("--workers", type=int, default=None, help="进程数（默认CPU核数）")
+    parser.add_argument("--id-column", default="employee_id", help="用作报告文件名的列（缺失时按行号命名）")
+    parser.add_argument("--factors-version", default=None,
+                        help=f"排放因子版本（可选：{', '.join(factors.versions())}；默认最新）")
+    args = parser.parse_args(argv)
+
+    version = factors.get(args.factors_version).version
+    count = run(args.input, args.output, args.format, args.chunk_size, args.workers, args.id_column, version)
+    print(f"已生成 {count} 份报告 -> {args.output}（排放因子版本 {version}）", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
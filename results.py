@@ -0,0 +1,131 @@
+# ==================== 跨会话结果缓存 ====================
+# 计算结果原先只保存在各会话的 st.session_state 中，大量会话停留在相同（多为默认）输入时各自重复计算。
+# 本模块在进程内缓存计算结果，所有会话共享：
+#   - 键为规范化后的计算输入：侧边栏选项与手动覆盖先折算为实际使用的排放因子，再与数字习惯组合，
+#     浮点数统一舍入，选项不同但因子相同的输入共用同一条结果
+#   - 容量有上限（LRU淘汰），条目超过 TTL 后过期
+#   - 记录命中/未命中/淘汰/过期次数，启用 metrics 时一并导出
+# 容量与 TTL 可由环境变量 ICT_RESULT_CACHE_SIZE / ICT_RESULT_CACHE_TTL 设置，容量为 0 时不缓存。
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+import footprint as fp
+import metrics
+import scenarios
+
+MAX_ENTRIES = int(os.environ.get("ICT_RESULT_CACHE_SIZE", "4096"))
+TTL = float(os.environ.get("ICT_RESULT_CACHE_TTL", "600"))  # 秒
+
+
+def normalize(value):
+    """把计算输入转换为可哈希、与表示方式无关的键（NumPy标量转为Python数值，浮点数舍入）"""
+    if isinstance(value, dict):
+        return tuple(sorted((k, normalize(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(normalize(v) for v in value)
+    if isinstance(value, (bool, np.bool_)):
+        return bool(value)
+    if isinstance(value, (int, np.integer)):
+        return int(value)
+    if isinstance(value, (float, np.floating)):
+        return round(float(value), 9) + 0.0  # + 0.0 把 -0.0 归一为 0.0
+    return value
+
+
+class ResultCache:
+    """线程安全的 LRU + TTL 缓存；计算在锁外进行，同一键并发未命中时可能重复计算一次"""
+
+    def __init__(self, max_entries=MAX_ENTRIES, ttl=TTL, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.clock = clock
+        self._entries = OrderedDict()  # 键 -> (过期时间, 结果)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get_or_compute(self, key, compute):
+        now = self.clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+                del self._entries[key]
+                self.expirations += 1
+            self.misses += 1
+        value = compute()
+        if self.max_entries <= 0:
+            return value
+        with self._lock:
+            self._entries[key] = (now + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return value
+
+    def __len__(self):
+        return len(self._entries)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+CACHE = ResultCache()  # 进程内共享
+
+metrics.register("ict_result_cache_hits_total", "跨会话结果缓存命中次数", "counter", lambda: CACHE.hits)
+metrics.register("ict_result_cache_misses_total", "跨会话结果缓存未命中次数", "counter", lambda: CACHE.misses)
+metrics.register("ict_result_cache_evictions_total", "因容量淘汰的条目数", "counter", lambda: CACHE.evictions)
+metrics.register("ict_result_cache_expirations_total", "因 TTL 过期的条目数", "counter", lambda: CACHE.expirations)
+metrics.register("ict_result_cache_entries", "当前缓存条目数", "gauge", lambda: len(CACHE))
+
+
+# ==================== 缓存的计算 ====================
+# 返回的 dict 由所有会话共享，调用方不得修改
+def footprint(video, meetings, phone_years, video_intensity, meeting_intensity, estimated_phone_carbon):
+    """年数字碳足迹（各分项与合计，kg CO₂）"""
+    key = ("footprint",) + normalize((video, meetings, phone_years, video_intensity, meeting_intensity,
+                                      estimated_phone_carbon))
+    return CACHE.get_or_compute(key, lambda: {
+        name: float(value) for name, value in fp.annual_footprint(
+            video, meetings, phone_years, video_intensity, meeting_intensity, estimated_phone_carbon
+        ).items()
+    })
+
+
+def travel_saving(km, flight_factor, meetings, meeting_intensity):
+    """视频会议替代差旅的减排量（kg CO₂）"""
+    key = ("travel_saving",) + normalize((km, flight_factor, meetings, meeting_intensity))
+    return CACHE.get_or_compute(key, lambda: {
+        name: float(value) for name, value in fp.travel_saving(km, flight_factor, meetings, meeting_intensity).items()
+    })
+
+
+def rank(cube, table, video, meetings, phone_years, km, by="total", ascending=True):
+    """全部参数组合排名（立方体由因子版本与内容哈希确定）"""
+    key = ("rank", table.version, table.digest) + normalize((video, meetings, phone_years, km, by, ascending))
+    return CACHE.get_or_compute(key, lambda: scenarios.rank(
+        cube, video, meetings, phone_years, km, by=by, ascending=ascending, table=table
+    ))
@@ -0,0 +1,112 @@
+# ==================== 情景立方体 ====================
+# 侧边栏几乎全是离散选项：6品牌 × 4平台 × 4画质 × 3会议模式 × 5出行方式 × 4距离 × 5地区 × 绿色数据中心开关，
+# 共 57,600 种组合。预先计算每种组合的派生参数，存为按选项编码索引的定长结构化数组，
+# 并以内存映射文件持久化：页面和批量任务都只需 O(1) 查表，多进程共享同一份物理内存页。
+# 文件名包含因子版本与因子值的哈希，因子更新后会自动重新生成，不会读到过期数据。
+# 各函数的 table 参数为 factors.FactorTable，默认为 factors.get()（最新版本）。
+import hashlib
+import os
+import tempfile
+
+import numpy as np
+
+import factors
+import footprint as fp
+
+# 维度顺序与 footprint.derive_factors 的参数顺序一致
+AXES = ("phone_brand", "video_platform", "video_quality", "meeting_quality",
+        "travel_type", "travel_distance", "region", "green_data_center")
+
+FIELDS = ("estimated_phone_carbon", "video_intensity", "meeting_intensity",
+          "flight_factor", "typical_distance", "electricity_carbon")
+CUBE_DTYPE = np.dtype([(name, np.float64) for name in FIELDS])
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache")
+
+
+def axis_options(table=None):
+    """各维度的选项列表"""
+    t = table or factors.get()
+    return (t.phone_brands, t.video_platforms, t.video_qualities, t.meeting_qualities,
+            t.travel_types, t.travel_distances, t.regions, (False, True))
+
+
+def cube_shape(table=None):
+    return tuple(len(options) for options in axis_options(table))
+
+
+def factors_digest(table=None):
+    """因子值的哈希（因子或维度变化时改变）"""
+    t = table or factors.get()
+    h = hashlib.sha256()
+    for values in (t.phone_carbon, t.platform_factor, t.quality_factor, t.meeting_factor,
+                   t.travel_factor, t.typical_distance, t.region_factor):
+        h.update(np.ascontiguousarray(values).tobytes())
+    h.update(repr((t.base_intensity, t.base_meeting_intensity,
+                   t.green_data_center_factor, cube_shape(t))).encode())
+    return h.hexdigest()[:16]
+
+
+def build_cube(table=None):
+    """计算全部组合的派生参数，返回结构化数组"""
+    shape = cube_shape(table)
+    derived = fp.derive_factors(*np.indices(shape), table=table)
+    cube = np.empty(shape, dtype=CUBE_DTYPE)
+    for name in FIELDS:
+        cube[name] = derived[name]
+    return cube
+
+
+def cube_path(cache_dir=CACHE_DIR, table=None):
+    version = (table or factors.get()).version
+    return os.path.join(cache_dir, f"scenario_cube-{version}-{factors_digest(table)}.npy")
+
+
+def load_cube(cache_dir=CACHE_DIR, table=None):
+    """以只读内存映射方式打开情景立方体，文件不存在时先生成"""
+    path = cube_path(cache_dir, table)
+    if not os.path.exists(path):
+        os.makedirs(cache_dir, exist_ok=True)
+        # 先写临时文件再原子替换，避免并发进程读到写了一半的文件
+        fd, tmp = tempfile.mkstemp(dir=cache_dir, suffix=".npy")
+        with os.fdopen(fd, "wb") as f:
+            np.save(f, build_cube(table))
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, path)
+    # 以普通 ndarray 视图返回（仍由内存映射支持），避免 memmap 子类在每次索引时的额外开销
+    return np.load(path, mmap_mode="r").view(np.ndarray)
+
+
+def lookup(cube, phone_brand, video_platform, video_quality, meeting_quality,
+           travel_type, travel_distance, region, green_data_center=False):
+    """按选项编码查表（编码可为标量或数组），返回与 derive_factors 相同键的字典"""
+    green = np.asarray(green_data_center, dtype=np.intp)
+    record = cube[phone_brand, video_platform, video_quality, meeting_quality,
+                  travel_type, travel_distance, region, green]
+    if record.ndim == 0:
+        # 单个组合（页面）：一次取出全部字段为Python数值
+        return dict(zip(FIELDS, record.item()))
+    return {name: record[name] for name in FIELDS}
+
+
+def rank(cube, video, meetings, phone_years, km, by="total", top=10, ascending=True, table=None):
+    """在当前数字习惯下一次性评估全部组合，按指定结果排序，返回前 top 个组合
+
+    by 为 "total" 或 "saving"；结果相同的组合再按另一项排序（碳足迹越低、减排越多越靠前）。
+    """
+    flat = np.asarray(cube).reshape(-1)
+    result = fp.score(video, meetings, phone_years, km, {name: flat[name] for name in FIELDS})
+    total = np.broadcast_to(result["total"], flat.shape)
+    saving = np.broadcast_to(result["saving"], flat.shape)
+    primary = total if by == "total" else saving
+    secondary = -saving if by == "total" else total
+    order = np.lexsort((secondary, primary if ascending else -primary))[:top]
+
+    rows = []
+    for index in order:
+        codes = np.unravel_index(index, cube.shape)
+        row = {axis: options[code] for axis, options, code in zip(AXES, axis_options(table), codes)}
+        row.update(typical_distance=float(flat["typical_distance"][index]),
+                   total=float(total[index]), saving=float(saving[index]))
+        rows.append(row)
+    return rows
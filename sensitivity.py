@@ -0,0 +1,132 @@
+# ==================== 全局敏感性分析 ====================
+# 对侧边栏的全部离散参数同时抽样（数字习惯取当前值），评估每个参数对结果的影响：
+#   - Morris 筛选：沿随机轨迹每次改变一个参数，统计基本效应 |Δy| 的均值 μ* 与标准差 σ
+#   - Sobol 指数：Saltelli 抽样矩阵，一阶指数 S1（Saltelli 2010）与总效应指数 ST（Jansen）
+# 所有样本先组装成一个整数编码矩阵，再交给计算引擎一次（或分块并行）向量化求值。
+# 各函数的 table 参数为 factors.FactorTable，默认为 factors.get()（选项数与因子均取自该表）。
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import factors
+import footprint as fp
+
+# 单次旅行距离的抽样水平（公里，覆盖侧边栏滑块的范围），旅行排放因子按距离曲线计算
+TRIP_KM = np.array([250, 500, 1000, 2000, 4000, 8000], dtype=np.float64)
+
+
+def parameters(table=None):
+    """[(参数名, 选项列表, evaluate_profiles 中的参数名)]"""
+    t = table or factors.get()
+    return [
+        ("手机品牌", t.phone_brands, "phone_brand"),
+        ("视频平台", t.video_platforms, "video_platform"),
+        ("视频质量", t.video_qualities, "video_quality"),
+        ("会议质量", t.meeting_qualities, "meeting_quality"),
+        ("出行方式", t.travel_types, "travel_type"),
+        ("单次旅行距离", tuple(TRIP_KM.tolist()), "trip_km"),
+        ("地区", t.regions, "region"),
+        ("绿色数据中心", (False, True), "green_data_center"),
+    ]
+
+
+def levels(table=None):
+    """各参数的选项数"""
+    return np.array([len(options) for _, options, _ in parameters(table)])
+
+
+PARAM_NAMES = [name for name, _, _ in parameters()]
+OUTPUTS = ("total", "saving")  # 年碳足迹、减排潜力
+
+DEFAULT_CHUNK = 100_000
+
+
+def to_codes(u, table=None):
+    """把[0,1)均匀样本映射为各参数的选项编码（等概率离散分布）"""
+    n = levels(table)
+    return np.minimum((u * n).astype(np.intp), n - 1)
+
+
+def _evaluate_chunk(codes, video, meetings, phone_years, km, table):
+    options = {name: codes[:, j] for j, (_, _, name) in enumerate(parameters(table))}
+    options["trip_km"] = TRIP_KM[options["trip_km"]]
+    result = fp.evaluate_profiles(video, meetings, phone_years, km, travel_distance=None, table=table, **options)
+    return np.stack([np.broadcast_to(result[name], len(codes)) for name in OUTPUTS])
+
+
+def evaluate(codes, video, meetings, phone_years, km, workers=None, chunk_size=DEFAULT_CHUNK, table=None):
+    """对编码矩阵 (样本数, 参数数) 求值，返回形状为 (输出数, 样本数) 的数组"""
+    t = table or factors.get()
+    if not workers or workers <= 1 or len(codes) <= chunk_size:
+        return _evaluate_chunk(codes, video, meetings, phone_years, km, t)
+    chunks = [codes[i:i + chunk_size] for i in range(0, len(codes), chunk_size)]
+    habits = [[value] * len(chunks) for value in (video, meetings, phone_years, km, t)]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return np.concatenate(list(pool.map(_evaluate_chunk, chunks, *habits)), axis=1)
+
+
+def morris(video, meetings, phone_years, km, trajectories=64, seed=0, workers=None, table=None):
+    """Morris 筛选，返回 {输出: {"mu_star": 数组, "sigma": 数组}}（单位 kg CO₂，按 PARAM_NAMES 顺序）"""
+    rng = np.random.default_rng(seed)
+    n = levels(table)
+    k = len(n)
+    rows = np.arange(trajectories)
+
+    start = rng.integers(0, n, size=(trajectories, k))
+    # 每个参数移动到一个不同的选项
+    moved = (start + rng.integers(1, n, size=(trajectories, k))) % n
+    order = np.argsort(rng.random((trajectories, k)), axis=1)
+
+    points = np.empty((trajectories, k + 1, k), dtype=np.intp)
+    points[:, 0] = start
+    for step in range(k):
+        points[:, step + 1] = points[:, step]
+        points[rows, step + 1, order[:, step]] = moved[rows, order[:, step]]
+
+    y = evaluate(points.reshape(-1, k), video, meetings, phone_years, km, workers, table=table)
+    y = y.reshape(len(OUTPUTS), trajectories, k + 1)
+    # 基本效应：第 step 步的输出变化归属于 order[:, step] 对应的参数
+    effects = np.empty((len(OUTPUTS), trajectories, k))
+    effects[:, rows[:, None], order] = np.diff(y, axis=2)
+
+    return {name: {"mu_star": np.abs(effects[i]).mean(axis=0), "sigma": effects[i].std(axis=0)}
+            for i, name in enumerate(OUTPUTS)}
+
+
+def sobol(video, meetings, phone_years, km, samples=16384, seed=0, workers=None, table=None):
+    """Sobol 指数，返回 {输出: {"S1": 数组, "ST": 数组}}（按 PARAM_NAMES 顺序）"""
+    rng = np.random.default_rng(seed)
+    k = len(PARAM_NAMES)
+    a = to_codes(rng.random((samples, k)), table)
+    b = to_codes(rng.random((samples, k)), table)
+    # AB_i：矩阵A的第i列替换为矩阵B的第i列
+    ab = np.repeat(a[None], k, axis=0)
+    ab[np.arange(k), :, np.arange(k)] = b.T
+
+    y = evaluate(np.concatenate([a, b, ab.reshape(-1, k)]), video, meetings, phone_years, km, workers,
+                 table=table)
+    y_a = y[:, :samples]
+    y_b = y[:, samples:2 * samples]
+    y_ab = y[:, 2 * samples:].reshape(len(OUTPUTS), k, samples)
+
+    variance = np.var(np.concatenate([y_a, y_b], axis=1), axis=1)[:, None]
+    # 方差为0（结果与所有参数无关）时指数记为0
+    variance = np.where(variance > 0, variance, np.inf)
+    s1 = np.mean(y_b[:, None] * (y_ab - y_a[:, None]), axis=2) / variance
+    st = 0.5 * np.mean((y_a[:, None] - y_ab) ** 2, axis=2) / variance
+
+    return {name: {"S1": np.clip(s1[i], 0, 1), "ST": np.clip(st[i], 0, 1)}
+            for i, name in enumerate(OUTPUTS)}
+
+
+def analyze(video, meetings, phone_years, km, samples=16384, trajectories=64, seed=0, workers=None, table=None):
+    """同时计算 Morris 与 Sobol 结果，按输出汇总为 {输出: {"mu_star", "sigma", "S1", "ST"}}"""
+    screening = morris(video, meetings, phone_years, km, trajectories, seed, workers, table)
+    indices = sobol(video, meetings, phone_years, km, samples, seed, workers, table)
+    return {name: {**screening[name], **indices[name]} for name in OUTPUTS}
+
+
+def rank(analysis, output="total"):
+    """按总效应指数从大到小排序：[(参数名, ST, μ*)]"""
+    return sorted(zip(PARAM_NAMES, analysis[output]["ST"], analysis[output]["mu_star"]),
+                  key=lambda x: x[1], reverse=True)
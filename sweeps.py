@@ -0,0 +1,39 @@
+# ==================== 情景扫描 ====================
+# “技术优化情景”与“设备生命周期优化”选项卡中的两组措施，在完整参数网格上一次广播计算，
+# 用于绘制热力图/等值线图。两项措施同时实施时按先后作用计算，避免重复计算减排量：
+#   - 技术优化：压缩先减少视频数据量，绿电再作用于剩余的视频与会议排放
+#   - 生命周期：延长使用年限降低年均生产排放，设备共享再按利用率提升 × 0.5 降低剩余部分
+import numpy as np
+
+GREEN_POWER = np.arange(0, 101, 2)        # 数据中心绿电比例 (%)
+COMPRESSION = np.arange(0, 51, 1)         # 视频数据压缩率提升 (%)
+TARGET_YEARS = np.round(np.arange(1, 6.01, 0.1), 1)  # 目标使用年限
+DEVICE_SHARING = np.arange(0, 101, 2)     # 设备利用率提升 (%)
+SHARING_COEFFICIENT = 0.5  # 与页面“设备共享与云化”的系数一致
+
+
+def technology_reduction(video_carbon, meeting_carbon, green_power, compression):
+    """技术优化的年减排量（kg CO₂），各参数为标量或可广播的数组"""
+    green = np.asarray(green_power) / 100
+    saved = np.asarray(compression) / 100
+    remaining = (video_carbon * (1 - saved) + meeting_carbon) * (1 - green)
+    return video_carbon + meeting_carbon - remaining
+
+
+def lifecycle_reduction(phone_carbon, current_years, target_years, sharing):
+    """设备生命周期优化的年减排量（kg CO₂，相对当前使用年限），各参数为标量或可广播的数组"""
+    shared = np.asarray(sharing) / 100
+    annual = phone_carbon / np.asarray(target_years) * (1 - shared * SHARING_COEFFICIENT)
+    return phone_carbon / current_years - annual
+
+
+def technology_grid(video_carbon, meeting_carbon, green_power=GREEN_POWER, compression=COMPRESSION):
+    """年减排量网格 (绿电比例, 压缩率)，单位 kg CO₂"""
+    return technology_reduction(video_carbon, meeting_carbon,
+                                np.asarray(green_power)[:, None], np.asarray(compression)[None, :])
+
+
+def lifecycle_grid(phone_carbon, current_years, target_years=TARGET_YEARS, sharing=DEVICE_SHARING):
+    """年减排量网格 (目标使用年限, 设备利用率提升)，相对当前使用年限，单位 kg CO₂"""
+    return lifecycle_reduction(phone_carbon, current_years,
+                               np.asarray(target_years)[:, None], np.asarray(sharing)[None, :])
@@ -0,0 +1,5 @@
+# 各模块位于仓库根目录（与 benchmarks/ 中的脚本相同的导入方式）
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
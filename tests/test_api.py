@@ -0,0 +1,31 @@
+import asyncio
+import math
+
+import pytest
+
+import api
+import factors
+
+
+@pytest.mark.parametrize("item", [
+    {"video": math.nan},
+    {"meetings": math.inf},
+    {"km": -math.inf},
+    {"phone_years": 0},
+])
+def test_parse_items_rejects_non_finite_numbers(item):
+    with pytest.raises(api.RequestError):
+        api.parse_items([item], factors.get())
+
+
+@pytest.mark.parametrize("version", [[], {}, 2023.1])
+def test_parse_items_rejects_non_string_factors_version(version):
+    with pytest.raises(api.RequestError, match="factors_version"):
+        api.parse_items([{"factors_version": version}], factors.get())
+
+
+@pytest.mark.parametrize("version", [[], {}])
+def test_calculate_rejects_unhashable_factors_version(version):
+    # 分组前校验：不可哈希的版本号返回 400，而不是 TypeError（500）
+    with pytest.raises(api.RequestError, match="factors_version"):
+        asyncio.run(api.Service().calculate("footprint", [{"video": 1.0}, {"factors_version": version}]))
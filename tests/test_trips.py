@@ -0,0 +1,15 @@
+import numpy as np
+
+import factors
+import footprint as fp
+import trips
+
+
+def test_round_trip_uses_one_way_leg_factor():
+    # 往返 600 公里（两段 300 公里）按短途档位（典型距离 300 公里）的因子计算，而不是 750 公里处的因子
+    t = factors.get()
+    travel_type = t.travel_types.index("国内航班")
+    travel_carbon, _, _ = trips.trip_savings(np.array([600.0]), np.array([travel_type]), np.ones(1), np.ones(1),
+                                             np.ones(1), 0.0, t)
+    assert travel_carbon[0] == 600 * t.travel_factor[travel_type, 0]
+    assert travel_carbon[0] == 600 * fp.derive_flight_factor(travel_type, 300, t)
@@ -0,0 +1,176 @@
+# ==================== 分时电网碳强度模型 ====================
+# 年平均模型假设用电时刻无关紧要；本模块把 8760 小时的地区电网碳强度曲线与逐小时的使用曲线
+# （视频流媒体、视频会议）做点积，体现“什么时候用”的影响：
+#   排放 = Σ_h 使用时长_h × 每小时耗电量(kWh) × 电网碳强度_h
+# 每小时耗电量由侧边栏强度折算：强度（kg CO₂/小时）基于全球平均电网强度，除以该强度即得 kWh/小时。
+# 全部地区同时计算：使用曲线矩阵 (画像数, 8760) @ 电网曲线矩阵转置 (8760, 地区数)。
+# 电网曲线与使用曲线均以 .npy 文件保存并以内存映射方式读取，按行分块计算，内存占用有上限。
+#
+# 用法（批量）：python timeseries.py video_usage.npy meeting_usage.npy results.csv [--grid grid.npy]
+#   使用曲线文件形状为 (画像数, 8760)，单位：小时；结果为每个画像在各地区的年排放（kg CO₂）。
+import argparse
+import csv
+import hashlib
+import os
+import sys
+import tempfile
+
+import numpy as np
+
+import factors
+import footprint as fp
+import scenarios
+
+HOURS = 8760
+REFERENCE_GRID = 0.45  # 视频/会议基准强度对应的电网强度：全球平均约450g/kWh（与“其他”地区一致）
+
+# 示意性的地区电网曲线形状（季节波动幅度, 晚高峰幅度, 午间光伏低谷幅度）。
+# 仅用于在缺少实测数据时生成曲线，年平均值严格等于 region_factor；
+# 有实测的 8760 小时数据时，按相同格式保存为 .npy 并通过 grid_path 参数传入即可替换。
+GRID_SHAPE = {
+    "欧洲（高绿电）": (0.15, 0.10, 0.25),    # 冬季高、午间光伏明显
+    "美国（中等）": (0.08, 0.12, 0.12),
+    "中国（中等偏上）": (0.06, 0.08, 0.08),  # 煤电为主，日内波动小
+    "印度（高煤电）": (0.05, 0.10, 0.10),
+    "其他": (0.08, 0.10, 0.10),
+}
+DEFAULT_SHAPE = (0.08, 0.10, 0.10)
+
+# 一天中各时段的视频观看习惯（权重，按24小时归一化）
+VIDEO_TIMING = {
+    "晚间为主（19-23点）": [19, 20, 21, 22],
+    "白天为主（9-18点）": list(range(9, 18)),
+    "深夜为主（0-2点）": [0, 1, 23],
+    "全天均匀": list(range(24)),
+}
+MEETING_HOURS = list(range(9, 18))  # 工作日 9-18 点
+
+CHUNK_ROWS = 4096
+
+
+def _hour_of_day():
+    return np.arange(HOURS) % 24
+
+
+def _day_of_year():
+    return np.arange(HOURS) // 24
+
+
+def _bump(hours, center, width):
+    # 按24小时循环的高斯峰
+    distance = np.minimum(np.abs(hours - center), 24 - np.abs(hours - center))
+    return np.exp(-0.5 * (distance / width) ** 2)
+
+
+def synthetic_grid(table=None, green_data_center=False):
+    """生成各地区 8760 小时电网碳强度曲线 (地区数, 8760)，年平均值等于 region_factor"""
+    t = table or factors.get()
+    hour, day = _hour_of_day(), _day_of_year()
+    profiles = np.empty((len(t.regions), HOURS))
+    for i, region in enumerate(t.regions):
+        season, evening, solar = GRID_SHAPE.get(region, DEFAULT_SHAPE)
+        shape = (1 + season * np.cos(2 * np.pi * (day - 15) / 365)
+                 + evening * _bump(hour, 19, 2.5)
+                 - solar * _bump(hour, 13, 2.5))
+        profiles[i] = shape / shape.mean() * t.region_factor[i]
+    if green_data_center:
+        profiles *= t.green_data_center_factor
+    return profiles
+
+
+def load_grid(grid_path=None, table=None, cache_dir=scenarios.CACHE_DIR):
+    """以只读内存映射方式读取电网曲线；未指定文件时生成（并缓存）示意曲线"""
+    if grid_path is None:
+        t = table or factors.get()
+        digest = hashlib.sha256(repr(sorted(GRID_SHAPE.items())).encode()).hexdigest()[:8]
+        grid_path = os.path.join(cache_dir, f"grid_profiles-{t.version}-{scenarios.factors_digest(t)}-{digest}.npy")
+        if not os.path.exists(grid_path):
+            os.makedirs(cache_dir, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=cache_dir, suffix=".npy")
+            with os.fdopen(fd, "wb") as f:
+                np.save(f, synthetic_grid(t))
+            os.chmod(tmp, 0o644)
+            os.replace(tmp, grid_path)
+    grid = np.load(grid_path, mmap_mode="r")
+    if grid.ndim != 2 or grid.shape[1] != HOURS:
+        raise ValueError(f"电网曲线文件形状应为 (地区数, {HOURS})，实际为 {grid.shape}")
+    return grid
+
+
+def typical_usage(video, meetings, video_timing="晚间为主（19-23点）"):
+    """由每天视频时长、每周会议时长生成逐小时使用曲线 (视频, 会议)，年合计与年平均模型一致"""
+    hour, day = _hour_of_day(), _day_of_year()
+    video_profile = np.isin(hour, VIDEO_TIMING[video_timing]).astype(np.float64)
+    video_profile *= video * 365 / video_profile.sum()
+    # 会议：工作日（每周前5天）工作时段，年合计为 每周时长 × 52
+    meeting_profile = (np.isin(hour, MEETING_HOURS) & (day % 7 < 5)).astype(np.float64)
+    meeting_profile *= meetings * 52 / meeting_profile.sum()
+    return video_profile, meeting_profile
+
+
+def hourly_emissions(video_usage, meeting_usage, video_intensity, meeting_intensity, grid,
+                     chunk_rows=CHUNK_ROWS):
+    """逐小时模型的年排放（kg CO₂），返回 (画像数, 地区数)
+
+    video_usage / meeting_usage：(画像数, 8760) 数组或内存映射，单位小时；
+    video_intensity / meeting_intensity：侧边栏强度（kg CO₂/小时），标量或 (画像数,) 数组。
+    """
+    video_usage = np.atleast_2d(video_usage)
+    meeting_usage = np.atleast_2d(meeting_usage)
+    n = len(video_usage)
+    video_kwh = np.broadcast_to(np.asarray(video_intensity, dtype=np.float64) / REFERENCE_GRID, (n,))
+    meeting_kwh = np.broadcast_to(np.asarray(meeting_intensity, dtype=np.float64) / REFERENCE_GRID, (n,))
+    grid_t = np.ascontiguousarray(np.asarray(grid, dtype=np.float64).T)  # (8760, 地区数)
+
+    out = np.empty((n, grid_t.shape[1]))
+    for start in range(0, n, chunk_rows):
+        rows = slice(start, start + chunk_rows)
+        out[rows] = (np.asarray(video_usage[rows], dtype=np.float64) @ grid_t) * video_kwh[rows, None]
+        out[rows] += (np.asarray(meeting_usage[rows], dtype=np.float64) @ grid_t) * meeting_kwh[rows, None]
+    return out
+
+
+def average_emissions(video_usage, meeting_usage, video_intensity, meeting_intensity, grid):
+    """同样的使用量按各地区年平均电网强度计算（忽略用电时刻），用于对比"""
+    video_hours = np.atleast_2d(video_usage).sum(axis=1)
+    meeting_hours = np.atleast_2d(meeting_usage).sum(axis=1)
+    energy = (video_hours * np.asarray(video_intensity)
+              + meeting_hours * np.asarray(meeting_intensity)) / REFERENCE_GRID
+    return energy[:, None] * np.asarray(grid).mean(axis=1)[None, :]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="批量计算逐小时使用曲线在各地区电网下的年排放")
+    parser.add_argument("video_usage", help="视频使用曲线 .npy，形状 (画像数, 8760)")
+    parser.add_argument("meeting_usage", help="会议使用曲线 .npy，形状 (画像数, 8760)")
+    parser.add_argument("output", help="输出CSV文件")
+    parser.add_argument("--grid", default=None, help="电网曲线 .npy，形状 (地区数, 8760)；默认使用示意曲线")
+    parser.add_argument("--video-intensity", type=float, default=None,
+                        help="视频流媒体强度 kg CO₂/小时（默认为最新因子版本的基准强度）")
+    parser.add_argument("--meeting-intensity", type=float, default=None,
+                        help="视频会议强度 kg CO₂/小时（默认平衡模式）")
+    args = parser.parse_args(argv)
+
+    table = factors.get()
+    if args.video_intensity is None:
+        args.video_intensity = table.base_intensity
+    if args.meeting_intensity is None:
+        args.meeting_intensity = fp.derive_meeting_intensity(table.meeting_qualities.index("平衡模式"), table)
+
+    video_usage = np.load(args.video_usage, mmap_mode="r")
+    meeting_usage = np.load(args.meeting_usage, mmap_mode="r")
+    grid = load_grid(args.grid, table)
+    result = hourly_emissions(video_usage, meeting_usage, args.video_intensity,
+                              args.meeting_intensity, grid)
+
+    with open(args.output, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        regions = table.regions if len(table.regions) == len(grid) else [f"region_{i}" for i in range(len(grid))]
+        writer.writerow(["profile"] + list(regions))
+        for i, row in enumerate(result.tolist()):
+            writer.writerow([i] + [f"{v:.3f}" for v in row])
+    print(f"已计算 {len(result)} 个画像 × {len(grid)} 个地区 -> {args.output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,310 @@
+# ==================== 流媒体流量日志 ====================
+# 用法：python traffic.py access.log [access.log.1.gz ...] -o usage.csv [--by user|platform|user_platform]
+#                         [--region 中国（中等偏上）] [--green-data-center] [--platform 抖音/快手]
+#                         [--block-mb 4] [--workers 4] [--factors-version 2023.1]
+#
+# 页面按 每天观看小时数 × 固定强度 估算视频流媒体排放，画质系数的依据其实是每小时数据量（GB/小时）。
+# 本模块改为按实际传输的数据量计算：
+#   排放 = 数据量(GB) × (网络能耗 kWh/GB × 电力碳强度 + 数据中心能耗 kWh/GB × 数据中心电力碳强度)
+# 数据来自 CDN/代理服务器的访问日志（nginx combined / Apache common 格式）：
+#   client ident user [time] "METHOD target PROTO" status bytes ...
+# 用户取 user 字段（为 "-" 时取 client 地址）；平台按 target 中的主机名（代理日志为绝对URL或
+# CONNECT host:port）匹配 PLATFORM_HOSTS，未匹配的流量计入“其他”；CDN 日志只属于一个平台时用 --platform 指定。
+#
+# 流式处理：日志按块（默认4 MB，在行尾切分）读取，.gz 文件按流解压；每块在字节数组上用 NumPy
+# 定位各字段、解析字节数，用户与主机名取64位哈希后 np.unique 分组，只返回按 (用户, 平台) 的部分和。
+# 内存占用只与块大小和用户数有关，与日志行数无关；各块可在进程池中并行解析（在途块数有上限）。
+# 无法解析的行（字段不全、请求行缺失等）跳过并计数。数据量按 1 GB = 10⁹ 字节计。
+import argparse
+import csv
+import gzip
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+import numpy as np
+
+import factors
+import footprint as fp
+
+# 各平台的主机名后缀（视频与静态资源 CDN）
+PLATFORM_HOSTS = {
+    "YouTube/Netflix": ("googlevideo.com", "youtube.com", "ytimg.com", "nflxvideo.net", "netflix.com",
+                        "nflxso.net"),
+    "哔哩哔哩/爱奇艺": ("bilivideo.com", "bilivideo.cn", "bilibili.com", "hdslb.com", "iqiyi.com", "qiyipic.com"),
+    "抖音/快手": ("douyinvod.com", "douyin.com", "tiktokcdn.com", "kuaishou.com", "kwaicdn.com", "yximgs.com"),
+    "视频会议(Teams/Zoom)": ("zoom.us", "zoom.com", "teams.microsoft.com", "skype.com"),
+}
+OTHER = "其他"
+DIMENSIONS = ("user", "platform", "user_platform")
+BLOCK_SIZE = 4 << 20  # 块在 CPU 缓存中处理更快；过小则每块的固定开销占比增大
+GIGABYTE = 1e9
+
+_MULTIPLIER = np.uint64(0x9E3779B97F4A7C15)
+_SCHEME = np.uint64(int.from_bytes(b"://", "little"))
+_MASKS = np.array([(1 << (8 * n)) - 1 for n in range(9)], dtype=np.uint64)  # 保留低 n 字节
+
+
+# ==================== 读取 ====================
+def open_log(path):
+    return gzip.open(path, "rb") if path.endswith(".gz") else open(path, "rb")
+
+
+def read_blocks(f, block_size=BLOCK_SIZE):
+    """从二进制文件对象按块读取，每块以完整的行结束（跨块的行并入下一块）"""
+    rest = b""
+    while True:
+        data = f.read(block_size)
+        if not data:
+            break
+        data = rest + data
+        cut = data.rfind(b"\n") + 1
+        rest = data[cut:]
+        if cut:
+            yield data[:cut]
+    if rest:
+        yield rest + b"\n"
+
+
+def iter_blocks(paths, block_size=BLOCK_SIZE):
+    for path in paths:
+        with open_log(path) as f:
+            yield from read_blocks(f, block_size)
+
+
+# ==================== 逐块解析 ====================
+@lru_cache(maxsize=65536)
+def classify(host, platforms):
+    """主机名所属的平台编码（platforms 中的下标，未匹配时为最后一项“其他”）"""
+    host = host.lower().rstrip(".")
+    for label, suffixes in PLATFORM_HOSTS.items():
+        if label in platforms and any(host == s or host.endswith("." + s) for s in suffixes):
+            return platforms.index(label)
+    return len(platforms) - 1
+
+
+def _words(block):
+    """块内每个字节位置起的8字节（小端 uint64，非对齐视图，不复制）"""
+    return np.ndarray(shape=(max(len(block) - 7, 1),), dtype="<u8", buffer=block.ljust(8, b"\0"), strides=(1,))
+
+
+def _field_hash(words, start, end):
+    """各字段 block[start:end] 的64位哈希：字段按8字节一组（末组只保留字段内的字节）折叠；
+    同时返回各组的值（行 × 组数），可视作补零的定长 bytes 还原字段内容"""
+    length = end - start
+    groups = max(-(-int(length.max(initial=0)) // 8), 1)
+    chunks = np.empty((len(start), groups), dtype=np.uint64)
+    h = length.astype(np.uint64)
+    for k in range(groups):
+        position = start + 8 * k
+        # 块末不足8字节处读取最后一个完整的8字节再右移
+        clamped = np.minimum(position, len(words) - 1)
+        word = words[clamped] >> ((position - clamped) * 8).astype(np.uint64)
+        chunks[:, k] = word & _MASKS[np.clip(length - 8 * k, 0, 8)]
+        h = (h * _MULTIPLIER) ^ chunks[:, k]
+    return h, chunks
+
+
+def _field_number(buf, start, end):
+    """十进制字段转换为整数；为空或含非数字字符的字段为 -1"""
+    length = end - start
+    width = int(length.max(initial=0))
+    offsets = np.arange(width)
+    digits = buf[np.minimum(start[:, None] + offsets, len(buf) - 1)].astype(np.int64) - 48
+    inside = offsets < length[:, None]
+    valid = (((digits >= 0) & (digits <= 9)) | ~inside).all(axis=1) & (length > 0)
+    value = np.zeros(len(start), dtype=np.int64)
+    for k in range(width):
+        value = np.where(inside[:, k], value * 10 + digits[:, k], value)
+    return np.where(valid, value, -1)
+
+
+def parse_block(block):
+    """解析一块日志（以换行结束的 bytes）：返回有效行的
+    (用户起点, 用户终点, 主机起点, 主机终点, 字节数) 与总行数"""
+    buf = np.frombuffer(block, dtype=np.uint8)
+    ends = np.flatnonzero(buf == 10)
+    starts = np.concatenate(([0], ends[:-1] + 1))
+    ends = ends - ((ends > starts) & (buf[ends - 1] == 13))  # CRLF 换行
+    lines = len(ends)
+
+    def at(positions):
+        return buf[np.minimum(positions, len(buf) - 1)]
+
+    # 每行前10个空格：client ident user [time zone] "METHOD target PROTO" status bytes
+    # （末尾补哨兵，空格不足的行各位置落在行外）
+    spaces = np.concatenate((np.flatnonzero(buf == 32), np.full(10, len(buf))))
+    sp = spaces[np.searchsorted(spaces, starts)[:, None] + np.arange(10)]
+    valid = ((sp[:, 8] < ends) & (at(sp[:, 2] + 1) == ord("[")) & (at(sp[:, 4] + 1) == ord('"'))
+             & (at(sp[:, 7] - 1) == ord('"')))
+    starts, ends, sp = starts[valid], ends[valid], sp[valid]
+
+    status = _field_number(buf, sp[:, 7] + 1, sp[:, 8])
+    size_start, size_end = sp[:, 8] + 1, np.minimum(sp[:, 9], ends)
+    size = _field_number(buf, size_start, size_end)
+    # Apache 以 "-" 表示未发送正文
+    size = np.where((size < 0) & (size_end - size_start == 1) & (at(size_start) == ord("-")), 0, size)
+    valid = (status >= 0) & (size >= 0)
+
+    # 用户：user 字段为 "-" 时取 client 地址
+    user_start, user_end = sp[:, 1] + 1, sp[:, 2]
+    anonymous = (user_end - user_start == 1) & (at(user_start) == ord("-"))
+    user_start = np.where(anonymous, starts, user_start)
+    user_end = np.where(anonymous, sp[:, 0], user_end)
+
+    # 主机：绝对URL跳过 "scheme://"（协议名中没有 / : ?，target 中第一个分隔符即协议后的冒号），
+    # CONNECT 的 host:port 与相对路径从 target 起点开始；止于下一个 / : ? 或 target 结尾
+    target_start, target_end = sp[:, 5] + 1, sp[:, 6]
+    delimiters = np.concatenate((np.flatnonzero((buf == ord("/")) | (buf == ord(":")) | (buf == ord("?"))),
+                                 [len(buf)]))
+    first = delimiters[np.searchsorted(delimiters, target_start)]
+    words = _words(block)
+    scheme = (first + 3 < target_end) & ((words[np.minimum(first, len(words) - 1)] & _MASKS[3]) == _SCHEME)
+    host_start = np.where(scheme, first + 3, target_start)
+    host_end = np.minimum(delimiters[np.searchsorted(delimiters, host_start)], target_end)
+
+    return (user_start[valid], user_end[valid], host_start[valid], host_end[valid], size[valid]), lines
+
+
+def block_sums(block, platforms, platform=None):
+    """一块日志按 (用户, 平台) 的部分和（可在子进程中执行）；platform 给出时全部计入该平台。
+    返回块内各用户的哈希与标签（定长 bytes 数组），以及 用户 × 平台 的请求数与字节数"""
+    (user_start, user_end, host_start, host_end, size), lines = parse_block(block)
+    words = _words(block)
+    user_hash, user_chunks = _field_hash(words, user_start, user_end)
+    users, first, user_ids = np.unique(user_hash, return_index=True, return_inverse=True)
+    if platform is not None:
+        codes = np.full(len(size), platforms.index(platform), dtype=np.intp)
+    else:
+        # 主机名种类很少：每种只解码、匹配一次
+        _, host_first, host_ids = np.unique(_field_hash(words, host_start, host_end)[0],
+                                            return_index=True, return_inverse=True)
+        host_codes = np.array([classify(block[host_start[i]:host_end[i]].decode("latin-1"), platforms)
+                               for i in host_first.tolist()], dtype=np.intp)
+        codes = host_codes[host_ids.ravel()]
+
+    cells = user_ids.ravel() * len(platforms) + codes
+    shape = (len(users), len(platforms))
+    return {
+        "lines": lines,
+        "parsed": len(size),
+        "users": users,
+        "labels": user_chunks[first].view(f"S{8 * user_chunks.shape[1]}").ravel(),
+        "requests": np.bincount(cells, minlength=len(users) * len(platforms)).reshape(shape),
+        "bytes": np.bincount(cells, weights=size, minlength=len(users) * len(platforms)).reshape(shape),
+    }
+
+
+# ==================== 汇总 ====================
+class TrafficSums:
+    """按 用户 × 平台 累加各块的部分和；用户以64位哈希为键，标签取首次出现时的字段内容"""
+
+    def __init__(self, platforms):
+        self.platforms = platforms
+        self.hashes = np.zeros(0, dtype=np.uint64)  # 已出现用户的哈希（升序）
+        self.hash_rows = np.zeros(0, dtype=np.intp)  # 与 hashes 对应的行号
+        self.labels = []  # 行号 -> 用户标签
+        self.sums = np.zeros((2, 0, len(platforms)))  # 请求数、字节数
+        self.lines = 0
+        self.parsed = 0
+
+    def add(self, part):
+        self.lines += part["lines"]
+        self.parsed += part["parsed"]
+        # 块内用户哈希已排序去重：在已有哈希中二分查找，新用户按顺序编行号并插入
+        users = part["users"]
+        position = np.searchsorted(self.hashes, users)
+        known = self.hashes[np.minimum(position, len(self.hashes) - 1)] == users if len(self.hashes) else \
+            np.zeros(len(users), dtype=bool)
+        rows = np.empty(len(users), dtype=np.intp)
+        rows[known] = self.hash_rows[position[known]]
+        new = ~known
+        rows[new] = np.arange(len(self.labels), len(self.labels) + new.sum())
+        self.hashes = np.insert(self.hashes, position[new], users[new])
+        self.hash_rows = np.insert(self.hash_rows, position[new], rows[new])
+        self.labels.extend(label.decode("utf-8", "replace") for label in part["labels"][new].tolist())
+        if len(self.labels) > self.sums.shape[1]:
+            grown = np.zeros((2, max(len(self.labels), 2 * self.sums.shape[1]), len(self.platforms)))
+            grown[:, :self.sums.shape[1]] = self.sums
+            self.sums = grown
+        # 同一块内各用户互不相同，可直接按行号累加
+        self.sums[0, rows] += part["requests"]
+        self.sums[1, rows] += part["bytes"]
+
+    def rows(self, by):
+        """[(标签..., 请求数, GB)]，按标签排序；by 为 DIMENSIONS 之一"""
+        requests, volume = self.sums[:, :len(self.labels)]
+        if by == "user_platform":
+            users, codes = np.nonzero(requests)
+            labels = [(self.labels[u], self.platforms[c]) for u, c in zip(users.tolist(), codes.tolist())]
+            requests, volume = requests[users, codes], volume[users, codes]
+        elif by == "user":
+            labels = [(label,) for label in self.labels]
+            requests, volume = requests.sum(axis=1), volume.sum(axis=1)
+        else:
+            codes = np.flatnonzero(requests.sum(axis=0))
+            labels = [(self.platforms[c],) for c in codes.tolist()]
+            requests, volume = requests.sum(axis=0)[codes], volume.sum(axis=0)[codes]
+        return sorted(label + (int(r), v / GIGABYTE)
+                      for label, r, v in zip(labels, requests.tolist(), volume.tolist()))
+
+
+def summarize(paths, block_size=BLOCK_SIZE, workers=1, platform=None, table=None):
+    """流式汇总全部日志文件：读取、解析、累加依次串联为生成器，多进程时在途块数不超过 workers × 2"""
+    t = table or factors.get()
+    platforms = tuple(t.video_platforms) + (OTHER,)
+    if platform is not None and platform not in platforms:
+        raise ValueError(f"平台应为 {platforms} 之一，实际为 {platform!r}")
+    sums = TrafficSums(platforms)
+    blocks = iter_blocks(paths, block_size)
+    if workers <= 1:
+        for block in blocks:
+            sums.add(block_sums(block, platforms, platform))
+        return sums
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for block in blocks:
+            pending.append(pool.submit(block_sums, block, platforms, platform))
+            if len(pending) >= workers * 2:
+                sums.add(pending.popleft().result())
+        while pending:
+            sums.add(pending.popleft().result())
+    return sums
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="由 CDN/代理访问日志按实际数据量计算各用户、各平台的流媒体排放")
+    parser.add_argument("inputs", nargs="+", help="访问日志文件（combined/common 格式，可为 .gz）")
+    parser.add_argument("-o", "--output", required=True, help="汇总结果CSV文件")
+    parser.add_argument("--by", choices=DIMENSIONS, default="user_platform", help="汇总维度（默认 user_platform）")
+    parser.add_argument("--region", default="中国（中等偏上）", help="电网所在地区（与侧边栏标签相同）")
+    parser.add_argument("--green-data-center", action="store_true", help="数据中心使用绿电")
+    parser.add_argument("--platform", default=None, help="日志只属于一个平台时指定（如某平台的 CDN 日志）")
+    parser.add_argument("--block-mb", type=int, default=BLOCK_SIZE >> 20, help="每块大小（MB，默认4）")
+    parser.add_argument("--workers", type=int, default=1, help="解析进程数（默认1）")
+    parser.add_argument("--factors-version", default=None,
+                        help=f"排放因子版本（可选：{', '.join(factors.versions())}；默认最新）")
+    args = parser.parse_args(argv)
+
+    table = factors.get(args.factors_version)
+    per_gigabyte = float(fp.derive_carbon_per_gigabyte(fp.encode(args.region, table.regions),
+                                                       args.green_data_center, table))
+    sums = summarize(args.inputs, args.block_mb << 20, args.workers, args.platform, table)
+    rows = sums.rows(args.by)
+    with open(args.output, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        labels = ["user", "platform"] if args.by == "user_platform" else [args.by]
+        writer.writerow(labels + ["requests", "gigabytes", "carbon"])
+        for row in rows:
+            *labels, requests, gigabytes = row
+            writer.writerow(labels + [requests, f"{gigabytes:.6f}", f"{gigabytes * per_gigabyte:.6f}"])
+
+    total = sum(row[-1] for row in sums.rows("platform"))
+    print(f"共 {sums.lines} 行，解析 {sums.parsed} 行（跳过 {sums.lines - sums.parsed} 行）；{len(sums.labels)} 个用户，"
+          f"数据量 {total:.1f} GB × {per_gigabyte:.4f} kg CO₂/GB = {total * per_gigabyte:.1f} kg CO₂ "
+          f"-> {args.output}（排放因子版本 {table.version}）", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
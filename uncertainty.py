@@ -0,0 +1,96 @@
+# ==================== 不确定性分析（蒙特卡洛） ====================
+# 在代码注释所记录的排放因子范围内抽样，得到碳足迹与减排量的分布。
+# 抽样围绕页面实际使用的点估计（所选因子版本，含手动覆盖与会议记录折算的会议强度），
+# 各范围以相对点估计的倍数作用，因此分布与页面上方显示的结果一致。
+# 抽样按块向量化计算，每块使用由同一随机种子派生的独立随机流，
+# 因此串行与进程池并行的结果完全一致（可复现）。
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import factors
+import footprint as fp
+
+# 手机生产碳排放范围（kg CO₂）：三角分布（下限, 众数=点估计, 上限）
+# 来源为 footprint.phone_carbon_map 的注释；“其他品牌”取行业整体范围60-120kg，下限放宽到各品牌最低值
+PHONE_CARBON_RANGE = {
+    "苹果 iPhone": (70, 75, 80),
+    "三星 Galaxy": (65, 68, 70),
+    "华为": (60, 65, 70),
+    "小米": (50, 55, 60),
+    "OPPO/VIVO": (50, 52, 55),
+    "其他品牌": (50, 58, 120),
+}
+# 视频流媒体基准强度：IEA 0.03-0.08 kg CO₂/小时，众数取因子表的基准强度
+BASE_INTENSITY_RANGE = (0.03, 0.08)
+
+DEFAULT_CHUNK = 250_000
+PERCENTILES = (5, 25, 50, 75, 95)
+
+
+def phone_carbon_range(brand):
+    """该品牌生产碳排放的相对范围（下限, 上限）/ 众数；因子表中的新品牌按“其他品牌”处理"""
+    low, mode, high = PHONE_CARBON_RANGE.get(brand, PHONE_CARBON_RANGE["其他品牌"])
+    return low / mode, high / mode
+
+
+def _simulate_chunk(seed, size, video, meetings, phone_years, km, phone_range, intensity_range,
+                    estimated_phone_carbon, video_intensity, meeting_intensity, flight_factor):
+    rng = np.random.default_rng(seed)
+    phone_carbon = estimated_phone_carbon * rng.triangular(phone_range[0], 1.0, phone_range[1], size)
+    # 视频会议与视频流媒体共用网络与数据中心链路，按同一相对不确定性缩放
+    scale = rng.triangular(intensity_range[0], 1.0, intensity_range[1], size)
+    video_intensity = video_intensity * scale
+    meeting_intensity = meeting_intensity * scale
+
+    footprint = fp.annual_footprint(video, meetings, phone_years,
+                                    video_intensity, meeting_intensity, phone_carbon)
+    saving = fp.travel_saving(km, flight_factor, meetings, meeting_intensity)
+    return footprint["total"], saving["saving"]
+
+
+def simulate(video, meetings, phone_years, km, phone_brand, estimated_phone_carbon, video_intensity,
+             meeting_intensity, flight_factor, draws=1_000_000, seed=0,
+             chunk_size=DEFAULT_CHUNK, workers=None, table=None):
+    """蒙特卡洛抽样，返回 {"total": 数组, "saving": 数组}
+
+    phone_brand 为整数编码（决定生产排放的范围）；estimated_phone_carbon、video_intensity、meeting_intensity、
+    flight_factor 为页面实际使用的点估计；workers 大于1时各块在进程池中并行计算。
+    """
+    t = table or factors.get()
+    sizes = [min(chunk_size, draws - start) for start in range(0, draws, chunk_size)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    intensity_range = (min(BASE_INTENSITY_RANGE[0] / t.base_intensity, 1.0),
+                       max(BASE_INTENSITY_RANGE[1] / t.base_intensity, 1.0))
+    args = (video, meetings, phone_years, km, phone_carbon_range(t.phone_brands[phone_brand]), intensity_range,
+            estimated_phone_carbon, video_intensity, meeting_intensity, flight_factor)
+
+    total = np.empty(draws)
+    saving = np.empty(draws)
+    if workers and workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            chunks = pool.map(_simulate_chunk, seeds, sizes, *[[a] * len(sizes) for a in args])
+            _collect(chunks, sizes, total, saving)
+    else:
+        chunks = (_simulate_chunk(s, n, *args) for s, n in zip(seeds, sizes))
+        _collect(chunks, sizes, total, saving)
+    return {"total": total, "saving": saving}
+
+
+def _collect(chunks, sizes, total, saving):
+    start = 0
+    for (chunk_total, chunk_saving), n in zip(chunks, sizes):
+        total[start:start + n] = chunk_total
+        saving[start:start + n] = chunk_saving
+        start += n
+
+
+def summarize(samples, percentiles=PERCENTILES, bins=50):
+    """分布摘要：均值、分位数与直方图（计数, 分箱边界）"""
+    counts, edges = np.histogram(samples, bins=bins)
+    return {
+        "mean": float(samples.mean()),
+        "percentiles": dict(zip(percentiles, np.percentile(samples, percentiles).tolist())),
+        "counts": counts,
+        "edges": edges,
+    }